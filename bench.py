@@ -2,7 +2,10 @@ from json import dumps
 
 import pyperf
 
-from tests.parsers.json import loads
+from reparsec.lexer import split_tokens
+from tests.parsers.json import loads, spec
+from tests.parsers.json_buffer import dispatch_lexer, lexer
+from tests.parsers.json_buffer import loads as buf_loads
 from tests.parsers.json_scannerless import loads as sl_loads
 
 DATA = dumps({"key_" + str(n): list(range(100)) for n in range(1000)})
@@ -10,4 +13,10 @@ DATA = dumps({"key_" + str(n): list(range(100)) for n in range(1000)})
 
 runner = pyperf.Runner()
 runner.bench_func("json_parser", lambda: loads(DATA))
+runner.bench_func("json_buffer_parser", lambda: buf_loads(DATA))
 runner.bench_func("json_sl_parser", lambda: sl_loads(DATA))
+runner.bench_func("json_split_tokens", lambda: split_tokens(DATA, spec))
+runner.bench_func("json_tokenize", lambda: lexer.tokenize(DATA))
+runner.bench_func(
+    "json_tokenize_dispatch", lambda: dispatch_lexer.tokenize(DATA)
+)
@@ -2,27 +2,28 @@
 Public API.
 """
 
-from . import layout, lexer, primitive, scannerless, sequence
+from . import binary, layout, lexer, primitive, scannerless, sequence
 from .core.repair import Insert, RepairOp, Skip
 from .core.types import Loc
 from .parser import (
     Delay, Parser, Tuple2, Tuple3, Tuple4, Tuple5, Tuple6, Tuple7, Tuple8,
     TupleParser, alt, attempt, between, bind, chainl1, chainr1, fmap, label,
-    many, maybe, recover, recover_with, recover_with_fn, sep_by, seq, seql,
-    seqr
+    many, maybe, named, recover, recover_with, recover_with_fn, sep_by, seq,
+    seql, seqr, sync_on
 )
-from .types import ErrorItem, ParseError, ParseResult
+from .types import ErrorItem, EventHandler, ParseError, ParseResult
 
 __all__ = (
-    "layout", "lexer", "primitive", "scannerless", "sequence",
+    "binary", "layout", "lexer", "primitive", "scannerless", "sequence",
     "Insert", "RepairOp", "Skip",
     "Loc",
-    "ErrorItem", "ParseError", "ParseResult",
+    "ErrorItem", "EventHandler", "ParseError", "ParseResult",
 
     "Delay", "Parser", "Tuple2", "Tuple3", "Tuple4", "Tuple5", "Tuple6",
     "Tuple7", "Tuple8", "TupleParser", "alt", "attempt", "between", "bind",
-    "chainl1", "chainr1", "fmap", "label", "many", "maybe", "recover",
-    "recover_with", "recover_with_fn", "sep_by", "seq", "seql", "seqr"
+    "chainl1", "chainr1", "fmap", "label", "many", "maybe", "named",
+    "recover", "recover_with", "recover_with_fn", "sep_by", "seq", "seql",
+    "seqr", "sync_on"
 )
 
 __version__ = "0.4.3"
@@ -0,0 +1,199 @@
+"""
+Parsers for binary data.
+
+Fixed-width values are unpacked with precompiled :class:`struct.Struct`
+objects, and variable-width fields are returned as slices of the input. Run
+the parsers with :func:`parse`, that wraps input in :class:`memoryview`, so
+these slices are views of the input rather than copies. Positions in error
+messages are byte offsets.
+"""
+
+from struct import Struct
+from typing import Any, Dict, List, Optional, Tuple, TypeVar
+
+from .core import binary, combinators
+from .core.parser import ParseObj
+from .core.types import Bytes
+from .parser import FnParser, Parser, TupleParser
+from .types import ParseResult
+
+__all__ = (
+    "unpack", "integer", "floating", "take", "length_prefixed", "count",
+    "parse", "parse_prefix"
+)
+
+S = TypeVar("S")
+A = TypeVar("A")
+
+_ORDERS = {"big": ">", "little": "<"}
+_INTEGERS = {1: "b", 2: "h", 4: "i", 8: "q"}
+_FLOATS = {2: "e", 4: "f", 8: "d"}
+
+
+def unpack(fmt: str) -> TupleParser[Bytes, Tuple[Any, ...]]:
+    """
+    Unpacks values according to the format string of :mod:`struct` and
+    returns them as a tuple.
+
+    >>> from reparsec.binary import parse, unpack
+
+    >>> parse(unpack(">HBx"), b"\\x01\\x02\\x03\\x00").unwrap()
+    (258, 3)
+
+    :param fmt: Format string
+    """
+
+    return FnParser(binary.unpack(Struct(fmt)))
+
+
+def integer(
+        size: int, order: str = "big",
+        signed: bool = False) -> TupleParser[Bytes, int]:
+    """
+    Parses an integer of ``size`` bytes.
+
+    >>> from reparsec.binary import integer, parse
+
+    >>> parse(integer(2), b"\\x01\\x02").unwrap()
+    258
+    >>> parse(integer(2, "little", signed=True), b"\\xfe\\xff").unwrap()
+    -2
+    >>> parse(integer(4), b"\\x01\\x02").unwrap()
+    Traceback (most recent call last):
+      ...
+    reparsec.types.ParseError: at 0: expected 4 bytes
+
+    :param size: Size in bytes: 1, 2, 4 or 8
+    :param order: Byte order, ``"big"`` or ``"little"``
+    :param signed: Flag to parse a two's complement integer
+    """
+
+    code = _format(_INTEGERS, size, order)
+    return FnParser(
+        binary.number(Struct(code if signed else code.upper()))
+    )
+
+
+def floating(size: int, order: str = "big") -> TupleParser[Bytes, float]:
+    """
+    Parses an IEEE 754 floating point number of ``size`` bytes.
+
+    >>> from reparsec.binary import floating, parse
+
+    >>> parse(floating(4, "little"), b"\\x00\\x00\\xc0\\x3f").unwrap()
+    1.5
+
+    :param size: Size in bytes: 2, 4 or 8
+    :param order: Byte order, ``"big"`` or ``"little"``
+    """
+
+    return FnParser(binary.number(Struct(_format(_FLOATS, size, order))))
+
+
+def take(n: int) -> TupleParser[Bytes, Bytes]:
+    """
+    Parses ``n`` bytes and returns a slice of the input.
+
+    >>> from reparsec.binary import parse, take
+
+    >>> bytes(parse(take(2), b"abc").unwrap())
+    b'ab'
+
+    :param n: Number of bytes
+    """
+
+    return FnParser(binary.take(n))
+
+
+def length_prefixed(
+        size: int, order: str = "big") -> TupleParser[Bytes, Bytes]:
+    """
+    Parses an unsigned integer of ``size`` bytes, then as many bytes as its
+    value, and returns a slice of the input with these bytes.
+
+    >>> from reparsec.binary import length_prefixed, parse
+
+    >>> bytes(parse(length_prefixed(1), b"\\x02abc").unwrap())
+    b'ab'
+    >>> parse(length_prefixed(1), b"\\x04abc").unwrap()
+    Traceback (most recent call last):
+      ...
+    reparsec.types.ParseError: at 1: expected 4 bytes
+
+    :param size: Size of the length in bytes: 1, 2, 4 or 8
+    :param order: Byte order of the length, ``"big"`` or ``"little"``
+    """
+
+    code = _format(_INTEGERS, size, order).upper()
+    return FnParser(binary.length_prefixed(Struct(code)))
+
+
+def count(n: int, parser: ParseObj[S, A]) -> TupleParser[S, List[A]]:
+    """
+    Applies the parser exactly ``n`` times and returns a list of results.
+
+    >>> from reparsec.binary import count, integer, parse
+
+    >>> parser = integer(1).bind(lambda n: count(n, integer(1)))
+
+    >>> parse(parser, b"\\x02\\x03\\x04").unwrap()
+    [3, 4]
+
+    :param n: Number of repetitions
+    :param parser: Parser
+    """
+
+    return FnParser(combinators.count(n, parser.to_fns()))
+
+
+def parse(
+        parser: Parser[Bytes, A], data: Bytes, recover: bool = False, *,
+        start: int = 0, end: Optional[int] = None) -> ParseResult[A, Bytes]:
+    """
+    Wrapper around :meth:`reparsec.Parser.parse`, that wraps ``data`` in
+    :class:`memoryview`.
+
+    :param parser: Parser to run
+    :param data: Input
+    :param recover: Flag to enable error recovery
+    :param start: Position to start parsing at
+    :param end: Position of the end of the input
+    """
+
+    return parser.parse(memoryview(data), recover, start=start, end=end)
+
+
+def parse_prefix(
+        parser: Parser[Bytes, A], data: Bytes, recover: bool = False, *,
+        start: int = 0,
+        end: Optional[int] = None) -> ParseResult[Tuple[A, int], Bytes]:
+    """
+    Wrapper around :meth:`reparsec.Parser.parse_prefix`, that wraps ``data``
+    in :class:`memoryview`. Use it to parse records that follow each other.
+
+    >>> from reparsec.binary import integer, parse_prefix
+
+    >>> data = bytes([0, 1, 0, 2])
+    >>> parse_prefix(integer(2), data).unwrap()
+    (1, 2)
+    >>> parse_prefix(integer(2), data, start=2).unwrap()
+    (2, 4)
+
+    :param parser: Parser to run
+    :param data: Input
+    :param recover: Flag to enable error recovery
+    :param start: Position to start parsing at
+    :param end: Position of the end of the input
+    """
+
+    return parser.parse_prefix(
+        memoryview(data), recover, start=start, end=end
+    )
+
+
+def _format(codes: Dict[int, str], size: int, order: str) -> str:
+    if size not in codes:
+        raise ValueError("Unsupported size {!r}".format(size))
+    if order not in _ORDERS:
+        raise ValueError("Unknown byte order {!r}".format(order))
+    return _ORDERS[order] + codes[size]
@@ -0,0 +1,109 @@
+from struct import Struct
+from typing import Any, Iterable, Optional, Tuple
+
+from .parser import ParseFastFn, ParseFn, ParseFns
+from .result import Error, Ok, Result, SimpleResult
+from .types import Bytes, Ctx
+
+
+def _expected(size: int) -> Iterable[str]:
+    return ["{} byte{}".format(size, "" if size == 1 else "s")]
+
+
+def _no_recovery(fast_fn: ParseFastFn[Bytes, Any]) -> ParseFn[Bytes, Any]:
+    def no_recovery(
+            stream: Bytes, pos: int, ctx: Ctx[Bytes], ins: int,
+            rem: Optional[int]) -> Result[Any, Bytes]:
+        return fast_fn(stream, pos, ctx)
+
+    return no_recovery
+
+
+def _unpack_fast(st: Struct) -> ParseFastFn[Bytes, Tuple[Any, ...]]:
+    size = st.size
+    unpack_from = st.unpack_from
+    expected = _expected(size)
+
+    def unpack(
+            stream: Bytes, pos: int,
+            ctx: Ctx[Bytes]) -> SimpleResult[Tuple[Any, ...], Bytes]:
+        end = pos + size
+        if end <= len(stream) and end <= ctx.end:
+            return Ok(unpack_from(stream, pos), end, ctx, (), end != pos)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return unpack
+
+
+def unpack(st: Struct) -> ParseFns[Bytes, Tuple[Any, ...]]:
+    fast_fn = _unpack_fast(st)
+    return ParseFns(fast_fn, _no_recovery(fast_fn))
+
+
+def _number_fast(st: Struct) -> ParseFastFn[Bytes, Any]:
+    size = st.size
+    unpack_from = st.unpack_from
+    expected = _expected(size)
+
+    def number(
+            stream: Bytes, pos: int,
+            ctx: Ctx[Bytes]) -> SimpleResult[Any, Bytes]:
+        end = pos + size
+        if end <= len(stream) and end <= ctx.end:
+            return Ok(unpack_from(stream, pos)[0], end, ctx, (), True)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return number
+
+
+def number(st: Struct) -> ParseFns[Bytes, Any]:
+    fast_fn = _number_fast(st)
+    return ParseFns(fast_fn, _no_recovery(fast_fn))
+
+
+def _take_fast(n: int) -> ParseFastFn[Bytes, Bytes]:
+    expected = _expected(n)
+
+    def take(
+            stream: Bytes, pos: int,
+            ctx: Ctx[Bytes]) -> SimpleResult[Bytes, Bytes]:
+        end = pos + n
+        if end <= len(stream) and end <= ctx.end:
+            return Ok(stream[pos:end], end, ctx, (), n != 0)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return take
+
+
+def take(n: int) -> ParseFns[Bytes, Bytes]:
+    if n < 0:
+        raise ValueError("Expected non-negative size")
+
+    fast_fn = _take_fast(n)
+    return ParseFns(fast_fn, _no_recovery(fast_fn))
+
+
+def _length_prefixed_fast(st: Struct) -> ParseFastFn[Bytes, Bytes]:
+    size = st.size
+    unpack_from = st.unpack_from
+    expected = _expected(size)
+
+    def length_prefixed(
+            stream: Bytes, pos: int,
+            ctx: Ctx[Bytes]) -> SimpleResult[Bytes, Bytes]:
+        start = pos + size
+        if start > len(stream) or start > ctx.end:
+            return Error(ctx.get_loc(stream, pos), expected)
+        end = start + unpack_from(stream, pos)[0]
+        if end <= len(stream) and end <= ctx.end:
+            return Ok(stream[start:end], end, ctx, (), True)
+        return Error(
+            ctx.get_loc(stream, start), _expected(end - start), True
+        )
+
+    return length_prefixed
+
+
+def length_prefixed(st: Struct) -> ParseFns[Bytes, Bytes]:
+    fast_fn = _length_prefixed_fast(st)
+    return ParseFns(fast_fn, _no_recovery(fast_fn))
@@ -1,4 +1,4 @@
-from typing import Generic, Iterable, Iterator, TypeVar
+from typing import Generic, Iterable, Iterator, List, TypeVar
 
 A = TypeVar("A")
 A_co = TypeVar("A_co", covariant=True)
@@ -15,8 +15,14 @@ class _Pair(Generic[A, B]):
 
 class Append(_Pair[Iterable[A_co], Iterable[A_co]], Iterable[A_co]):
     def __iter__(self) -> Iterator[A_co]:
-        yield from self._fst
-        yield from self._snd
+        stack: List[Iterable[A_co]] = [self._snd, self._fst]
+        while stack:
+            it = stack.pop()
+            if type(it) is Append:
+                stack.append(it._snd)
+                stack.append(it._fst)
+            else:
+                yield from it
 
     def __repr__(self) -> str:
         return "<{!r}>".format(list(self))
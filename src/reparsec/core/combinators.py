@@ -1,11 +1,17 @@
-from typing import Callable, Iterable, List, Optional, Tuple, TypeVar, Union
+from typing import (
+    Any, Callable, Iterable, List, Optional, Sized, Tuple, TypeVar, Union, cast
+)
 
 from .chain import Append
 from .parser import ParseFastFn, ParseFn, ParseFns, ParseObj
-from .recovery import MergeFn, continue_parse, join_repairs
-from .repair import make_user_insert
+from .recovery import (
+    MergeFn, continue_count, continue_many, continue_parse, join_repairs
+)
+from .repair import make_sync_insert, make_sync_skip, make_user_insert
 from .result import Error, Ok, Recovered, Result, SimpleResult
-from .types import Ctx
+from .types import (
+    END, SKIP, START, VALUE, Checkpoints, Ctx, Events, event_sink
+)
 
 S = TypeVar("S")
 A = TypeVar("A")
@@ -108,6 +114,10 @@ def _bind_fast(
         ra = parse_fn(stream, pos, ctx)
         if type(ra) is Error:
             return ra
+        if ra.value is SKIP:
+            raise RuntimeError(
+                "bind can't use the value of a named rule in parse_events"
+            )
         return fn(ra.value).parse_fast_fn(
             stream, ra.pos, ra.ctx
         ).prepend_expected(ra.expected, ra.consumed)
@@ -217,10 +227,16 @@ def seqr(
     return _seq(parse_fns, second_fns, lambda _, r: r)
 
 
+def _pair(a: Any, b: Any) -> Any:
+    if a is SKIP:
+        return SKIP
+    return (a, b)
+
+
 def seq(
         parse_fns: ParseFns[S, A],
         second_fns: ParseFns[S, B]) -> ParseFns[S, Tuple[A, B]]:
-    return _seq(parse_fns, second_fns, lambda l, r: (l, r))
+    return _seq(parse_fns, second_fns, _pair)
 
 
 A0 = TypeVar("A0")
@@ -233,61 +249,49 @@ A6 = TypeVar("A6")
 A7 = TypeVar("A7")
 
 
+def _append(a: Tuple[Any, ...], b: Any) -> Any:
+    if a is SKIP:
+        return SKIP
+    return (*a, b)
+
+
 def tuple3(
         parse_fns: ParseFns[S, Tuple[A0, A1]],
         second_fns: ParseFns[S, A2]) -> ParseFns[S, Tuple[A0, A1, A2]]:
-    def merge(a: Tuple[A0, A1], b: A2) -> Tuple[A0, A1, A2]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, _append)
 
 
 def tuple4(
         parse_fns: ParseFns[S, Tuple[A0, A1, A2]],
         second_fns: ParseFns[S, A3]) -> ParseFns[S, Tuple[A0, A1, A2, A3]]:
-    def merge(a: Tuple[A0, A1, A2], b: A3) -> Tuple[A0, A1, A2, A3]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, _append)
 
 
 def tuple5(
         parse_fns: ParseFns[S, Tuple[A0, A1, A2, A3]],
         second_fns: ParseFns[S, A4]) -> ParseFns[S, Tuple[A0, A1, A2, A3, A4]]:
-    def merge(a: Tuple[A0, A1, A2, A3], b: A4) -> Tuple[A0, A1, A2, A3, A4]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, _append)
 
 
 def tuple6(
         parse_fns: ParseFns[S, Tuple[A0, A1, A2, A3, A4]],
         second_fns: ParseFns[S, A5]) -> ParseFns[
             S, Tuple[A0, A1, A2, A3, A4, A5]]:
-    def merge(
-            a: Tuple[A0, A1, A2, A3, A4],
-            b: A5) -> Tuple[A0, A1, A2, A3, A4, A5]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, _append)
 
 
 def tuple7(
         parse_fns: ParseFns[S, Tuple[A0, A1, A2, A3, A4, A5]],
         second_fns: ParseFns[S, A6]) -> ParseFns[
             S, Tuple[A0, A1, A2, A3, A4, A5, A6]]:
-    def merge(
-            a: Tuple[A0, A1, A2, A3, A4, A5],
-            b: A6) -> Tuple[A0, A1, A2, A3, A4, A5, A6]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, _append)
 
 
 def tuple8(
         parse_fns: ParseFns[S, Tuple[A0, A1, A2, A3, A4, A5, A6]],
         second_fns: ParseFns[S, A7]) -> ParseFns[
             S, Tuple[A0, A1, A2, A3, A4, A5, A6, A7]]:
-    def merge(
-            a: Tuple[A0, A1, A2, A3, A4, A5, A6],
-            b: A7) -> Tuple[A0, A1, A2, A3, A4, A5, A6, A7]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, _append)
 
 
 def _maybe_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, Optional[A]]:
@@ -321,10 +325,41 @@ def maybe(parse_fns: ParseFns[S, A]) -> ParseFns[S, Optional[A]]:
     return ParseFns(_maybe_fast(parse_fns), _maybe(parse_fns))
 
 
-def _many_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, List[A]]:
+def _many_checkpoints(
+        parse_fn: ParseFastFn[S, A], key: object, stream: S, pos: int,
+        ctx: Ctx[S], checkpoints: Checkpoints) -> SimpleResult[List[A], S]:
+    start = pos
+    mark = ctx.mark
+    consumed = False
+    value: List[A] = []
+    size = len(checkpoints)
+    r = parse_fn(stream, pos, ctx)
+    while type(r) is Ok:
+        if not r.consumed:
+            raise RuntimeError("parser shouldn't accept empty string")
+        consumed = True
+        value.append(r.value)
+        pos = r.pos
+        ctx = r.ctx
+        while len(checkpoints) > size:
+            checkpoints.popitem()
+        r = parse_fn(stream, pos, ctx)
+    checkpoints.pop((key, start, mark), None)
+    checkpoints[key, start, mark] = (value, pos, ctx)
+    if r.consumed:
+        return r
+    return Ok(value, pos, ctx, r.expected, consumed)
+
+
+def _many_fast(
+        parse_fns: ParseFns[S, A], key: object) -> ParseFastFn[S, List[A]]:
     parse_fn = parse_fns.fast_fn
 
     def many(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[List[A], S]:
+        if ctx.recovery is not None:
+            return _many_checkpoints(
+                parse_fn, key, stream, pos, ctx, ctx.recovery.checkpoints
+            )
         consumed = False
         value: List[A] = []
         r = parse_fn(stream, pos, ctx)
@@ -338,12 +373,14 @@ def _many_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, List[A]]:
             r = parse_fn(stream, pos, ctx)
         if r.consumed:
             return r
+        if ctx.events is not None and any(v is SKIP for v in value):
+            return Ok(SKIP, pos, ctx, r.expected, consumed)
         return Ok(value, pos, ctx, r.expected, consumed)
 
     return many
 
 
-def _many(parse_fns: ParseFns[S, A]) -> ParseFn[S, List[A]]:
+def _many(parse_fns: ParseFns[S, A], key: object) -> ParseFn[S, List[A]]:
     parse_fn = parse_fns.fn
 
     def many(
@@ -351,6 +388,13 @@ def _many(parse_fns: ParseFns[S, A]) -> ParseFn[S, List[A]]:
             rem: Optional[int]) -> Result[List[A], S]:
         consumed = False
         value: List[A] = []
+        if ctx.recovery is not None:
+            cp = ctx.recovery.checkpoints.get((key, pos, ctx.mark))
+            if cp is not None:
+                value = list(cp[0])
+                consumed = bool(value)
+                pos = cp[1]
+                ctx = cp[2]
         r = parse_fn(stream, pos, ctx, ins, None)
         while type(r) is Ok:
             if not r.consumed:
@@ -361,9 +405,8 @@ def _many(parse_fns: ParseFns[S, A]) -> ParseFn[S, List[A]]:
             ctx = r.ctx
             r = parse_fn(stream, pos, ctx, ins, None)
         if type(r) is Recovered:
-            return continue_parse(
-                r, ins, lambda _, p, c, __: many(stream, p, c, ins, None),
-                lambda a, b: [*value, a, *b]
+            return continue_many(
+                r, ins, value, lambda p, c: parse_fn(stream, p, c, ins, None)
             )
         if r.consumed:
             return r
@@ -373,14 +416,84 @@ def _many(parse_fns: ParseFns[S, A]) -> ParseFn[S, List[A]]:
 
 
 def many(parse_fns: ParseFns[S, A]) -> ParseFns[S, List[A]]:
-    return ParseFns(_many_fast(parse_fns), _many(parse_fns))
+    key = object()
+    return ParseFns(_many_fast(parse_fns, key), _many(parse_fns, key))
+
+
+def _count_fast(n: int, parse_fns: ParseFns[S, A]) -> ParseFastFn[S, List[A]]:
+    parse_fn = parse_fns.fast_fn
+
+    def count(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[List[A], S]:
+        value = cast(List[A], [None] * n)
+        r: Ok[A, S] = Ok(cast(A, None), pos, ctx)
+        for i in range(n):
+            rb = parse_fn(stream, r.pos, r.ctx).prepend_expected(
+                r.expected, r.consumed
+            )
+            if type(rb) is Error:
+                return rb
+            value[i] = rb.value
+            r = rb
+        if r.ctx.events is not None and any(v is SKIP for v in value):
+            return Ok(SKIP, r.pos, r.ctx, r.expected, r.consumed)
+        return Ok(value, r.pos, r.ctx, r.expected, r.consumed)
+
+    return count
+
+
+def _count(n: int, parse_fns: ParseFns[S, A]) -> ParseFn[S, List[A]]:
+    parse_fn = parse_fns.fn
+
+    def count(
+            stream: S, pos: int, ctx: Ctx[S], ins: int,
+            rem: Optional[int]) -> Result[List[A], S]:
+        value: List[A] = []
+        r: Ok[A, S] = Ok(cast(A, None), pos, ctx)
+        for i in range(n):
+            rb = parse_fn(
+                stream, r.pos, r.ctx, ins, ins if r.consumed else rem
+            ).prepend_expected(r.expected, r.consumed)
+            if type(rb) is Error:
+                return rb
+            if type(rb) is Recovered:
+                return continue_count(
+                    rb, ins, n - i - 1, value,
+                    lambda p, c, rm: parse_fn(stream, p, c, ins, rm)
+                )
+            value.append(rb.value)
+            r = rb
+        return Ok(value, r.pos, r.ctx, r.expected, r.consumed)
+
+    return count
+
+
+def count(n: int, parse_fns: ParseFns[S, A]) -> ParseFns[S, List[A]]:
+    return ParseFns(_count_fast(n, parse_fns), _count(n, parse_fns))
 
 
 def _attempt_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
     parse_fn = parse_fns.fast_fn
 
+    def hold(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
+        window = ctx.window
+        if window is None:
+            return parse_fn(stream, pos, ctx)
+        window.hold(pos)
+        try:
+            return parse_fn(stream, pos, ctx)
+        finally:
+            window.release()
+
     def attempt(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
-        r = parse_fn(stream, pos, ctx)
+        if ctx.events is None:
+            r = hold(stream, pos, ctx)
+        else:
+            sink = event_sink(ctx.events)
+            sink.attempts += 1
+            try:
+                r = hold(stream, pos, ctx)
+            finally:
+                sink.attempts -= 1
         if type(r) is Error:
             return Error(r.loc, r.expected)
         return r
@@ -440,6 +553,44 @@ def label(parse_fns: ParseFns[S, A], x: str) -> ParseFns[S, A]:
     )
 
 
+def _named_fast(
+        parse_fns: ParseFns[S, A],
+        rule: str) -> ParseFastFn[S, Optional[A]]:
+    parse_fn = parse_fns.fast_fn
+
+    def named(
+            stream: S, pos: int,
+            ctx: Ctx[S]) -> SimpleResult[Optional[A], S]:
+        events = ctx.events
+        if events is None:
+            return parse_fn(stream, pos, ctx)
+        sink = event_sink(events)
+        start = (events, START, rule, pos, sink)
+        r = parse_fn(stream, pos, ctx.set_events(start))
+        if type(r) is Error:
+            return r
+        inner = r.ctx.events
+        if inner is start:
+            inner = (inner, VALUE, rule, r.value, sink)
+        end: Events = (inner, END, rule, r.pos, sink)
+        if r.consumed and not sink.attempts:
+            sink.deliver(end)
+            end = sink
+        return Ok(
+            SKIP, r.pos, r.ctx.set_events(end), r.expected, r.consumed
+        )
+
+    return named
+
+
+def _named(parse_fns: ParseFns[S, A]) -> ParseFn[S, Optional[A]]:
+    return parse_fns.fn
+
+
+def named(parse_fns: ParseFns[S, A], rule: str) -> ParseFns[S, Optional[A]]:
+    return ParseFns(_named_fast(parse_fns, rule), _named(parse_fns))
+
+
 def _recover_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
     return parse_fns.fast_fn
 
@@ -541,3 +692,49 @@ def recover_with_fn(
         _recover_with_fn_fast(parse_fns),
         _recover_with_fn(parse_fns, fn, label),
     )
+
+
+def _sync_on_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
+    return parse_fns.fast_fn
+
+
+def _sync_on(
+        parse_fns: ParseFns[S, A], sync_fns: ParseFns[S, object],
+        x: B, vs: str) -> ParseFn[S, Union[A, B]]:
+    parse_fast_fn = parse_fns.fast_fn
+    sync_fn = sync_fns.fast_fn
+
+    def sync_on(
+            stream: S, pos: int, ctx: Ctx[S], ins: int,
+            rem: Optional[int]) -> Result[Union[A, B], S]:
+        r = parse_fast_fn(stream, pos, ctx)
+        if type(r) is Ok or (rem is None and not r.consumed):
+            return r
+        loc = r.loc
+        cur = loc.pos
+        end = min(ctx.end, len(cast(Sized, stream)))
+        sync_ctx = ctx.update_loc(stream, cur)
+        while cur < end and type(sync_fn(stream, cur, sync_ctx)) is not Ok:
+            cur += 1
+            sync_ctx = sync_ctx.update_loc(stream, cur)
+        if cur == loc.pos:
+            rep = make_sync_insert(
+                ins, x, cur, sync_ctx, loc, vs, cur - pos + 1, r.expected
+            )
+        else:
+            rep = make_sync_skip(
+                ins, x, cur, sync_ctx, loc, cur - loc.pos, cur - pos,
+                r.expected
+            )
+        return Recovered([rep], cur - pos, loc, r.expected, r.consumed)
+
+    return sync_on
+
+
+def sync_on(
+        parse_fns: ParseFns[S, A], sync_fns: ParseFns[S, object], x: B,
+        label: Optional[str] = None) -> ParseFns[S, Union[A, B]]:
+    vs = repr(x) if label is None else label
+    return ParseFns(
+        _sync_on_fast(parse_fns), _sync_on(parse_fns, sync_fns, x, vs)
+    )
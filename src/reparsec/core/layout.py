@@ -1,7 +1,7 @@
 from typing import Optional, TypeVar
 
 from .parser import ParseFastFn, ParseFn, ParseFns
-from .result import Error, Result, SimpleResult
+from .result import Error, Ok, Result, SimpleResult
 from .types import Ctx
 
 S = TypeVar("S")
@@ -9,12 +9,20 @@ A = TypeVar("A")
 B = TypeVar("B")
 
 
+def _restore(r: SimpleResult[A, S], ctx: Ctx[S]) -> SimpleResult[A, S]:
+    if type(r) is Ok and r.ctx.events is not ctx.events:
+        return r.set_ctx(ctx.set_events(r.ctx.events))
+    return r.set_ctx(ctx)
+
+
 def _block_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
     parse_fn = parse_fns.fast_fn
 
     def block(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
         ctx = ctx.update_loc(stream, pos)
-        return parse_fn(stream, pos, ctx.set_mark(ctx.loc.col)).set_ctx(ctx)
+        return _restore(
+            parse_fn(stream, pos, ctx.set_mark(ctx.loc.col)), ctx
+        )
 
     return block
 
@@ -74,7 +82,7 @@ def _indented_fast(delta: int, parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
         ctx = ctx.update_loc(stream, pos)
         level = ctx.loc.col
         if ctx.mark + delta == level:
-            return parse_fn(stream, pos, ctx.set_mark(level)).set_ctx(ctx)
+            return _restore(parse_fn(stream, pos, ctx.set_mark(level)), ctx)
         return Error(ctx.loc, ["indentation"])
 
     return indented
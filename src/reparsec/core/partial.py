@@ -0,0 +1,177 @@
+import re
+import warnings
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    import sre_constants as sc
+    import sre_parse
+
+Pred = Callable[[str], bool]
+# A state either consumes a character matching the predicate, or, when the
+# predicate is None, moves to any of the targets without consuming anything
+State = Tuple[Optional[Pred], List[int]]
+Nfa = Tuple[List[State], int]
+
+_REPEATS = {
+    op for op in (
+        sc.MAX_REPEAT, sc.MIN_REPEAT, getattr(sc, "POSSESSIVE_REPEAT", None)
+    ) if op is not None
+}
+
+_nfas: Dict[Pattern[str], Nfa] = {}
+
+
+def can_extend(pattern: Pattern[str], text: str, pos: int) -> bool:
+    # Over-approximates: lookarounds, anchors and backreferences are treated
+    # as always matching, so True may be returned for a dead prefix
+    nfa = _nfas.get(pattern)
+    if nfa is None:
+        nfa = _nfas[pattern] = _compile(pattern)
+    states, start = nfa
+    current = _closure(states, [start])
+    for ch in text[pos:]:
+        targets: List[int] = []
+        for i in current:
+            pred, nxt = states[i]
+            if pred is not None and pred(ch):
+                targets.extend(nxt)
+        current = _closure(states, targets)
+        if not current:
+            return False
+    return True
+
+
+def _closure(states: List[State], starts: List[int]) -> List[int]:
+    seen = set(starts)
+    stack = list(starts)
+    res: List[int] = []
+    while stack:
+        i = stack.pop()
+        pred, nxt = states[i]
+        if pred is not None or not nxt:
+            res.append(i)
+            continue
+        for t in nxt:
+            if t not in seen:
+                seen.add(t)
+                stack.append(t)
+    return res
+
+
+class _Builder:
+    __slots__ = ("states", "flags")
+
+    def __init__(self, flags: int):
+        self.states: List[State] = []
+        self.flags = flags
+
+    def add(self, pred: Optional[Pred], nxt: List[int]) -> int:
+        self.states.append((pred, nxt))
+        return len(self.states) - 1
+
+    def seq(self, items: Any, nxt: int) -> int:
+        for op, av in reversed(list(items)):
+            nxt = self.item(op, av, nxt)
+        return nxt
+
+    def item(self, op: Any, av: Any, nxt: int) -> int:
+        if op is sc.LITERAL:
+            return self.add(self.chars([(op, av)]), [nxt])
+        if op is sc.NOT_LITERAL:
+            items = [(sc.NEGATE, None), (sc.LITERAL, av)]
+            return self.add(self.chars(items), [nxt])
+        if op is sc.IN:
+            return self.add(self.chars(av), [nxt])
+        if op is sc.BRANCH:
+            return self.add(None, [self.seq(p, nxt) for p in av[1]])
+        if op is sc.SUBPATTERN:
+            return self.group(av, nxt)
+        if op in _REPEATS:
+            return self.repeat(av, nxt)
+        if op is getattr(sc, "ATOMIC_GROUP", None):
+            return self.seq(av, nxt)
+        if op is sc.GROUPREF_EXISTS:
+            no = nxt if av[2] is None else self.seq(av[2], nxt)
+            return self.add(None, [self.seq(av[1], nxt), no])
+        if op in (sc.AT, sc.ASSERT, sc.ASSERT_NOT):
+            return nxt
+        start = self.add(None, [])
+        self.states[start] = (None, [self.add(_any, [start]), nxt])
+        return start
+
+    def group(self, av: Any, nxt: int) -> int:
+        flags = self.flags
+        self.flags = (flags | av[1]) & ~av[2]
+        try:
+            return self.seq(av[3], nxt)
+        finally:
+            self.flags = flags
+
+    def repeat(self, av: Any, nxt: int) -> int:
+        lo, hi, p = av
+        if hi == sc.MAXREPEAT:
+            start = self.add(None, [])
+            self.states[start] = (None, [self.seq(p, start), nxt])
+        else:
+            start = nxt
+            for _ in range(hi - lo):
+                start = self.add(None, [self.seq(p, start), nxt])
+        for _ in range(lo):
+            start = self.seq(p, start)
+        return start
+
+    def chars(self, items: Any) -> Pred:
+        negate = False
+        chars = set()
+        ranges = []
+        categories = []
+        for op, av in items:
+            if op is sc.NEGATE:
+                negate = True
+            elif op is sc.LITERAL:
+                chars.add(chr(av))
+            elif op is sc.RANGE:
+                ranges.append((chr(av[0]), chr(av[1])))
+            elif op is sc.CATEGORY:
+                categories.append(_category(av, self.flags))
+            else:
+                return _any
+        icase = bool(self.flags & re.IGNORECASE)
+
+        def pred(ch: str) -> bool:
+            for c in (ch, ch.lower(), ch.upper()) if icase else (ch,):
+                found = c in chars or any(
+                    lo <= c <= hi for lo, hi in ranges
+                ) or any(cat(c) for cat in categories)
+                if found != negate:
+                    return True
+            return False
+
+        return pred
+
+
+def _any(ch: str) -> bool:
+    return True
+
+
+_CATEGORIES = {
+    sc.CATEGORY_DIGIT: r"\d", sc.CATEGORY_NOT_DIGIT: r"\D",
+    sc.CATEGORY_SPACE: r"\s", sc.CATEGORY_NOT_SPACE: r"\S",
+    sc.CATEGORY_WORD: r"\w", sc.CATEGORY_NOT_WORD: r"\W",
+}
+
+
+def _category(code: Any, flags: int) -> Pred:
+    pat = _CATEGORIES.get(code)
+    if pat is None:
+        return _any
+    match = re.compile(pat, flags & re.ASCII).match
+    return lambda ch: match(ch) is not None
+
+
+def _compile(pattern: Pattern[str]) -> Nfa:
+    builder = _Builder(pattern.flags)
+    accept = builder.add(None, [])
+    items = sre_parse.parse(pattern.pattern, pattern.flags)
+    return builder.states, builder.seq(items, accept)
@@ -38,6 +38,28 @@ class PureFn(ParseObj[S_contra, A_co]):
         return Ok(self._fn(), pos, ctx)
 
 
+def _position_fast() -> ParseFastFn[object, int]:
+    def position(
+            stream: object, pos: int,
+            ctx: Ctx[object]) -> SimpleResult[int, object]:
+        return Ok(pos, pos, ctx)
+
+    return position
+
+
+def _position() -> ParseFn[object, int]:
+    def position(
+            stream: object, pos: int, ctx: Ctx[object], ins: int,
+            rem: Optional[int]) -> Result[int, object]:
+        return Ok(pos, pos, ctx)
+
+    return position
+
+
+def position() -> ParseFns[object, int]:
+    return ParseFns(_position_fast(), _position())
+
+
 def _unexpected_fast(expected: str) -> ParseFastFn[object, None]:
     def unexpected(
             stream: object, pos: int,
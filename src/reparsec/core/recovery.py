@@ -1,8 +1,10 @@
-from typing import Callable, Iterable, List, TypeVar, Union
+from typing import (
+    Callable, Generic, Iterable, List, Optional, Tuple, TypeVar, Union
+)
 
 from .chain import Append
-from .repair import OpItem, Repair, ops_prepend_expected
-from .result import Ok, Recovered, Result
+from .repair import Ops, Repair, join_ops, ops_prepend_expected
+from .result import Error, Ok, Recovered, Result
 from .types import Ctx
 
 S = TypeVar("S")
@@ -45,6 +47,135 @@ def continue_parse(
     return Recovered(reps, ra.min_prio, ra.loc, ra.expected, ra.consumed)
 
 
+class _Chunk(Generic[A]):
+    __slots__ = "prev", "items"
+
+    def __init__(self, prev: "Optional[_Chunk[A]]", items: List[A]):
+        self.prev = prev
+        self.items = items
+
+    def to_list(self) -> List[A]:
+        chunks: List[List[A]] = []
+        chunk: Optional[_Chunk[A]] = self
+        while chunk is not None:
+            chunks.append(chunk.items)
+            chunk = chunk.prev
+        return [item for items in reversed(chunks) for item in items]
+
+
+def continue_many(
+        ra: Recovered[A, S], ins: int, value: List[A],
+        parse: Callable[[int, Ctx[S]], Result[A, S]]) -> Result[List[A], S]:
+
+    root = _Chunk(None, value)
+    reps: List[Repair[List[A], S]] = []
+    pending: List[Repair[_Chunk[A], S]] = [
+        Repair(
+            r.cost, r.prio, r.ins, r.ops, _Chunk(root, [r.value]), r.pos,
+            r.ctx, r.expected, r.consumed
+        )
+        for r in reversed(ra.repairs)
+    ]
+    while pending:
+        r = pending.pop()
+        chunk = r.value
+        pos = r.pos
+        ctx = r.ctx
+        consumed = False
+        rb = parse(pos, ctx)
+        while type(rb) is Ok:
+            if not rb.consumed:
+                raise RuntimeError("parser shouldn't accept empty string")
+            consumed = True
+            chunk.items.append(rb.value)
+            pos = rb.pos
+            ctx = rb.ctx
+            rb = parse(pos, ctx)
+        if type(rb) is Recovered:
+            for rr in reversed(rb.repairs):
+                pending.append(
+                    Repair(
+                        r.cost + rr.cost, r.prio, rr.ins, _join_ops(r, rr),
+                        _Chunk(chunk, [rr.value]), rr.pos, rr.ctx,
+                        _append_expected(r, rr.expected, rr.consumed),
+                        r.consumed or rr.consumed
+                    )
+                )
+        elif not rb.consumed:
+            reps.append(
+                Repair(
+                    r.cost, r.prio, r.ins if r.pos == pos else ins, r.ops,
+                    chunk.to_list(), pos, ctx,
+                    _append_expected(r, rb.expected, consumed),
+                    r.consumed or consumed
+                )
+            )
+
+    return Recovered(reps, ra.min_prio, ra.loc, ra.expected, ra.consumed)
+
+
+def continue_count(
+        ra: Recovered[A, S], ins: int, n: int, value: List[A],
+        parse: Callable[[int, Ctx[S], int], Result[A, S]]
+) -> Result[List[A], S]:
+
+    root = _Chunk(None, value)
+    reps: List[Repair[List[A], S]] = []
+    pending: List[Tuple[Repair[_Chunk[A], S], int]] = [
+        (
+            Repair(
+                r.cost, r.prio, r.ins, r.ops, _Chunk(root, [r.value]), r.pos,
+                r.ctx, r.expected, r.consumed
+            ),
+            n
+        )
+        for r in reversed(ra.repairs)
+    ]
+    while pending:
+        r, i = pending.pop()
+        chunk = r.value
+        pos = r.pos
+        ctx = r.ctx
+        expected: Iterable[str] = ()
+        consumed = False
+        while i:
+            rb = parse(pos, ctx, ins if consumed else r.ins).prepend_expected(
+                expected, consumed
+            )
+            if type(rb) is Error:
+                break
+            if type(rb) is Recovered:
+                for rr in reversed(rb.repairs):
+                    pending.append((
+                        Repair(
+                            r.cost + rr.cost, r.prio, rr.ins,
+                            _join_ops(r, rr), _Chunk(chunk, [rr.value]),
+                            rr.pos, rr.ctx,
+                            _append_expected(r, rr.expected, rr.consumed),
+                            r.consumed or rr.consumed
+                        ),
+                        i - 1
+                    ))
+                break
+            chunk.items.append(rb.value)
+            pos = rb.pos
+            ctx = rb.ctx
+            expected = rb.expected
+            consumed = rb.consumed
+            i -= 1
+        else:
+            reps.append(
+                Repair(
+                    r.cost, r.prio, r.ins if r.pos == pos else ins, r.ops,
+                    chunk.to_list(), pos, ctx,
+                    _append_expected(r, expected, consumed),
+                    r.consumed or consumed
+                )
+            )
+
+    return Recovered(reps, ra.min_prio, ra.loc, ra.expected, ra.consumed)
+
+
 def join_repairs(
         ra: Recovered[A, S], rb: Recovered[B, S]) -> Recovered[Union[A, B], S]:
     reps: List[Repair[Union[A, B], S]] = list(ra.repairs)
@@ -68,11 +199,10 @@ def join_repairs(
     )
 
 
-def _join_ops(rep: Repair[A, S], repb: Repair[B, S]) -> List[OpItem]:
-    ops = [OpItem(i.op, i.loc, i.expected, i.consumed) for i in rep.ops]
-    ops_prepend_expected(repb.ops, rep.expected, rep.consumed)
-    ops.extend(repb.ops)
-    return ops
+def _join_ops(rep: Repair[A, S], repb: Repair[B, S]) -> Ops:
+    return join_ops(
+        rep.ops, ops_prepend_expected(repb.ops, rep.expected, rep.consumed)
+    )
 
 
 def _append_expected(
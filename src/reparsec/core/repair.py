@@ -1,5 +1,7 @@
 from dataclasses import dataclass
-from typing import Generic, Iterable, List, Optional, TypeVar, Union
+from typing import (
+    Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+)
 
 from typing_extensions import final
 
@@ -14,51 +16,142 @@ S = TypeVar("S")
 @dataclass
 @final
 class Skip:
+    __slots__ = "count",
+
     count: int
 
 
 @dataclass
 @final
 class Insert:
+    __slots__ = "label",
+
     label: str
 
 
 RepairOp = Union[Skip, Insert]
 
 
-@dataclass
+@final
 class OpItem:
-    op: RepairOp
-    loc: Loc
-    expected: Iterable[str] = ()
-    consumed: bool = False
+    __slots__ = "op", "loc", "expected", "consumed"
 
+    def __init__(
+            self, op: RepairOp, loc: Loc, expected: Iterable[str] = (),
+            consumed: bool = False):
+        self.op = op
+        self.loc = loc
+        self.expected = expected
+        self.consumed = consumed
+
+    def __repr__(self) -> str:
+        return (
+            "OpItem(op={!r}, loc={!r}, expected={!r}, consumed={!r})"
+        ).format(self.op, self.loc, self.expected, self.consumed)
 
-@dataclass
-class Repair(Generic[A_co, S]):
-    cost: int
-    prio: Optional[int]
-    ins: int
-    ops: List[OpItem]
-    value: A_co
-    pos: int
-    ctx: Ctx[S]
-    expected: Iterable[str] = ()
-    consumed: bool = False
 
+# Op items are never mutated once created, so op sequences can be shared
+# between repairs and concatenated in constant time with ``Append``. Changes
+# of expected values are recorded as ``_ExpectedOps`` wrappers and applied
+# only when the sequence is iterated with ``iter_ops``.
+Ops = Iterable[OpItem]
 
-def ops_set_expected(ops: List[OpItem], expected: Iterable[str]) -> None:
-    for op in ops:
-        if not op.consumed:
-            op.expected = expected
+
+@final
+class _ExpectedOps(Iterable[OpItem]):
+    __slots__ = "ops", "expected", "consumed", "replace"
+
+    def __init__(
+            self, ops: Ops, expected: Iterable[str], consumed: bool,
+            replace: bool):
+        self.ops = ops
+        self.expected = expected
+        self.consumed = consumed
+        self.replace = replace
+
+    def __iter__(self) -> Iterator[OpItem]:
+        return iter_ops(self)
+
+    def __repr__(self) -> str:
+        return "<{!r}>".format(list(self))
+
+
+_Transforms = Optional[Tuple[_ExpectedOps, "_Transforms"]]
+
+
+def _apply_transforms(item: OpItem, transforms: _Transforms) -> OpItem:
+    if transforms is None or item.consumed:
+        return item
+    expected = item.expected
+    consumed = False
+    while transforms is not None and not consumed:
+        tr, transforms = transforms
+        if tr.replace:
+            expected = tr.expected
+        else:
+            expected = Append(tr.expected, expected)
+            consumed = tr.consumed
+    return OpItem(item.op, item.loc, expected, consumed)
+
+
+def iter_ops(ops: Ops) -> Iterator[OpItem]:
+    stack: List[Tuple[Ops, _Transforms]] = [(ops, None)]
+    while stack:
+        node, transforms = stack.pop()
+        if type(node) is Append:
+            stack.append((node._snd, transforms))
+            stack.append((node._fst, transforms))
+        elif type(node) is _ExpectedOps:
+            stack.append((node.ops, (node, transforms)))
+        else:
+            for item in node:
+                yield _apply_transforms(item, transforms)
+
+
+@final
+class Repair(Generic[A_co, S]):
+    __slots__ = (
+        "cost", "prio", "ins", "ops", "value", "pos", "ctx", "expected",
+        "consumed"
+    )
+
+    def __init__(
+            self, cost: int, prio: Optional[int], ins: int, ops: Ops,
+            value: A_co, pos: int, ctx: Ctx[S],
+            expected: Iterable[str] = (), consumed: bool = False):
+        self.cost = cost
+        self.prio = prio
+        self.ins = ins
+        self.ops = ops
+        self.value = value
+        self.pos = pos
+        self.ctx = ctx
+        self.expected = expected
+        self.consumed = consumed
+
+    def __repr__(self) -> str:
+        return (
+            "Repair(cost={!r}, prio={!r}, ins={!r}, ops={!r}, value={!r},"
+            " pos={!r}, ctx={!r}, expected={!r}, consumed={!r})"
+        ).format(
+            self.cost, self.prio, self.ins, self.ops, self.value,
+            self.pos, self.ctx, self.expected, self.consumed
+        )
+
+
+def ops_set_expected(ops: Ops, expected: Iterable[str]) -> Ops:
+    while type(ops) is _ExpectedOps and not ops.consumed:
+        ops = ops.ops
+    return _ExpectedOps(ops, expected, False, True)
 
 
 def ops_prepend_expected(
-        ops: List[OpItem], expected: Iterable[str], consumed: bool) -> None:
-    for op in ops:
-        if not op.consumed:
-            op.expected = Append(expected, op.expected)
-            op.consumed |= consumed
+        ops: Ops, expected: Iterable[str], consumed: bool) -> Ops:
+    return _ExpectedOps(ops, expected, consumed, False)
+
+
+def join_ops(ops: Ops, second: Ops) -> Ops:
+    return Append(ops, second)
 
 
 def make_insert(
@@ -88,6 +181,24 @@ def make_skip(
     )
 
 
+def make_sync_skip(
+        ins: int, value: A, pos: int, ctx: Ctx[S], loc: Loc, skip: int,
+        cost: int, expected: Iterable[str] = ()) -> Repair[A, S]:
+    return Repair(
+        cost, False, ins, [OpItem(Skip(skip), loc, expected)], value, pos, ctx,
+        (), True
+    )
+
+
+def make_sync_insert(
+        ins: int, value: A, pos: int, ctx: Ctx[S], loc: Loc, label: str,
+        cost: int, expected: Iterable[str] = ()) -> Repair[A, S]:
+    return Repair(
+        cost, False, ins, [OpItem(Insert(label), loc, expected)], value, pos,
+        ctx, (), True
+    )
+
+
 def make_pending_skip(
         ins: int, value: A, pos: int, ctx: Ctx[S], loc: Loc, skip: int,
         expected: Iterable[str] = ()) -> Repair[A, S]:
@@ -1,10 +1,12 @@
-from typing import Callable, Generic, Iterable, List, Optional, TypeVar, Union
+from typing import (
+    Callable, Generic, Iterable, List, Optional, TypeVar, Union, cast
+)
 
 from typing_extensions import final
 
 from .chain import Append
 from .repair import Repair, ops_prepend_expected, ops_set_expected
-from .types import Ctx, Loc
+from .types import SKIP, Ctx, Loc
 
 A = TypeVar("A")
 A_co = TypeVar("A_co", covariant=True)
@@ -31,6 +33,8 @@ class Ok(Generic[A_co, S]):
         ).format(self.value, self.pos, self.ctx, self.expected, self.consumed)
 
     def fmap(self, fn: Callable[[A_co], B]) -> "Ok[B, S]":
+        if self.value is SKIP:
+            return cast(Ok[B, S], self)
         return Ok(
             fn(self.value), self.pos, self.ctx, self.expected, self.consumed
         )
@@ -131,7 +135,7 @@ class Recovered(Generic[A_co, S]):
         for r in self.repairs:
             if not r.consumed:
                 r.expected = expected
-            ops_set_expected(r.ops, expected)
+            r.ops = ops_set_expected(r.ops, expected)
         return self
 
     def prepend_expected(
@@ -144,7 +148,7 @@ class Recovered(Generic[A_co, S]):
             if not r.consumed:
                 r.expected = Append(expected, r.expected)
                 r.consumed |= consumed
-            ops_prepend_expected(r.ops, expected, consumed)
+            r.ops = ops_prepend_expected(r.ops, expected, consumed)
         return self
 
 
@@ -1,10 +1,16 @@
 import re
-from typing import List, Optional, Pattern, TypeVar, Union
+import sys
+from array import array
+from bisect import bisect_right
+from typing import (
+    Any, AnyStr, List, Optional, Pattern, TypeVar, Union, overload
+)
 
 from .parser import ParseFastFn, ParseFn, ParseFns
 from .repair import Repair, make_insert, make_skip
 from .result import Error, Ok, Recovered, Result, SimpleResult
-from .types import Ctx, Loc
+from .stream import TextStream
+from .types import Bytes, Ctx, Loc
 
 A = TypeVar("A")
 
@@ -20,13 +26,64 @@ def get_loc(loc: Loc, stream: str, pos: int) -> Loc:
     return Loc(pos, line, col)
 
 
+_newline = re.compile(b"\n")
+_newline_str = re.compile("\n")
+_INDEX_STEP = 1024
+
+
+class LineIndex:
+    __slots__ = (
+        "lines", "_stream", "_newline", "_scanned", "_end", "_line",
+        "_line_start", "_line_end"
+    )
+
+    def __init__(
+            self, stream: Union[str, Bytes], start: int = 0,
+            end: int = sys.maxsize):
+        self.lines = array("q", [start])
+        self._stream = stream
+        self._newline: Pattern[Any]
+        if isinstance(stream, str):
+            self._newline = _newline_str
+        else:
+            self._newline = _newline
+        self._scanned = start
+        self._end = end
+        self._line = 0
+        self._line_start = start
+        self._line_end = start + 1
+
+    def get_loc(self, loc: Loc, stream: Any, pos: int) -> Loc:
+        line_start = self._line_start
+        if line_start <= pos < self._line_end:
+            return Loc(pos, self._line, pos - line_start)
+        if pos > self._scanned:
+            self._extend(pos)
+        lines = self.lines
+        line = self._line = bisect_right(lines, pos) - 1
+        line_start = self._line_start = lines[line]
+        if line + 1 < len(lines):
+            self._line_end = lines[line + 1]
+        else:
+            self._line_end = self._scanned + 1
+        return Loc(pos, line, pos - line_start)
+
+    def _extend(self, pos: int) -> None:
+        stop = min(max(pos, self._scanned + _INDEX_STEP), self._end)
+        self.lines.extend(
+            m.end()
+            for m in self._newline.finditer(self._stream, self._scanned, stop)
+        )
+        self._scanned = stop
+
+
 def _literal_fast(s: str) -> ParseFastFn[str, str]:
     ls = len(s)
     expected = [repr(s)]
 
     def literal(
             stream: str, pos: int, ctx: Ctx[str]) -> SimpleResult[str, str]:
-        if stream.startswith(s, pos):
+        if stream.startswith(s, pos, ctx.end):
             return Ok(s, pos + ls, ctx.update_loc(stream, pos + ls), (), True)
         return Error(ctx.get_loc(stream, pos), expected)
 
@@ -41,7 +98,7 @@ def _literal(s: str) -> ParseFn[str, str]:
     def literal(
             stream: str, pos: int, ctx: Ctx[str], ins: int,
             rem: Optional[int]) -> Result[str, str]:
-        if stream.startswith(s, pos):
+        if stream.startswith(s, pos, ctx.end):
             return Ok(s, pos + ls, ctx.update_loc(stream, pos + ls), (), True)
         if rem is None:
             return Error(ctx.get_loc(stream, pos), expected)
@@ -50,8 +107,9 @@ def _literal(s: str) -> ParseFn[str, str]:
         if rem:
             reps.append(make_insert(rem, s, pos, ctx, loc, ss, expected))
         cur = pos + 1
-        while cur < len(stream):
-            if stream.startswith(s, cur):
+        stop = min(ctx.end, len(stream))
+        while cur < stop:
+            if stream.startswith(s, cur, ctx.end):
                 reps.append(
                     make_skip(
                         ins, s, cur + ls, ctx.update_loc(stream, cur + ls),
@@ -65,21 +123,87 @@ def _literal(s: str) -> ParseFn[str, str]:
     return literal
 
 
+def _literal_bytes_fast(s: bytes) -> ParseFastFn[Bytes, bytes]:
+    ls = len(s)
+    expected = [repr(s)]
+
+    def literal(
+            stream: Bytes, pos: int,
+            ctx: Ctx[Bytes]) -> SimpleResult[bytes, Bytes]:
+        if pos + ls <= ctx.end and stream[pos:pos + ls] == s:
+            return Ok(s, pos + ls, ctx.update_loc(stream, pos + ls), (), True)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return literal
+
+
+def _literal_bytes(s: bytes) -> ParseFn[Bytes, bytes]:
+    ls = len(s)
+    ss = repr(s)
+    expected = [ss]
+
+    def literal(
+            stream: Bytes, pos: int, ctx: Ctx[Bytes], ins: int,
+            rem: Optional[int]) -> Result[bytes, Bytes]:
+        if pos + ls <= ctx.end and stream[pos:pos + ls] == s:
+            return Ok(s, pos + ls, ctx.update_loc(stream, pos + ls), (), True)
+        if rem is None:
+            return Error(ctx.get_loc(stream, pos), expected)
+        loc = ctx.get_loc(stream, pos)
+        reps: List[Repair[bytes, Bytes]] = []
+        if rem:
+            reps.append(make_insert(rem, s, pos, ctx, loc, ss, expected))
+        cur = pos + 1
+        stop = min(ctx.end, len(stream))
+        while cur < stop:
+            if cur + ls <= ctx.end and stream[cur:cur + ls] == s:
+                reps.append(
+                    make_skip(
+                        ins, s, cur + ls, ctx.update_loc(stream, cur + ls),
+                        loc, cur - pos, expected
+                    )
+                )
+                return Recovered(reps, cur - pos, loc, expected)
+            cur += 1
+        return Recovered(reps, None, loc, expected)
+
+    return literal
+
+
+@overload
 def literal(s: str) -> ParseFns[str, str]:
+    ...
+
+
+@overload
+def literal(s: bytes) -> ParseFns[Bytes, bytes]:
+    ...
+
+
+def literal(
+        s: Union[str, bytes]
+) -> Union[ParseFns[str, str], ParseFns[Bytes, bytes]]:
     if len(s) == 0:
         raise ValueError("Expected non-empty value")
 
+    if isinstance(s, bytes):
+        return ParseFns(_literal_bytes_fast(s), _literal_bytes(s))
     return ParseFns(_literal_fast(s), _literal(s))
 
 
 def _regexp_fast(
-        pat: Pattern[str], group: Union[int, str]) -> ParseFastFn[str, str]:
+        pat: Pattern[AnyStr],
+        group: Union[int, str]) -> ParseFastFn[Any, AnyStr]:
     match = pat.match
 
-    def regexp(stream: str, pos: int, ctx: Ctx[str]) -> SimpleResult[str, str]:
-        r = match(stream, pos=pos)
+    def regexp(
+            stream: Any, pos: int,
+            ctx: Ctx[Any]) -> SimpleResult[AnyStr, Any]:
+        if type(stream) is TextStream:
+            return _regexp_stream(pat, group, stream, pos, ctx)
+        r = match(stream, pos, ctx.end)
         if r is not None:
-            v: Optional[str] = r.group(group)
+            v: Optional[AnyStr] = r.group(group)
             if v is not None:
                 end = r.end()
                 return Ok(v, end, ctx.update_loc(stream, end), (), end != pos)
@@ -88,15 +212,29 @@ def _regexp_fast(
     return regexp
 
 
-def _regexp(pat: Pattern[str], group: Union[int, str]) -> ParseFn[str, str]:
+def _regexp_stream(
+        pat: Pattern[Any], group: Union[int, str], stream: TextStream,
+        pos: int, ctx: Ctx[Any]) -> SimpleResult[Any, Any]:
+    r = stream.match(pat, pos)
+    if r is not None:
+        v: Optional[str] = r.group(group)
+        if v is not None:
+            end = r.end() + stream.offset
+            return Ok(v, end, ctx.update_loc(stream, end), (), end != pos)
+    return Error(ctx.get_loc(stream, pos))
+
+
+def _regexp(
+        pat: Pattern[AnyStr],
+        group: Union[int, str]) -> ParseFn[Any, AnyStr]:
     match = pat.match
 
     def regexp(
-            stream: str, pos: int, ctx: Ctx[str], ins: int,
-            rem: Optional[int]) -> Result[str, str]:
-        r = match(stream, pos=pos)
+            stream: Any, pos: int, ctx: Ctx[Any], ins: int,
+            rem: Optional[int]) -> Result[AnyStr, Any]:
+        r = match(stream, pos, ctx.end)
         if r is not None:
-            v: Optional[str] = r.group(group)
+            v: Optional[AnyStr] = r.group(group)
             if v is not None:
                 end = r.end()
                 return Ok(v, end, ctx.update_loc(stream, end), (), end != pos)
@@ -104,8 +242,9 @@ def _regexp(pat: Pattern[str], group: Union[int, str]) -> ParseFn[str, str]:
             return Error(ctx.get_loc(stream, pos))
         loc = ctx.get_loc(stream, pos)
         cur = pos + 1
-        while cur < len(stream):
-            r = match(stream, pos=cur)
+        stop = min(ctx.end, len(stream))
+        while cur < stop:
+            r = match(stream, cur, ctx.end)
             if r is not None:
                 v = r.group(group)
                 if v is not None:
@@ -124,6 +263,16 @@ def _regexp(pat: Pattern[str], group: Union[int, str]) -> ParseFn[str, str]:
     return regexp
 
 
+@overload
 def regexp(pat: str, group: Union[int, str]) -> ParseFns[str, str]:
+    ...
+
+
+@overload
+def regexp(pat: bytes, group: Union[int, str]) -> ParseFns[Bytes, bytes]:
+    ...
+
+
+def regexp(pat: AnyStr, group: Union[int, str]) -> ParseFns[Any, AnyStr]:
     p = re.compile(pat)
     return ParseFns(_regexp_fast(p, group), _regexp(p, group))
@@ -1,18 +1,36 @@
-from typing import Callable, Iterable, List, Optional, Sequence, Sized, TypeVar
+import re
+from bisect import bisect_left
+from typing import (
+    AbstractSet, Callable, Iterable, List, Mapping, Optional, Pattern,
+    Sequence, Sized, TypeVar, Union, cast
+)
+
+from typing_extensions import Protocol
 
 from .parser import ParseFastFn, ParseFn, ParseFns
-from .repair import Repair, make_insert, make_pending_skip, make_skip
+from .repair import (
+    Repair, make_insert, make_pending_skip, make_skip, make_sync_skip
+)
 from .result import Error, Ok, Recovered, Result, SimpleResult
 from .types import Ctx
 
 A = TypeVar("A")
+B = TypeVar("B")
+C = TypeVar("C")
+A_co = TypeVar("A_co", covariant=True)
 
 
 def _eof_fast() -> ParseFastFn[Sized, None]:
     def eof(
             stream: Sized, pos: int,
             ctx: Ctx[Sized]) -> SimpleResult[None, Sized]:
-        if pos == len(stream):
+        if pos == ctx.end:
+            return Ok(None, pos, ctx)
+        window = ctx.window
+        if window is not None:
+            if window.at_end(pos):
+                return Ok(None, pos, ctx)
+        elif pos == len(stream):
             return Ok(None, pos, ctx)
         return Error(ctx.get_loc(stream, pos), ["end of file"])
 
@@ -23,12 +41,12 @@ def _eof() -> ParseFn[Sized, None]:
     def eof(
             stream: Sized, pos: int, ctx: Ctx[Sized], ins: int,
             rem: Optional[int]) -> Result[None, Sized]:
-        if pos == len(stream):
+        sl = min(ctx.end, len(stream))
+        if pos == sl:
             return Ok(None, pos, ctx)
         if rem is None:
             return Error(ctx.get_loc(stream, pos), ["end of file"])
         loc = ctx.get_loc(stream, pos)
-        sl = len(stream)
         return Recovered(
             [
                 make_pending_skip(
@@ -48,10 +66,14 @@ def _satisfy_fast(test: Callable[[A], bool]) -> ParseFastFn[Sequence[A], A]:
     def satisfy(
             stream: Sequence[A], pos: int,
             ctx: Ctx[Sequence[A]]) -> SimpleResult[A, Sequence[A]]:
-        if pos < len(stream):
-            t = stream[pos]
-            if test(t):
-                return Ok(t, pos + 1, ctx, (), True)
+        if pos < ctx.end:
+            try:
+                t = stream[pos]
+            except IndexError:
+                pass
+            else:
+                if test(t):
+                    return Ok(t, pos + 1, ctx, (), True)
         return Error(ctx.get_loc(stream, pos))
 
     return satisfy
@@ -61,15 +83,20 @@ def _satisfy(test: Callable[[A], bool]) -> ParseFn[Sequence[A], A]:
     def satisfy(
             stream: Sequence[A], pos: int, ctx: Ctx[Sequence[A]], ins: int,
             rem: Optional[int]) -> Result[A, Sequence[A]]:
-        if pos < len(stream):
-            t = stream[pos]
-            if test(t):
-                return Ok(t, pos + 1, ctx, (), True)
+        if pos < ctx.end:
+            try:
+                t = stream[pos]
+            except IndexError:
+                pass
+            else:
+                if test(t):
+                    return Ok(t, pos + 1, ctx, (), True)
         if rem is None:
             return Error(ctx.get_loc(stream, pos))
         loc = ctx.get_loc(stream, pos)
         cur = pos + 1
-        while cur < len(stream):
+        stop = min(ctx.end, len(stream))
+        while cur < stop:
             t = stream[cur]
             if test(t):
                 return Recovered(
@@ -94,10 +121,14 @@ def _sym_fast(s: A, expected: Iterable[str]) -> ParseFastFn[Sequence[A], A]:
     def sym(
             stream: Sequence[A], pos: int,
             ctx: Ctx[Sequence[A]]) -> SimpleResult[A, Sequence[A]]:
-        if pos < len(stream):
-            t = stream[pos]
-            if t == s:
-                return Ok(t, pos + 1, ctx, (), True)
+        if pos < ctx.end:
+            try:
+                t = stream[pos]
+            except IndexError:
+                pass
+            else:
+                if t == s:
+                    return Ok(t, pos + 1, ctx, (), True)
         return Error(ctx.get_loc(stream, pos), expected)
 
     return sym
@@ -107,10 +138,14 @@ def _sym(s: A, label: str, expected: Iterable[str]) -> ParseFn[Sequence[A], A]:
     def sym(
             stream: Sequence[A], pos: int, ctx: Ctx[Sequence[A]], ins: int,
             rem: Optional[int]) -> Result[A, Sequence[A]]:
-        if pos < len(stream):
-            t = stream[pos]
-            if t == s:
-                return Ok(t, pos + 1, ctx, (), True)
+        if pos < ctx.end:
+            try:
+                t = stream[pos]
+            except IndexError:
+                pass
+            else:
+                if t == s:
+                    return Ok(t, pos + 1, ctx, (), True)
         if rem is None:
             return Error(ctx.get_loc(stream, pos), expected)
         loc = ctx.get_loc(stream, pos)
@@ -118,7 +153,8 @@ def _sym(s: A, label: str, expected: Iterable[str]) -> ParseFn[Sequence[A], A]:
         if rem:
             reps.append(make_insert(rem, s, pos, ctx, loc, label, expected))
         cur = pos + 1
-        while cur < len(stream):
+        stop = min(ctx.end, len(stream))
+        while cur < stop:
             t = stream[cur]
             if t == s:
                 reps.append(
@@ -142,3 +178,290 @@ def sym(s: A, label: Optional[str]) -> ParseFns[Sequence[A], A]:
     expected = [label_]
 
     return ParseFns(_sym_fast(s, expected), _sym(s, label_, expected))
+
+
+class TokenStream(Protocol[A_co]):
+    @property
+    def kind_ids(self) -> Sequence[int]:
+        ...
+
+    @property
+    def value_ids(self) -> Sequence[int]:
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+    def __getitem__(self, index: int) -> A_co:
+        ...
+
+
+def _token_fast(
+        kind: int,
+        expected: Iterable[str]) -> ParseFastFn[TokenStream[A], A]:
+    def token(
+            stream: TokenStream[A], pos: int,
+            ctx: Ctx[TokenStream[A]]) -> SimpleResult[A, TokenStream[A]]:
+        kind_ids = stream.kind_ids
+        if pos < len(kind_ids) and pos < ctx.end and kind_ids[pos] == kind:
+            return Ok(stream[pos], pos + 1, ctx, (), True)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return token
+
+
+def _token(kind: int, expected: Iterable[str]) -> ParseFn[TokenStream[A], A]:
+    def token(
+            stream: TokenStream[A], pos: int, ctx: Ctx[TokenStream[A]],
+            ins: int, rem: Optional[int]) -> Result[A, TokenStream[A]]:
+        kind_ids = stream.kind_ids
+        if pos < len(kind_ids) and pos < ctx.end and kind_ids[pos] == kind:
+            return Ok(stream[pos], pos + 1, ctx, (), True)
+        if rem is None:
+            return Error(ctx.get_loc(stream, pos), expected)
+        loc = ctx.get_loc(stream, pos)
+        cur = pos + 1
+        stop = min(ctx.end, len(kind_ids))
+        while cur < stop:
+            if kind_ids[cur] == kind:
+                return Recovered(
+                    [
+                        make_skip(
+                            ins, stream[cur], cur + 1,
+                            ctx.update_loc(stream, cur + 1), loc, cur - pos,
+                            expected
+                        ),
+                    ], cur - pos, loc, expected
+                )
+            cur += 1
+        return Error(loc, expected)
+
+    return token
+
+
+def token(kind: int, label: str) -> ParseFns[TokenStream[A], A]:
+    expected = [label]
+    return ParseFns(_token_fast(kind, expected), _token(kind, expected))
+
+
+def _token_value_fast(
+        value: int,
+        expected: Iterable[str]) -> ParseFastFn[TokenStream[A], A]:
+    def token_value(
+            stream: TokenStream[A], pos: int,
+            ctx: Ctx[TokenStream[A]]) -> SimpleResult[A, TokenStream[A]]:
+        value_ids = stream.value_ids
+        if pos < len(value_ids) and pos < ctx.end and (
+                value_ids[pos] == value):
+            return Ok(stream[pos], pos + 1, ctx, (), True)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return token_value
+
+
+def _token_value(
+        value: int, s: A, label: str,
+        expected: Iterable[str]) -> ParseFn[TokenStream[A], A]:
+    def token_value(
+            stream: TokenStream[A], pos: int, ctx: Ctx[TokenStream[A]],
+            ins: int, rem: Optional[int]) -> Result[A, TokenStream[A]]:
+        value_ids = stream.value_ids
+        if pos < len(value_ids) and pos < ctx.end and (
+                value_ids[pos] == value):
+            return Ok(stream[pos], pos + 1, ctx, (), True)
+        if rem is None:
+            return Error(ctx.get_loc(stream, pos), expected)
+        loc = ctx.get_loc(stream, pos)
+        reps: List[Repair[A, TokenStream[A]]] = []
+        if rem:
+            reps.append(make_insert(rem, s, pos, ctx, loc, label, expected))
+        cur = pos + 1
+        stop = min(ctx.end, len(value_ids))
+        while cur < stop:
+            if value_ids[cur] == value:
+                reps.append(
+                    make_skip(
+                        ins, stream[cur], cur + 1,
+                        ctx.update_loc(stream, cur + 1), loc, cur - pos,
+                        expected
+                    )
+                )
+                return Recovered(reps, cur - pos, loc, expected)
+            cur += 1
+        return Recovered(reps, None, loc, expected)
+
+    return token_value
+
+
+def token_value(value: int, s: A, label: str) -> ParseFns[TokenStream[A], A]:
+    expected = [label]
+    return ParseFns(
+        _token_value_fast(value, expected),
+        _token_value(value, s, label, expected)
+    )
+
+
+def _token_switch_fast(
+        kinds: AbstractSet[int], values: AbstractSet[int],
+        expected: Iterable[str]) -> ParseFastFn[TokenStream[A], A]:
+    def token_switch(
+            stream: TokenStream[A], pos: int,
+            ctx: Ctx[TokenStream[A]]) -> SimpleResult[A, TokenStream[A]]:
+        kind_ids = stream.kind_ids
+        if pos < len(kind_ids) and pos < ctx.end and (
+                kind_ids[pos] in kinds or stream.value_ids[pos] in values):
+            return Ok(stream[pos], pos + 1, ctx, (), True)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return token_switch
+
+
+def _token_switch(
+        kinds: AbstractSet[int], values: AbstractSet[int],
+        expected: Iterable[str],
+        parse_fns: ParseFns[TokenStream[A], A]) -> ParseFn[TokenStream[A], A]:
+    parse_fn = parse_fns.fn
+
+    def token_switch(
+            stream: TokenStream[A], pos: int, ctx: Ctx[TokenStream[A]],
+            ins: int, rem: Optional[int]) -> Result[A, TokenStream[A]]:
+        if rem is not None:
+            return parse_fn(stream, pos, ctx, ins, rem)
+        kind_ids = stream.kind_ids
+        if pos < len(kind_ids) and pos < ctx.end and (
+                kind_ids[pos] in kinds or stream.value_ids[pos] in values):
+            return Ok(stream[pos], pos + 1, ctx, (), True)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return token_switch
+
+
+def token_switch(
+        kinds: AbstractSet[int], values: AbstractSet[int],
+        expected: Iterable[str],
+        parse_fns: ParseFns[TokenStream[A], A]
+) -> ParseFns[TokenStream[A], A]:
+    return ParseFns(
+        _token_switch_fast(kinds, values, expected),
+        _token_switch(kinds, values, expected, parse_fns)
+    )
+
+
+class _BracketIndex:
+    __slots__ = "opens", "closes", "parents"
+
+    def __init__(self) -> None:
+        self.opens: List[int] = []
+        self.closes: List[int] = []
+        self.parents: List[int] = []
+
+    def add(self, stack: List[int], pos: int) -> None:
+        self.parents.append(stack[-1] if stack else -1)
+        stack.append(len(self.opens))
+        self.opens.append(pos)
+        self.closes.append(-1)
+
+    def find_close(self, pos: int) -> int:
+        i = bisect_left(self.opens, pos)
+        if i < len(self.opens) and self.opens[i] == pos:
+            return self.closes[i]
+        return -1
+
+    def enclosing(self, pos: int) -> int:
+        i = bisect_left(self.opens, pos) - 1
+        while i >= 0 and self.closes[i] != -1 and self.closes[i] < pos:
+            i = self.parents[i]
+        if i < 0:
+            return -1
+        return self.opens[i]
+
+
+def _build_index(
+        stream: Sequence[A], start: int, end: int, brackets: Mapping[A, A],
+        closing: Mapping[A, A],
+        pattern: Optional[Pattern[str]]) -> _BracketIndex:
+    index = _BracketIndex()
+    stack: List[int] = []
+    positions: Iterable[int]
+    if pattern is not None and isinstance(stream, str):
+        positions = (
+            m.start() for m in pattern.finditer(stream, start, end)
+        )
+    else:
+        positions = range(start, min(end, len(stream)))
+    for pos in positions:
+        t = stream[pos]
+        if t in brackets:
+            index.add(stack, pos)
+        elif t in closing and stack:
+            top = stack[-1]
+            if closing[t] == stream[index.opens[top]]:
+                index.closes[top] = pos
+                stack.pop()
+    return index
+
+
+def _balanced_fast(
+        parse_fns: ParseFns[Sequence[A], B]) -> ParseFastFn[Sequence[A], B]:
+    return parse_fns.fast_fn
+
+
+def _balanced(
+        parse_fns: ParseFns[Sequence[A], B], brackets: Mapping[A, A],
+        x: C) -> ParseFn[Sequence[A], Union[B, C]]:
+    parse_fast_fn = parse_fns.fast_fn
+    parse_fn = parse_fns.fn
+    closing = {v: k for k, v in brackets.items()}
+    key = frozenset(brackets.items())
+    chars = [*brackets, *closing]
+    pattern = None
+    if all(isinstance(c, str) and len(c) == 1 for c in chars):
+        pattern = re.compile(
+            "[{}]".format(re.escape("".join(cast(List[str], chars))))
+        )
+
+    def get_index(stream: Sequence[A], ctx: Ctx[Sequence[A]]) -> _BracketIndex:
+        if ctx.recovery is None:
+            return _build_index(
+                stream, 0, ctx.end, brackets, closing, pattern
+            )
+        index: Optional[_BracketIndex] = ctx.recovery.indexes.get(key)
+        if index is None:
+            index = _build_index(
+                stream, ctx.recovery.start, ctx.end, brackets, closing,
+                pattern
+            )
+            ctx.recovery.indexes[key] = index
+        return index
+
+    def balanced(
+            stream: Sequence[A], pos: int, ctx: Ctx[Sequence[A]], ins: int,
+            rem: Optional[int]) -> Result[Union[B, C], Sequence[A]]:
+        r = parse_fast_fn(stream, pos, ctx)
+        if type(r) is Ok:
+            return r
+        if r.consumed:
+            index = get_index(stream, ctx)
+            loc = r.loc
+            close = index.find_close(pos)
+            if close != -1 and index.enclosing(loc.pos) == pos:
+                end = close + 1
+                return Recovered(
+                    [
+                        make_sync_skip(
+                            ins, x, end, ctx.update_loc(stream, end), loc,
+                            end - loc.pos, end - pos, r.expected
+                        )
+                    ], end - pos, loc, r.expected, True
+                )
+        return parse_fn(stream, pos, ctx, ins, rem)
+
+    return balanced
+
+
+def balanced(
+        parse_fns: ParseFns[Sequence[A], B], brackets: Mapping[A, A],
+        x: C) -> ParseFns[Sequence[A], Union[B, C]]:
+    return ParseFns(
+        _balanced_fast(parse_fns), _balanced(parse_fns, brackets, x)
+    )
@@ -0,0 +1,162 @@
+import threading
+from collections import deque
+from typing import Deque, List, Match, Optional, Pattern, TextIO
+
+from .partial import can_extend
+from .types import Loc
+
+
+class TextStream:
+    __slots__ = (
+        "text", "offset", "_file", "_chunk_size", "_eof", "_holds", "_loc"
+    )
+
+    def __init__(self, file: TextIO, chunk_size: int):
+        if chunk_size < 1:
+            raise ValueError("Expected positive chunk size")
+        self.text = ""
+        self.offset = 0
+        self._file = file
+        self._chunk_size = chunk_size
+        self._eof = False
+        self._holds: List[int] = []
+        self._loc = Loc(0, 0, 0)
+
+    def hold(self, pos: int) -> None:
+        self._holds.append(pos)
+
+    def release(self) -> None:
+        self._holds.pop()
+
+    def at_end(self, pos: int) -> bool:
+        self._load(pos, pos + 1)
+        return pos - self.offset == len(self.text)
+
+    def startswith(self, s: str, pos: int, end: int) -> bool:
+        self._load(pos, pos + len(s))
+        return self.text.startswith(s, pos - self.offset, end - self.offset)
+
+    def match(self, pattern: Pattern[str], pos: int) -> Optional[Match[str]]:
+        end = pos + self._chunk_size
+        while True:
+            self._load(pos, end)
+            text = self.text
+            m = pattern.match(text, pos - self.offset)
+            if self._eof:
+                return m
+            if m is None:
+                if not can_extend(pattern, text, pos - self.offset):
+                    return None
+            elif m.end() < len(text):
+                return m
+            end = pos + 2 * (self.offset + len(text) - pos)
+
+    def __len__(self) -> int:
+        while not self._eof:
+            self._load(self.offset, self.offset + len(self.text) + 1)
+        return self.offset + len(self.text)
+
+    def __getitem__(self, pos: int) -> str:
+        self._load(pos, pos + 1)
+        return self.text[pos - self.offset]
+
+    def get_loc(self, loc: Loc, stream: object, pos: int) -> Loc:
+        offset = self.offset
+        if loc.pos < offset:
+            loc = self._loc
+        start, line, col = loc
+        text = self.text
+        nlc = text.count("\n", start - offset, pos - offset)
+        if nlc:
+            line += nlc
+            col = pos - offset - text.rfind("\n", start - offset, pos - offset)
+            col -= 1
+        else:
+            col += pos - start
+        return Loc(pos, line, col)
+
+    def _load(self, pos: int, end: int) -> None:
+        offset = self.offset
+        if pos < offset:
+            raise ValueError(
+                "Position {} is behind the stream window".format(pos)
+            )
+        if end - offset <= len(self.text) or self._eof:
+            return
+        keep = min(self._holds[0], pos) if self._holds else pos
+        if keep - offset >= self._chunk_size:
+            self._loc = self.get_loc(self._loc, self, keep)
+            self.text = self.text[keep - offset:]
+            self.offset = offset = keep
+        parts = [self.text]
+        size = len(self.text)
+        while size < end - offset:
+            chunk = self._file.read(max(self._chunk_size, end - offset - size))
+            if not chunk:
+                self._eof = True
+                break
+            parts.append(chunk)
+            size += len(chunk)
+        self.text = "".join(parts)
+
+
+class Aborted(Exception):
+    pass
+
+
+class Pipe:
+    __slots__ = (
+        "_cond", "_chunks", "_closed", "_aborted", "_waiting", "_done"
+    )
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._chunks: Deque[str] = deque()
+        self._closed = False
+        self._aborted = False
+        self._waiting = False
+        self._done = False
+
+    def read(self, size: int = -1) -> str:
+        with self._cond:
+            while not self._closed and (size < 0 or not self._chunks):
+                self._waiting = True
+                self._cond.notify_all()
+                self._cond.wait()
+            self._waiting = False
+            if self._aborted:
+                raise Aborted()
+            if size < 0:
+                text = "".join(self._chunks)
+                self._chunks.clear()
+                return text
+            return self._chunks.popleft() if self._chunks else ""
+
+    def write(self, data: str) -> None:
+        if not data:
+            return
+        with self._cond:
+            if self._closed:
+                raise ValueError("Write to a closed pipe")
+            self._chunks.append(data)
+            self._waiting = False
+            self._cond.notify_all()
+            while not self._done and not self._waiting:
+                self._cond.wait()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def abort(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._aborted = True
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            self._done = True
+            self._chunks.clear()
+            self._cond.notify_all()
@@ -1,4 +1,11 @@
-from typing import Callable, Generic, NamedTuple, TypeVar
+import sys
+from mmap import mmap
+from typing import (
+    Any, Callable, Dict, Generic, List, NamedTuple, Optional, Sequence, Tuple,
+    TypeVar, Union, cast
+)
+
+from typing_extensions import Protocol
 
 S = TypeVar("S")
 S_contra = TypeVar("S_contra", contravariant=True)
@@ -6,21 +13,100 @@ A = TypeVar("A")
 A_co = TypeVar("A_co", covariant=True)
 
 
+Bytes = Union[bytes, bytearray, memoryview, mmap]
+
+
 class Loc(NamedTuple):
     pos: int
     line: int
     col: int
 
 
+# Values, position and context at which a repetition stopped during the
+# non-recovering pass, keyed by repetition and its start position and mark.
+Checkpoints = Dict[Tuple[object, int, int], Tuple[List[Any], int, "Ctx[Any]"]]
+
+
+class RecoveryState:
+    __slots__ = "start", "checkpoints", "indexes"
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.checkpoints: Checkpoints = {}
+        self.indexes: Dict[object, Any] = {}
+
+
+START, VALUE, END = range(3)
+
+# Value of a named rule in parse_events. The combinators pass it through
+# instead of building values from it.
+SKIP: Any = object()
+
+
+# Receiver of the events of a single parse. Events reach it as soon as they
+# can no longer be dropped by backtracking, that is when a named rule that
+# consumed input ends outside of attempt().
+class EventSink:
+    __slots__ = "callbacks", "attempts"
+
+    def __init__(self, callbacks: Sequence[Callable[[str, Any], None]]):
+        self.callbacks = callbacks
+        self.attempts = 0
+
+    def deliver(self, events: "Events") -> None:
+        stack = []
+        while events is not self:
+            events, kind, rule, value, _ = cast(Tuple[Any, ...], events)
+            stack.append((kind, rule, value))
+        callbacks = self.callbacks
+        for kind, rule, value in reversed(stack):
+            callbacks[kind](rule, value)
+
+
+# Events of named rules not delivered yet, as a linked list of (previous,
+# kind, rule, value, sink) tuples that ends with the sink. Backtracking
+# drops the events of abandoned branches together with their context.
+Events = Union[EventSink, Tuple[Any, ...]]
+
+
+def event_sink(events: Events) -> EventSink:
+    if isinstance(events, EventSink):
+        return events
+    return cast(EventSink, events[4])
+
+
+# Streams that read their input lazily. Such a stream keeps the input after
+# a held position until it is released, and checks for the end of input
+# without reading the rest of it.
+class Window(Protocol):
+    def hold(self, pos: int) -> None:
+        ...
+
+    def release(self) -> None:
+        ...
+
+    def at_end(self, pos: int) -> bool:
+        ...
+
+
 class Ctx(Generic[S_contra]):
-    __slots__ = "mark", "loc", "_get_loc"
+    __slots__ = (
+        "mark", "loc", "_get_loc", "recovery", "events", "end", "window"
+    )
 
     def __init__(
             self, mark: int, loc: Loc,
-            get_loc: Callable[[Loc, S_contra, int], Loc]):
+            get_loc: Callable[[Loc, S_contra, int], Loc],
+            recovery: Optional[RecoveryState] = None,
+            events: Optional[Events] = None, end: int = sys.maxsize,
+            window: Optional[Window] = None):
         self.mark = mark
         self.loc = loc
         self._get_loc = get_loc
+        self.recovery = recovery
+        self.events = events
+        self.end = end
+        self.window = window
 
     def get_loc(self, stream: S_contra, pos: int) -> Loc:
         return self._get_loc(self.loc, stream, pos)
@@ -29,8 +115,18 @@ class Ctx(Generic[S_contra]):
         if pos == self.loc.pos:
             return self
         return Ctx(
-            self.mark, self._get_loc(self.loc, stream, pos), self._get_loc
+            self.mark, self._get_loc(self.loc, stream, pos), self._get_loc,
+            self.recovery, self.events, self.end, self.window
         )
 
     def set_mark(self, mark: int) -> "Ctx[S_contra]":
-        return Ctx(mark, self.loc, self._get_loc)
+        return Ctx(
+            mark, self.loc, self._get_loc, self.recovery, self.events,
+            self.end, self.window
+        )
+
+    def set_events(self, events: Optional[Events]) -> "Ctx[S_contra]":
+        return Ctx(
+            self.mark, self.loc, self._get_loc, self.recovery, events,
+            self.end, self.window
+        )
@@ -2,17 +2,50 @@
 Simple lexer based on regular expressions.
 """
 
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+import warnings
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import Iterator, List, Pattern, Sequence, TypeVar
+from itertools import islice
+from typing import (
+    AbstractSet, Any, Callable, Dict, Iterable, Iterator, List, Mapping, Match,
+    Optional, Pattern, Sequence, Set, Tuple, TypeVar, Union, cast, overload
+)
 
+from .core import combinators, sequence
+from .core.parser import ParseFns, ParseObj
+from .core.sequence import TokenStream
 from .core.types import Loc
-from .parser import Parser, TupleParser, label
+from .parser import FnParser, Parser, TupleParser, label
 from .sequence import satisfy
 from .types import ParseResult
 
-__all__ = ("Token", "LexError", "split_tokens", "token", "token_ins", "parse")
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:  # pragma: no cover
+    SharedMemory = None  # type: ignore
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    import sre_constants
+    import sre_parse
+
+__all__ = (
+    "Token", "LexError", "Lexer", "TokenBuffer", "LazyTokens", "iter_tokens",
+    "split_tokens", "split_tokens_parallel", "layout_tokens", "token",
+    "token_ins", "layout_line", "layout_block", "parse"
+)
 
 A = TypeVar("A")
+B = TypeVar("B")
 
 
 @dataclass(frozen=True)
@@ -32,6 +65,11 @@ class Token:
     end: Loc = field(default=Loc(0, 0, 0), repr=False, compare=False)
 
 
+T = TypeVar("T", bound=Sequence[Token])
+Keywords = Mapping[str, Mapping[str, str]]
+MatchFn = Callable[[str, int], Optional[Match[str]]]
+
+
 class LexError(Exception):
     """
     Exception that is raised if a lexer was unable to process the input.
@@ -49,7 +87,18 @@ class LexError(Exception):
         )
 
 
-def iter_tokens(src: str, spec: Pattern[str]) -> Iterator[Token]:
+def iter_tokens(
+        src: str, spec: Pattern[str],
+        keywords: Optional[Keywords] = None) -> Iterator[Token]:
+    """
+    Lazy version of :func:`split_tokens`, that yields tokens as they are
+    matched.
+
+    :param src: Input
+    :param spec: Compiled regular expression, see :func:`split_tokens`
+    :param keywords: Keyword tables, see :func:`split_tokens`
+    """
+
     pos = 0
     line = 0
     col = 0
@@ -71,13 +120,18 @@ def iter_tokens(src: str, spec: Pattern[str]) -> Iterator[Token]:
 
         kind = match.lastgroup
         if kind is not None:
-            yield Token(kind, match.group(kind), loc, end_loc)
+            value = match.group(kind)
+            if keywords is not None and kind in keywords:
+                kind = keywords[kind].get(value, kind)
+            yield Token(kind, value, loc, end_loc)
 
         pos = end
         loc = end_loc
 
 
-def split_tokens(src: str, spec: Pattern[str]) -> List[Token]:
+def split_tokens(
+        src: str, spec: Pattern[str],
+        keywords: Optional[Keywords] = None) -> List[Token]:
     """
     Splits input string into list of tokens.
 
@@ -95,10 +149,1216 @@ def split_tokens(src: str, spec: Pattern[str]) -> List[Token]:
      Token(kind='num', value='2'), Token(kind='op', value='+'),
      Token(kind='num', value='3')]
 
+    Keywords are better matched by a single identifier group, than by an
+    alternative per keyword. Tokens of the identifier kind are reclassified
+    by lookup in the keyword table for that kind:
+
+    >>> spec = re.compile(r"(?P<id>[a-z]+)|\\s+")
+    >>> keywords = {"id": {"if": "if", "true": "bool", "false": "bool"}}
+
+    >>> split_tokens("if x", spec, keywords)
+    [Token(kind='if', value='if'), Token(kind='id', value='x')]
+
     :param src: Input
     :param spec: Compiled regular expression
+    :param keywords: Tables, that map values of tokens of the kind to kinds
+        of keywords
+    """
+    return list(iter_tokens(src, spec, keywords))
+
+
+def layout_tokens(tokens: Iterable[Token]) -> Iterator[Token]:
+    """
+    Inserts layout tokens into a stream of tokens following the offside
+    rule. Every line, that has tokens, is terminated with a ``NEWLINE``
+    token. An ``INDENT`` token is inserted before the first token of a line,
+    that starts at a greater column than the enclosing lines, and a
+    ``DEDENT`` token for every closed indentation level is inserted before
+    the first token of a line, that starts at a lesser column. Lines without
+    tokens, e.g. blank lines or lines with skipped comments, do not affect
+    the layout. Layout tokens have empty values.
+
+    >>> from reparsec.lexer import layout_tokens, split_tokens
+    >>> import re
+
+    >>> spec = re.compile(r"(?P<id>[a-z]+)|\\s+")
+
+    >>> [t.kind for t in layout_tokens(split_tokens("a\\n  b\\nc", spec))]
+    ['id', 'NEWLINE', 'INDENT', 'id', 'NEWLINE', 'DEDENT', 'id', 'NEWLINE']
+
+    Raises :class:`LexError` if a line is dedented to a column, that does
+    not match any enclosing indentation level.
+
+    :param tokens: Tokens with locations, e.g. from :func:`iter_tokens`
+    """
+
+    levels = [0]
+    last: Optional[Token] = None
+    for t in tokens:
+        if last is None or t.start.line != last.end.line:
+            if last is not None:
+                yield Token("NEWLINE", "", last.end, last.end)
+            col = t.start.col
+            if col > levels[-1]:
+                levels.append(col)
+                yield Token("INDENT", "", t.start, t.start)
+            else:
+                yield from _dedent(levels, col, t.start)
+        yield t
+        last = t
+    if last is not None:
+        yield Token("NEWLINE", "", last.end, last.end)
+        yield from _dedent(levels, 0, last.end)
+
+
+def _dedent(levels: List[int], col: int, loc: Loc) -> Iterator[Token]:
+    while col < levels[-1]:
+        levels.pop()
+        yield Token("DEDENT", "", loc, loc)
+    if col != levels[-1]:
+        raise LexError(loc)
+
+
+class Lexer:
+    """
+    Compiled lexer specification, that assigns integer ids to token kinds
+    in order of their capture groups. Values of literal kinds, such as
+    punctuation or keywords, are assigned integer ids too.
+
+    Tokens are matched with a scanner of ``spec``. Optional ``dispatch``
+    table maps leading characters to smaller patterns, that must match the
+    same tokens as ``spec`` at positions starting with these characters. The
+    table is looked up for every token, so it pays off only for specs with
+    alternatives that are expensive to try.
+
+    :param spec: Compiled regular expression, see :func:`split_tokens`
+    :param literals: Names of literal kinds
+    :param dispatch: Patterns for leading characters
+    :param keywords: Keyword tables, see :func:`split_tokens`. Kinds of
+        keywords, that are not in ``spec``, get ids after kinds from ``spec``
+    """
+
+    def __init__(
+            self, spec: Pattern[str], literals: Iterable[str] = (),
+            dispatch: Optional[Mapping[str, Pattern[str]]] = None,
+            keywords: Optional[Keywords] = None):
+        self.spec = spec
+        self.kinds = sorted(spec.groupindex, key=spec.groupindex.__getitem__)
+        self._kind_ids = {kind: i for i, kind in enumerate(self.kinds)}
+        self._keywords: List[Optional[Dict[str, int]]] = [
+            None for _ in self.kinds
+        ]
+        if keywords is not None:
+            for kind, table in keywords.items():
+                self._keywords[self.kind_id(kind)] = {
+                    value: self._add_kind(keyword_kind)
+                    for value, keyword_kind in table.items()
+                }
+        self._literals: List[Optional[Dict[str, int]]] = [
+            None for _ in self.kinds
+        ]
+        self._n_values = 0
+        for kind in literals:
+            self._literals[self.kind_id(kind)] = {}
+        self._dispatch: Optional[Dict[str, MatchFn]] = None
+        self._reach: Optional[List[_Reach]] = None
+        if dispatch is not None:
+            self._dispatch = {}
+            for chars, pattern in dispatch.items():
+                for kind in pattern.groupindex:
+                    self.kind_id(kind)
+                for c in chars:
+                    self._dispatch[c] = pattern.match
+
+    def _add_kind(self, kind: str) -> int:
+        kind_id = self._kind_ids.get(kind)
+        if kind_id is None:
+            kind_id = self._kind_ids[kind] = len(self.kinds)
+            self.kinds.append(kind)
+            self._keywords.append(None)
+        return kind_id
+
+    def kind_id(self, kind: str) -> int:
+        """
+        Returns integer id of the token kind.
+
+        :param kind: Name of capture group from lexer spec
+        """
+
+        kind_id = self._kind_ids.get(kind)
+        if kind_id is None:
+            raise ValueError("Unknown token kind {!r}".format(kind))
+        return kind_id
+
+    def value_id(self, kind: str, value: str) -> int:
+        """
+        Returns integer id of the value of literal kind.
+
+        :param kind: Name of literal kind
+        :param value: Value of token
+        """
+
+        kind_id = self.kind_id(kind)
+        if self._literals[kind_id] is None:
+            raise ValueError("{!r} is not a literal kind".format(kind))
+        return self._value_id(kind_id, value)
+
+    def _value_id(self, kind: int, value: str) -> int:
+        table = self._literals[kind]
+        if table is None:
+            return -1
+        value_id = table.get(value)
+        if value_id is None:
+            value_id = table[value] = self._n_values
+            self._n_values += 1
+        return value_id
+
+    def token(self, kind: str) -> TupleParser[TokenStream[Token], Token]:
+        """
+        Parses token of the specified kind and returns the token. Works only
+        with buffers created by :meth:`tokenize`. Alternatives of parsers
+        created by :meth:`token` and :meth:`token_value` are merged into
+        single parser, that checks kind or value id of the current token
+        with a set lookup.
+
+        >>> from reparsec.lexer import Lexer, parse
+        >>> import re
+
+        >>> lexer = Lexer(re.compile(r"(?P<num>[0-9]+)|(?P<id>[a-z]+)"))
+        >>> parser = lexer.token("num") | lexer.token("id")
+
+        >>> parse(parser, lexer.tokenize("x")).unwrap()
+        Token(kind='id', value='x')
+
+        >>> parse(parser, lexer.tokenize("")).unwrap()
+        Traceback (most recent call last):
+          ...
+        reparsec.types.ParseError: at 1:1: expected num or id
+
+        :param kind: Kind of expected token
+        """
+
+        kind_id = self.kind_id(kind)
+        return _TokenParser(
+            {kind_id}, set(), [kind], sequence.token(kind_id, kind)
+        )
+
+    def token_value(
+            self, kind: str, value: str,
+            label: Optional[str] = None
+    ) -> TupleParser[TokenStream[Token], Token]:
+        """
+        Parses token of the specified literal kind with the specified value
+        and returns the token. Works only with buffers created by
+        :meth:`tokenize`. When error recovery is enabled, inserts
+        ``Token(kind=kind, value=value)`` on error.
+
+        >>> from reparsec.lexer import Lexer, parse
+        >>> import re
+
+        >>> lexer = Lexer(re.compile(r"(?P<op>[-+])"), literals=["op"])
+        >>> parser = lexer.token_value("op", "+")
+
+        >>> parse(parser, lexer.tokenize("+")).unwrap()
+        Token(kind='op', value='+')
+
+        >>> parse(parser, lexer.tokenize("-")).unwrap()
+        Traceback (most recent call last):
+          ...
+        reparsec.types.ParseError: at 1:1: expected '+'
+
+        :param kind: Name of literal kind
+        :param value: Value of expected token
+        :param label: Expected value label, defaults to ``repr(value)``
+        """
+
+        value_id = self.value_id(kind, value)
+        if label is None:
+            label = repr(value)
+        return _TokenParser(
+            set(), {value_id}, [label],
+            sequence.token_value(value_id, Token(kind, value), label)
+        )
+
+    def tokenize(
+            self, src: str,
+            cache_dir: Optional[str] = None) -> "TokenBuffer":
+        """
+        Splits input string into compact buffer of tokens.
+
+        If ``cache_dir`` is given, arrays of the buffer are stored in a file
+        in that directory, named after a hash of the input and of the lexer
+        specification, and are read back instead of lexing the same input
+        again. Changing the specification, literal kinds or keyword tables
+        changes the hash, so stale files are never read.
+
+        >>> from reparsec.lexer import Lexer
+        >>> import re
+
+        >>> lexer = Lexer(re.compile(r"(?P<num>[0-9]+)|(?P<op>[+])|\\s+"))
+        >>> tokens = lexer.tokenize("1 + 2")
+
+        >>> len(tokens)
+        3
+        >>> tokens[1]
+        Token(kind='op', value='+')
+        >>> tokens.kind_ids[2] == lexer.kind_id("num")
+        True
+
+        :param src: Input
+        :param cache_dir: Directory of cached buffers
+        """
+
+        if cache_dir is not None:
+            path = os.path.join(cache_dir, self._cache_key(src) + ".tokens")
+            cached = self._load(src, path)
+            if cached is not None:
+                return cached
+        tokens = TokenBuffer(src, self.kinds)
+        pos = self._fill(tokens, self._matches(src, 0))
+        if pos != len(src):
+            raise LexError(tokens.loc(pos))
+        if cache_dir is not None:
+            self._store(tokens, cache_dir, path)
+        return tokens
+
+    def tokenize_parallel(
+            self, src: str, workers: Optional[int] = None,
+            boundary: str = "\n") -> "TokenBuffer":
+        """
+        Splits input string into compact buffer of tokens using a pool of
+        processes. Input is cut into chunks after occurrences of
+        ``boundary``, chunks are lexed in parallel, and results are joined.
+        Each process sees its chunk and at least ``len(src) / workers``
+        characters after it. If a token spans a cut, the input after it is
+        lexed again until the lexer is back in sync with the next chunk.
+        Tokens, including lookahead of their patterns, must be shorter than
+        ``len(src) / workers`` characters.
+
+        :param src: Input
+        :param workers: Number of processes, defaults to number of CPUs
+        :param boundary: Chunks start after occurrences of this string
+        """
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        cuts = _find_cuts(src, workers, boundary)
+        if len(cuts) <= 2:
+            return self.tokenize(src)
+        return self._join(src, cuts, _run_chunks(self, src, cuts))
+
+    def relex(
+            self, tokens: "TokenBuffer", start: int, old_length: int,
+            new_text: str) -> "TokenBuffer":
+        """
+        Applies an edit to the input of a buffer created by this lexer and
+        returns buffer for the new input. Input is lexed again from the first
+        token, that could have inspected the edited part of the input while
+        it was matched, until new tokens are back in sync with old ones,
+        offsets of the rest of tokens are shifted. How far right a match
+        could look is bounded from the characters accepted by each
+        alternative of the spec, tokens within reach of the edit are matched
+        again to find the first one that changes.
+
+        >>> from reparsec.lexer import Lexer
+        >>> import re
+
+        >>> lexer = Lexer(re.compile(r"(?P<num>[0-9]+)|(?P<op>[+])|\\s+"))
+        >>> tokens = lexer.relex(lexer.tokenize("1 + 2 + 3"), 4, 1, "42")
+
+        >>> tokens.src
+        '1 + 42 + 3'
+        >>> tokens[2]
+        Token(kind='num', value='42')
+
+        :param tokens: Buffer to edit
+        :param start: Start of edited part of the input
+        :param old_length: Length of edited part of the input
+        :param new_text: Replacement for edited part of the input
+        """
+
+        end = start + old_length
+        src = tokens.src[:start] + new_text + tokens.src[end:]
+        delta = len(new_text) - old_length
+        new_end = start + len(new_text)
+        old_starts = tokens.starts
+        index = max(bisect_left(tokens.ends, start) - 1, 0)
+        if index >= len(tokens) or old_starts[index] > start:
+            index = 0
+        index = self._restart(tokens, src, start, index)
+        pos = tokens.ends[index - 1] if index else 0
+        result = TokenBuffer(src, self.kinds)
+        result.extend(tokens.columns(), 0, index)
+        result._lines = tokens._edit_lines(start, end, new_text)
+        for m in self._matches(src, pos):
+            pos = self._fill(result, (m,))
+            if pos >= new_end:
+                index = bisect_left(old_starts, pos - delta)
+                if index < len(tokens) and old_starts[index] == pos - delta:
+                    result.extend(_shift(tokens.columns(), delta, index))
+                    return result
+        if pos != len(src):
+            raise LexError(result.loc(pos))
+        return result
+
+    def _restart(
+            self, tokens: "TokenBuffer", src: str, start: int,
+            index: int) -> int:
+        if self._reach is None:
+            self._reach = _spec_reach(self.spec)
+        old = tokens.src
+        starts = tokens.starts
+        ends = tokens.ends
+        segments: Set[int] = set()
+        for reach in self._reach:
+            lo = reach.lowest(old, start)
+            first = bisect_right(ends, lo)
+            if first >= index:
+                continue
+            if reach.gate is None:
+                if lo > starts[first]:
+                    first += 1
+                segments.update(range(first, index))
+                continue
+            for m in reach.gate.finditer(old, lo, ends[index - 1]):
+                pos = m.start()
+                segment = bisect_right(ends, pos)
+                if pos <= starts[segment]:
+                    segments.add(segment)
+        for segment in sorted(segments):
+            if not self._same_segment(tokens, src, segment):
+                return segment
+        return index
+
+    def _same_segment(
+            self, tokens: "TokenBuffer", src: str, index: int) -> bool:
+        match = self.spec.match
+        pos = tokens.ends[index - 1] if index else 0
+        start = tokens.starts[index]
+        while pos < start:
+            m = match(src, pos)
+            if m is None or m.lastgroup is not None or m.end() == pos:
+                return False
+            pos = m.end()
+        m = match(src, pos)
+        if pos != start or m is None or m.end() != tokens.ends[index]:
+            return False
+        kind_name = m.lastgroup
+        if kind_name is None:
+            return False
+        vstart, vend = m.span(kind_name)
+        if (
+                vstart != tokens.value_starts[index] or
+                vend != tokens.value_ends[index]):
+            return False
+        kind = self._kind_ids[kind_name]
+        table = self._keywords[kind]
+        if table is not None:
+            kind = table.get(src[vstart:vend], kind)
+        return kind == tokens.kind_ids[index]
+
+    def _cache_key(self, src: str) -> str:
+        spec = (
+            _CACHE_VERSION, self.spec.pattern, self.spec.flags, self.kinds,
+            self._keywords, [table is not None for table in self._literals],
+            sys.byteorder
+        )
+        h = hashlib.sha256(repr(spec).encode())
+        h.update(src.encode("utf-8", "surrogatepass"))
+        return h.hexdigest()
+
+    def _load(self, src: str, path: str) -> Optional["TokenBuffer"]:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            return self._read(src, memoryview(data))
+        except ValueError:
+            return None
+
+    def _read(self, src: str, view: memoryview) -> "TokenBuffer":
+        if len(view) < _CACHE_HEADER.size:
+            raise ValueError("Not a token cache")
+        magic, size = _CACHE_HEADER.unpack_from(view)
+        if magic != _CACHE_MAGIC:
+            raise ValueError("Not a token cache")
+        pos = _CACHE_HEADER.size + size
+        header = json.loads(bytes(view[_CACHE_HEADER.size:pos]))
+        count, values = self._check_header(header)
+        tokens = TokenBuffer(src, self.kinds)
+        width = count * tokens.kind_ids.itemsize
+        for column in tokens.columns():
+            column.frombytes(view[pos:pos + width])
+            pos += width
+        if pos != len(view):
+            raise ValueError("Truncated token cache")
+        tokens.value_ids = self._remap(tokens.columns(), values)[1]
+        return tokens
+
+    def _check_header(
+            self, header: Any) -> Tuple[int, List[Tuple[int, str, int]]]:
+        if type(header) is not dict:
+            raise ValueError("Invalid token cache header")
+        count = header.get("count")
+        values = header.get("values")
+        if type(count) is not int or count < 0 or type(values) is not list:
+            raise ValueError("Invalid token cache header")
+        n_kinds = len(self._literals)
+        for item in values:
+            if (
+                    type(item) is not list or len(item) != 3 or
+                    type(item[0]) is not int or
+                    not 0 <= item[0] < n_kinds or
+                    type(item[1]) is not str or type(item[2]) is not int):
+                raise ValueError("Invalid token cache header")
+        return count, [(kind, value, i) for kind, value, i in values]
+
+    def _store(self, tokens: "TokenBuffer", cache_dir: str, path: str) -> None:
+        header = json.dumps({
+            "count": len(tokens),
+            "values": [
+                (kind, value, value_id)
+                for kind, table in enumerate(self._literals)
+                if table is not None
+                for value, value_id in table.items()
+            ]
+        }).encode()
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, len(header)))
+                f.write(header)
+                for column in tokens.columns():
+                    column.tofile(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _matches(self, src: str, pos: int) -> Iterable[Match[str]]:
+        if self._dispatch is None:
+            scanner = self.spec.scanner(  # type: ignore[attr-defined]
+                src, pos
+            )
+            return cast(Iterable[Match[str]], iter(scanner.match, None))
+        return self._dispatch_matches(src, pos, self._dispatch)
+
+    def _lex_window(
+            self, text: str, base: int, limit: int, final: bool) -> "_Chunk":
+        tokens = TokenBuffer(text, self.kinds)
+        n_values = self._n_values
+        last = 0
+
+        def matches() -> Iterator[Match[str]]:
+            nonlocal last
+            for m in self._matches(text, 0):
+                last = m.start()
+                if last >= limit:
+                    return
+                yield m
+
+        stop = self._fill(tokens, matches())
+        new_values = [
+            (kind, value, value_id)
+            for kind, table in enumerate(self._literals) if table is not None
+            for value, value_id in table.items() if value_id >= n_values
+        ]
+        chunk = _Chunk(
+            tokens.columns(), new_values, stop, last, len(text), final
+        )
+        chunk.shift(base)
+        return chunk
+
+    def _join(
+            self, src: str, cuts: List[int],
+            chunks: List["_Chunk"]) -> "TokenBuffer":
+        tokens = TokenBuffer(src, self.kinds)
+        pos = 0
+        for chunk, start, limit in zip(chunks, cuts, cuts[1:]):
+            if pos >= limit:
+                continue
+            index = 0
+            if pos != start:
+                pos, index = self._resync(tokens, pos, chunk.starts, limit)
+                if index < 0:
+                    continue
+            tokens.extend(
+                self._remap(chunk.columns, chunk.new_values), index
+            )
+            pos = chunk.stop
+            if chunk.final:
+                if pos < limit:
+                    raise LexError(tokens.loc(pos))
+            elif pos == chunk.end:
+                if tokens.ends and tokens.ends[-1] == pos:
+                    tokens.pop()
+                pos = chunk.last
+        return tokens
+
+    def _resync(
+            self, tokens: "TokenBuffer", pos: int, starts: "array[int]",
+            limit: int) -> Tuple[int, int]:
+        for m in self._matches(tokens.src, pos):
+            pos = self._fill(tokens, (m,))
+            index = bisect_left(starts, pos)
+            if index < len(starts) and starts[index] == pos:
+                return pos, index
+            if pos >= limit:
+                return pos, -1
+        raise LexError(tokens.loc(pos))
+
+    def _remap(
+            self, columns: "Columns",
+            new_values: List[Tuple[int, str, int]]) -> "Columns":
+        mapping = {
+            value_id: self._value_id(kind, value)
+            for kind, value, value_id in new_values
+        }
+        if all(k == v for k, v in mapping.items()):
+            return columns
+        kind_ids, value_ids, starts, ends, value_starts, value_ends = columns
+        return (
+            kind_ids, array("i", [mapping.get(v, v) for v in value_ids]),
+            starts, ends, value_starts, value_ends
+        )
+
+    def _dispatch_matches(
+            self, src: str, pos: int,
+            dispatch: Dict[str, MatchFn]) -> Iterator[Match[str]]:
+        get = dispatch.get
+        default = self.spec.match
+        src_len = len(src)
+        while pos < src_len:
+            m = get(src[pos], default)(src, pos)
+            if m is None:
+                return
+            yield m
+            end = m.end()
+            if end == pos:
+                return
+            pos = end
+
+    def _fill(
+            self, tokens: "TokenBuffer",
+            matches: Iterable[Match[str]]) -> int:
+        src = tokens.src
+        kind_ids = self._kind_ids
+        keywords = self._keywords
+        literals = self._literals
+        value_id = self._value_id
+        append_kind = tokens.kind_ids.append
+        append_value = tokens.value_ids.append
+        append_start = tokens.starts.append
+        append_end = tokens.ends.append
+        append_value_start = tokens.value_starts.append
+        append_value_end = tokens.value_ends.append
+        pos = 0
+        for m in matches:
+            start, pos = m.span()
+            kind_name = m.lastgroup
+            if kind_name is not None:
+                kind = kind_ids[kind_name]
+                vstart, vend = m.span(kind_name)
+                table = keywords[kind]
+                if table is not None:
+                    kind = table.get(src[vstart:vend], kind)
+                append_kind(kind)
+                append_start(start)
+                append_end(pos)
+                append_value_start(vstart)
+                append_value_end(vend)
+                if literals[kind] is None:
+                    append_value(-1)
+                else:
+                    append_value(value_id(kind, src[vstart:vend]))
+        return pos
+
+
+class TokenBuffer(Sequence[Token]):
+    """
+    Compact sequence of tokens, that stores kind ids, value ids and offsets
+    of tokens in arrays. :class:`Token` objects are created on access, and
+    their line and column numbers are computed from an index of line starts,
+    which is built on first use.
+
+    Use :meth:`Lexer.tokenize` to create a buffer.
+
+    :param src: Input
+    :param kinds: Names of token kinds, indexed by kind id
     """
-    return list(iter_tokens(src, spec))
+
+    def __init__(self, src: str, kinds: Sequence[str]):
+        self.src = src
+        self.kinds = kinds
+        self.kind_ids = array("i")
+        self.value_ids = array("i")
+        self.starts = array("i")
+        self.ends = array("i")
+        self.value_starts = array("i")
+        self.value_ends = array("i")
+        self._lines: Optional["array[int]"] = None
+
+    def __len__(self) -> int:
+        return len(self.kind_ids)
+
+    def columns(self) -> "Columns":
+        """
+        Returns arrays of kind ids, value ids, start offsets, end offsets,
+        value start offsets and value end offsets of tokens.
+        """
+
+        return (
+            self.kind_ids, self.value_ids, self.starts, self.ends,
+            self.value_starts, self.value_ends
+        )
+
+    def extend(
+            self, columns: "Columns", start: int = 0,
+            stop: Optional[int] = None) -> None:
+        """
+        Appends tokens from the arrays.
+
+        :param columns: Arrays in order of :meth:`columns`
+        :param start: Index of the first token to append
+        :param stop: Index after the last token to append
+        """
+
+        for column, items in zip(self.columns(), columns):
+            column.extend(items[start:stop])
+
+    def pop(self) -> None:
+        """
+        Removes the last token.
+        """
+
+        for column in self.columns():
+            column.pop()
+
+    @overload
+    def __getitem__(self, index: int) -> Token:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Token]:
+        ...
+
+    def __getitem__(
+            self, index: Union[int, slice]) -> Union[Token, List[Token]]:
+        if type(index) is slice:
+            return [self[i] for i in range(*index.indices(len(self)))]
+        lines = self._lines
+        if lines is None:
+            lines = self._build_lines()
+        start = self.starts[index]
+        end = self.ends[index]
+        line = bisect_right(lines, start) - 1
+        line_start = lines[line]
+        if line + 1 < len(lines) and lines[line + 1] <= end:
+            end_line = bisect_right(lines, end) - 1
+            end_loc = Loc(end, end_line, end - lines[end_line])
+        else:
+            end_loc = Loc(end, line, end - line_start)
+        return Token(
+            self.kinds[self.kind_ids[index]],
+            self.src[self.value_starts[index]:self.value_ends[index]],
+            Loc(start, line, start - line_start), end_loc
+        )
+
+    def kind(self, index: int) -> str:
+        """
+        Returns kind of the token.
+
+        :param index: Token index
+        """
+
+        return self.kinds[self.kind_ids[index]]
+
+    def value(self, index: int) -> str:
+        """
+        Returns value of the token.
+
+        :param index: Token index
+        """
+
+        return self.src[self.value_starts[index]:self.value_ends[index]]
+
+    def loc(self, pos: int) -> Loc:
+        """
+        Returns location of the position in the input.
+
+        :param pos: Position in the input
+        """
+
+        lines = self._lines
+        if lines is None:
+            lines = self._build_lines()
+        line = bisect_right(lines, pos) - 1
+        return Loc(pos, line, pos - lines[line])
+
+    def _edit_lines(
+            self, start: int, end: int,
+            new_text: str) -> Optional["array[int]"]:
+        lines = self._lines
+        if lines is None:
+            return None
+        delta = len(new_text) - (end - start)
+        head = bisect_right(lines, start)
+        tail = bisect_right(lines, end)
+        result = lines[:head]
+        result.extend(
+            start + m.end() for m in re.finditer("\n", new_text)
+        )
+        result.extend(map(delta.__add__, lines[tail:]))
+        return result
+
+    def _build_lines(self) -> "array[int]":
+        lines = array("i", [0])
+        lines.extend(m.end() for m in re.finditer("\n", self.src))
+        self._lines = lines
+        return lines
+
+
+_CACHE_VERSION = 1
+_CACHE_MAGIC = b"RPTK"
+_CACHE_HEADER = struct.Struct("<4sI")
+
+Columns = Tuple[
+    "array[int]", "array[int]", "array[int]", "array[int]", "array[int]",
+    "array[int]"
+]
+
+
+class _Chunk:
+    __slots__ = "columns", "new_values", "stop", "last", "end", "final"
+
+    def __init__(
+            self, columns: Columns, new_values: List[Tuple[int, str, int]],
+            stop: int, last: int, end: int, final: bool):
+        self.columns = columns
+        self.new_values = new_values
+        self.stop = stop
+        self.last = last
+        self.end = end
+        self.final = final
+
+    @property
+    def starts(self) -> "array[int]":
+        return self.columns[2]
+
+    def shift(self, offset: int) -> None:
+        self.columns = _shift(self.columns, offset, 0)
+        self.stop += offset
+        self.last += offset
+        self.end += offset
+
+
+def _shift(columns: Columns, offset: int, index: int) -> Columns:
+    kind_ids, value_ids, starts, ends, value_starts, value_ends = columns
+    if not offset:
+        return (
+            kind_ids[index:], value_ids[index:], starts[index:], ends[index:],
+            value_starts[index:], value_ends[index:]
+        )
+    add = offset.__add__
+    return (
+        kind_ids[index:], value_ids[index:],
+        array("i", map(add, starts[index:])),
+        array("i", map(add, ends[index:])),
+        array("i", map(add, value_starts[index:])),
+        array("i", map(add, value_ends[index:]))
+    )
+
+
+# ``re`` does not report how far right a match inspected the input, so
+# ``Lexer.relex`` bounds it from the structure of the spec. A match of an
+# alternative can read past its start only while the characters it reads are
+# accepted by some character matcher of the alternative, and, if the first
+# item of the alternative is a single character, only if that character
+# is at the start. Alternatives of bounded width read at most one character
+# after their maximum width.
+
+_LEAVES = {"LITERAL", "NOT_LITERAL", "ANY", "IN"}
+_REPEATS = {"MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"}
+_LOOKAROUNDS = {"ASSERT", "ASSERT_NOT", "GROUPREF_EXISTS"}
+_CATEGORIES = {
+    "CATEGORY_DIGIT": r"\d", "CATEGORY_NOT_DIGIT": r"\D",
+    "CATEGORY_SPACE": r"\s", "CATEGORY_NOT_SPACE": r"\S",
+    "CATEGORY_WORD": r"\w", "CATEGORY_NOT_WORD": r"\W",
+}
+
+_Items = Sequence[Tuple[Any, Any]]
+
+
+def _leaf(op: str, av: Any) -> Optional[str]:
+    if op == "LITERAL":
+        return re.escape(chr(av))
+    if op == "NOT_LITERAL":
+        return "[^{}]".format(re.escape(chr(av)))
+    if op == "ANY":
+        return "."
+    parts: List[str] = []
+    for item_op, item_av in av:
+        name = item_op.name
+        if name == "NEGATE":
+            parts.insert(0, "^")
+        elif name == "LITERAL":
+            parts.append(re.escape(chr(item_av)))
+        elif name == "RANGE":
+            lo, hi = item_av
+            parts.append(
+                "{}-{}".format(re.escape(chr(lo)), re.escape(chr(hi)))
+            )
+        elif name == "CATEGORY" and item_av.name in _CATEGORIES:
+            parts.append(_CATEGORIES[item_av.name])
+        else:
+            return None
+    return "[{}]".format("".join(parts))
+
+
+def _children(name: str, av: Any) -> Optional[List[_Items]]:
+    if name == "SUBPATTERN":
+        return None if av[1] or av[2] else [av[3]]
+    if name == "BRANCH":
+        return list(av[1])
+    if name in _REPEATS:
+        return [av[2]]
+    if name in ("ASSERT", "ASSERT_NOT"):
+        return [av[1]]
+    if name == "ATOMIC_GROUP":
+        return [av]
+    if name == "GROUPREF_EXISTS":
+        return [sub for sub in av[1:] if sub is not None]
+    return None
+
+
+def _chars(items: _Items, out: List[str]) -> Optional[bool]:
+    lookahead = False
+    for op, av in items:
+        name = op.name
+        if name in _LEAVES:
+            leaf = _leaf(name, av)
+            if leaf is None:
+                return None
+            out.append(leaf)
+            continue
+        if name in ("AT", "GROUPREF"):
+            continue
+        subs = _children(name, av)
+        if subs is None:
+            return None
+        if name in ("ASSERT", "ASSERT_NOT") and av[0] > 0:
+            lookahead = True
+        for sub in subs:
+            r = _chars(sub, out)
+            if r is None:
+                return None
+            lookahead = lookahead or r
+    return lookahead
+
+
+def _first(items: _Items) -> Optional[Tuple[List[str], bool]]:
+    first: List[str] = []
+    for op, av in items:
+        name = op.name
+        if name == "AT":
+            continue
+        if name in _LEAVES:
+            leaf = _leaf(name, av)
+            if leaf is None:
+                return None
+            first.append(leaf)
+            return first, False
+        subs = None if name in _LOOKAROUNDS else _children(name, av)
+        if subs is None:
+            return None
+        nullable = name in _REPEATS and av[0] == 0
+        for sub in subs:
+            r = _first(sub)
+            if r is None:
+                return None
+            first.extend(r[0])
+            nullable = nullable or r[1]
+        if not nullable:
+            return first, False
+    return first, True
+
+
+class _Reach:
+    __slots__ = "gate", "outside", "width"
+
+    def __init__(self, alt: Any, flags: int):
+        self.gate: Optional[Pattern[str]] = None
+        self.outside: Optional[Pattern[str]] = None
+        self.width: Optional[int] = None
+        first = _first(alt)
+        if first is not None and not first[1]:
+            self.gate = re.compile("|".join(first[0]), flags)
+        chars: List[str] = []
+        lookahead = _chars(alt, chars)
+        if lookahead is None:
+            return
+        self.outside = re.compile(
+            "(?!{})(?s:.)".format("|".join(chars)) if chars else "(?s:.)",
+            flags
+        )
+        width = alt.getwidth()[1]
+        if not lookahead and width < sre_constants.MAXREPEAT:
+            self.width = width
+
+    def lowest(self, src: str, start: int) -> int:
+        lo = 0 if self.width is None else max(start - self.width, 0)
+        outside = self.outside
+        if outside is None:
+            return lo
+        end = start
+        size = 64
+        while end > lo:
+            begin = max(end - size, lo)
+            last = -1
+            for m in outside.finditer(src, begin, end):
+                last = m.start()
+            if last >= 0:
+                return last + 1
+            end = begin
+            size *= 2
+        return lo
+
+
+def _spec_reach(spec: Pattern[str]) -> List[_Reach]:
+    flags = spec.flags & ~re.VERBOSE
+    parsed: Any = sre_parse.parse(spec.pattern, spec.flags)
+    alts: Sequence[Any] = [parsed]
+    if len(parsed) == 1 and parsed[0][0].name == "BRANCH":
+        alts = parsed[0][1][1]
+    return [_Reach(alt, flags) for alt in alts]
+
+
+def _find_cuts(src: str, n: int, boundary: str) -> List[int]:
+    cuts = [0]
+    size = len(src) // n
+    for i in range(1, n):
+        pos = src.find(boundary, max(i * size, cuts[-1]))
+        if pos == -1:
+            break
+        pos += len(boundary)
+        if cuts[-1] < pos < len(src):
+            cuts.append(pos)
+    cuts.append(len(src))
+    return cuts
+
+
+def _lex_chunk(
+        task: Tuple[Lexer, str, int, int, int, int, bool]) -> _Chunk:
+    lexer, source, start, end, base, limit, final = task
+    if SharedMemory is None:
+        text = source
+    else:
+        shm = SharedMemory(source)
+        try:
+            buf = cast(memoryview, shm.buf)
+            text = bytes(buf[start:end]).decode("utf-8")
+        finally:
+            shm.close()
+    return lexer._lex_window(text, base, limit, final)
+
+
+def _run_chunks(lexer: Lexer, src: str, cuts: List[int]) -> List[_Chunk]:
+    n = len(cuts) - 1
+    size = len(src) // n
+    windows = [
+        (i, min(bisect_left(cuts, cuts[i + 1] + size), n)) for i in range(n)
+    ]
+    limits = [cuts[i + 1] - cuts[i] for i in range(n)]
+    finals = [end == n for _, end in windows]
+    if SharedMemory is None:
+        tasks = [
+            (lexer, src[cuts[i]:cuts[j]], 0, 0, cuts[i], limit, final)
+            for (i, j), limit, final in zip(windows, limits, finals)
+        ]
+        with ProcessPoolExecutor(n) as executor:
+            return list(executor.map(_lex_chunk, tasks))
+    parts = [src[a:b].encode("utf-8") for a, b in zip(cuts, cuts[1:])]
+    offsets = [0]
+    for part in parts:
+        offsets.append(offsets[-1] + len(part))
+    shm = SharedMemory(create=True, size=max(offsets[-1], 1))
+    try:
+        buf = cast(memoryview, shm.buf)
+        for part, offset in zip(parts, offsets):
+            buf[offset:offset + len(part)] = part
+        tasks = [
+            (lexer, shm.name, offsets[i], offsets[j], cuts[i], limit, final)
+            for (i, j), limit, final in zip(windows, limits, finals)
+        ]
+        with ProcessPoolExecutor(n) as executor:
+            return list(executor.map(_lex_chunk, tasks))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def split_tokens_parallel(
+        src: str, spec: Pattern[str], workers: Optional[int] = None,
+        boundary: str = "\n",
+        keywords: Optional[Keywords] = None) -> TokenBuffer:
+    """
+    Splits input string into compact buffer of tokens using a pool of
+    processes. See :meth:`Lexer.tokenize_parallel`.
+
+    :param src: Input
+    :param spec: Compiled regular expression, see :func:`split_tokens`
+    :param workers: Number of processes, defaults to number of CPUs
+    :param boundary: Chunks start after occurrences of this string
+    :param keywords: Keyword tables, see :func:`split_tokens`
+    """
+
+    return Lexer(spec, keywords=keywords).tokenize_parallel(
+        src, workers, boundary
+    )
+
+
+_LOOKAHEAD = 15
+
+
+class LazyTokens(Sequence[Token]):
+    """
+    Sequence of tokens, that pulls tokens from the iterator on demand, as
+    positions are accessed. Parsers that check for the end of input by
+    indexing, such as :func:`token` and :func:`reparsec.sequence.sym`, do not
+    consume the rest of iterator, so parsing interleaves with lexing and
+    stops early on errors. :func:`reparsec.sequence.eof` checks only the
+    current position. :func:`len` and recovery consume all tokens.
+
+    >>> from reparsec.lexer import LazyTokens, iter_tokens, parse, token
+    >>> import re
+
+    >>> spec = re.compile(r"(?P<num>[0-9]+)|(?P<op>[+])|\\s+")
+    >>> tokens = LazyTokens(iter_tokens("1 2 + ...", spec))
+
+    >>> parse(token("num") + token("op"), tokens).unwrap()
+    Traceback (most recent call last):
+      ...
+    reparsec.types.ParseError: at 1:3: expected op
+
+    :param tokens: Iterable of tokens, such as :func:`iter_tokens`
+    """
+
+    def __init__(self, tokens: Iterable[Token]):
+        self._iter: Optional[Iterator[Token]] = iter(tokens)
+        self._tokens: List[Token] = []
+        self._error: Optional[LexError] = None
+
+    def _pull(self, size: Optional[int]) -> None:
+        if self._iter is not None:
+            try:
+                self._tokens.extend(islice(self._iter, size))
+            except LexError as e:
+                self._iter = None
+                self._error = e
+
+    def _fill(self, index: int, ahead: int = _LOOKAHEAD) -> bool:
+        tokens = self._tokens
+        if index >= len(tokens):
+            self._pull(index + 1 - len(tokens) + ahead)
+            if index >= len(tokens):
+                self._iter = None
+                if self._error is not None:
+                    raise self._error
+                return False
+        return True
+
+    def _fill_all(self) -> None:
+        self._pull(None)
+        self._iter = None
+        if self._error is not None:
+            raise self._error
+
+    def __len__(self) -> int:
+        self._fill_all()
+        return len(self._tokens)
+
+    @overload
+    def __getitem__(self, index: int) -> Token:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Token]:
+        ...
+
+    def __getitem__(
+            self, index: Union[int, slice]) -> Union[Token, List[Token]]:
+        if type(index) is int and index >= 0:
+            self._fill(index)
+        else:
+            self._fill_all()
+        return self._tokens[index]
+
+    def loc(self, pos: int) -> Loc:
+        """
+        Returns start location of the token at the position, or end location
+        of the last token at the end of the sequence.
+
+        :param pos: Token index
+        """
+
+        tokens = self._tokens
+        if self._fill(pos, 0):
+            return tokens[pos].start
+        elif tokens:
+            return tokens[-1].end
+        return Loc(pos, 0, 0)
+
+    def at_end(self, pos: int) -> bool:
+        """
+        Checks if there are no tokens at the position and after it, pulling
+        at most the token at the position from the iterator.
+
+        :param pos: Token index
+        """
+
+        return not self._fill(pos, 0)
+
+    def hold(self, pos: int) -> None:
+        """
+        Does nothing, pulled tokens are never dropped.
+
+        :param pos: Token index
+        """
+
+    def release(self) -> None:
+        """
+        Does nothing, pulled tokens are never dropped.
+        """
+
+
+class _TokenParser(FnParser[TokenStream[Token], Token]):
+    def __init__(
+            self, kinds: AbstractSet[int], values: AbstractSet[int],
+            expected: List[str],
+            fns: ParseFns[TokenStream[Token], Token]):
+        super().__init__(fns)
+        self._kinds = kinds
+        self._values = values
+        self._expected = expected
+
+    def __or__(
+            self, other: ParseObj[TokenStream[Token], B]
+    ) -> TupleParser[TokenStream[Token], Union[Token, B]]:
+        if isinstance(other, _TokenParser):
+            kinds = self._kinds | other._kinds
+            values = self._values | other._values
+            expected = self._expected + other._expected
+            return _TokenParser(
+                kinds, values, expected,
+                sequence.token_switch(
+                    kinds, values, expected,
+                    combinators.alt(self.to_fns(), other.to_fns())
+                )
+            )
+        return super().__or__(other)
 
 
 def token(kind: str) -> TupleParser[Sequence[Token], Token]:
@@ -154,9 +1414,57 @@ def token_ins(
     return token(kind).recover_with_fn(value_fn, kind)
 
 
+def layout_line(
+        parser: ParseObj[Sequence[Token], A]
+) -> TupleParser[Sequence[Token], A]:
+    """
+    Parses a line of tokens processed by :func:`layout_tokens`. Applies
+    parser and then expects ``NEWLINE`` token, that is inserted on error
+    when error recovery is enabled.
+
+    :param parser: Parser for contents of the line
+    """
+
+    return FnParser(parser.to_fns()) << token_ins("NEWLINE", "")
+
+
+def layout_block(
+        parser: ParseObj[Sequence[Token], A]
+) -> TupleParser[Sequence[Token], A]:
+    """
+    Parses an indented block of tokens processed by :func:`layout_tokens`.
+    Expects ``NEWLINE`` and ``INDENT`` tokens, applies parser and then
+    expects ``DEDENT`` token, that is inserted on error when error recovery
+    is enabled.
+
+    >>> from reparsec.lexer import (
+    ...     layout_block, layout_line, layout_tokens, parse, split_tokens,
+    ...     token
+    ... )
+    >>> import re
+
+    >>> spec = re.compile(r"(?P<id>[a-z]+)|(?P<colon>:)|\\s+")
+    >>> item = token("id").fmap(lambda t: t.value)
+    >>> section = (item << token("colon")) + layout_block(
+    ...     layout_line(item).many()
+    ... )
+
+    >>> tokens = layout_tokens(split_tokens("a:\\n  b\\n  c", spec))
+    >>> parse(section, list(tokens)).unwrap()
+    ('a', ['b', 'c'])
+
+    :param parser: Parser for contents of the block
+    """
+
+    return (
+        token("NEWLINE") >> token("INDENT") >> parser <<
+        token_ins("DEDENT", "")
+    )
+
+
 def parse(
-        parser: Parser[Sequence[Token], A], stream: Sequence[Token],
-        recover: bool = False) -> ParseResult[A, Sequence[Token]]:
+        parser: Parser[T, A], stream: T,
+        recover: bool = False) -> ParseResult[A, T]:
     """
     Wrapper around :meth:`reparsec.Parser.parse` that enables line and column
     tracking.
@@ -174,6 +1482,14 @@ def parse(
 
 
 def _loc_from_stream(stream: Sequence[Token], pos: int) -> Loc:
+    if type(stream) is TokenBuffer:
+        if pos < len(stream):
+            return stream.loc(stream.starts[pos])
+        elif stream:
+            return stream.loc(stream.ends[-1])
+        return Loc(pos, 0, 0)
+    if type(stream) is LazyTokens:
+        return stream.loc(pos)
     if pos < len(stream):
         return stream[pos].start
     elif stream:
@@ -2,13 +2,18 @@
 Parser combinators.
 """
 
-from typing import Callable, List, Optional, Tuple, TypeVar, Union
-
-from .core import combinators
-from .core.parser import ParseFns, ParseObj
-from .core.result import Result, SimpleResult
-from .core.types import Ctx, Loc
-from .types import ParseResult, ResultWrapper
+import sys
+from typing import (
+    Callable, Iterator, List, Optional, Tuple, TypeVar, Union, cast
+)
+
+from .core import combinators, primitive
+from .core.parser import ParseFastFn, ParseFns, ParseObj
+from .core.result import Ok, Recovered, Result, SimpleResult
+from .core.types import (
+    SKIP, Ctx, EventSink, Loc, RecoveryState, Window, event_sink
+)
+from .types import EventHandler, ParseResult, ResultWrapper
 
 S = TypeVar("S")
 S_contra = TypeVar("S_contra", contravariant=True)
@@ -26,32 +31,298 @@ def _fmt_loc(loc: Loc) -> str:
     return repr(loc.pos)
 
 
+def _parse_recovering(
+        parser: ParseObj[S, A], stream: S, start: int, ctx: Ctx[S],
+        max_insertions: int, max_cost: Optional[int]) -> Result[A, S]:
+    if max_cost is not None:
+        for ins in range(max_insertions):
+            result = parser.parse_fn(stream, start, ctx, ins, ins)
+            if type(result) is Recovered and any(
+                    r.cost <= max_cost for r in result.repairs):
+                return result
+    return parser.parse_fn(
+        stream, start, ctx, max_insertions, max_insertions
+    )
+
+
+def _window(start: int, end: Optional[int]) -> int:
+    if end is None:
+        end = sys.maxsize
+    if not 0 <= start <= end:
+        raise ValueError("Expected 0 <= start <= end")
+    return end
+
+
+def _lazy(stream: object) -> Optional[Window]:
+    if hasattr(stream, "at_end"):
+        return cast(Window, stream)
+    return None
+
+
+def _sink(handler: EventHandler) -> EventSink:
+    return EventSink((handler.start, handler.value, handler.end))
+
+
+def _emit(r: Ok[object, S]) -> None:
+    if r.value is SKIP:
+        r.value = None
+    events = r.ctx.events
+    if events is None or type(events) is EventSink:
+        return
+    sink = event_sink(events)
+    sink.deliver(events)
+    r.set_ctx(r.ctx.set_events(sink))
+
+
+_END = object()
+
+
+def _iterparse(
+        stream: S, r: Result[object, S], first: ParseFastFn[S, object],
+        rest: ParseFastFn[S, object],
+        fmt_loc: Callable[[Loc], str]) -> Iterator[A]:
+    step = first
+    while type(r) is Ok:
+        _emit(r)
+        nr = step(stream, r.pos, r.ctx)
+        if type(nr) is Ok:
+            if nr.value is _END:
+                _emit(nr)
+                return
+            if not nr.consumed and step is rest:
+                raise RuntimeError("parser shouldn't accept empty string")
+            _emit(nr)
+            yield cast(A, nr.value)
+            r = nr
+        else:
+            r = nr.prepend_expected(r.expected, r.consumed)
+        step = rest
+    ResultWrapper(r, fmt_loc).unwrap()
+
+
 class Parser(ParseObj[S_contra, A_co]):
     def parse(
             self, stream: S_contra, recover: bool = False, *,
-            max_insertions: int = 5,
+            start: int = 0, end: Optional[int] = None,
+            max_insertions: int = 5, max_cost: Optional[int] = None,
             get_loc: Callable[[Loc, S_contra, int], Loc] = _get_loc,
             fmt_loc: Callable[[Loc], str] = _fmt_loc
     ) -> ParseResult[A_co, S_contra]:
         """
         Parses input.
 
+        When error recovery is enabled, the input is parsed without recovery
+        first. If that fails, the recovering parse reuses items that were
+        already parsed by repetitions instead of parsing them again.
+
+        Only the window from ``start`` to ``end`` of the input is parsed,
+        without copying it: :func:`reparsec.sequence.eof` matches at
+        ``end``, and error recovery does not skip past it. Positions are
+        offsets in the whole input, and locations are counted from
+        ``Loc(start, 0, 0)``.
+
+        >>> from reparsec.sequence import eof, satisfy
+
+        >>> digits = satisfy(str.isdigit).many().fmap("".join) << eof()
+        >>> digits.parse("ab123cd", start=2, end=5).unwrap()
+        '123'
+
         :param stream: Input to parse
         :param recover: Flag to enable error recovery
+        :param start: Position to start parsing at
+        :param end: Position of the end of the input, the length of
+            ``stream`` by default
         :param max_insertions: Maximal number of token insertions in a row
             during error recovery
+        :param max_cost: Enables adaptive error recovery. The recovery is
+            first tried without insertions, then with one insertion in a row,
+            and so on up to ``max_insertions``, until there is a repair that
+            costs at most ``max_cost``
         :param get_loc: Function that constructs new ``Loc`` from a previous
             ``Loc``, a stream, and position in the stream
         :param fmt_loc: Function that converts ``Loc`` to string
         """
 
-        ctx = Ctx(0, Loc(0, 0, 0), get_loc)
+        end = _window(start, end)
+        loc = Loc(start, 0, 0)
         if recover:
-            result = self.parse_fn(
-                stream, 0, ctx, max_insertions, max_insertions
+            ctx = Ctx(
+                0, loc, get_loc, RecoveryState(start), None, end,
+                _lazy(stream)
             )
+            result: Result[A_co, S_contra] = self.parse_fast_fn(
+                stream, start, ctx
+            )
+            if type(result) is not Ok:
+                result = _parse_recovering(
+                    self, stream, start, ctx, max_insertions, max_cost
+                )
         else:
-            result = self.parse_fast_fn(stream, 0, ctx)
+            ctx = Ctx(0, loc, get_loc, None, None, end, _lazy(stream))
+            result = self.parse_fast_fn(stream, start, ctx)
+        return ResultWrapper(result, fmt_loc)
+
+    def parse_prefix(
+            self, stream: S_contra, recover: bool = False, *,
+            start: int = 0, end: Optional[int] = None,
+            max_insertions: int = 5, max_cost: Optional[int] = None,
+            get_loc: Callable[[Loc, S_contra, int], Loc] = _get_loc,
+            fmt_loc: Callable[[Loc], str] = _fmt_loc
+    ) -> ParseResult[Tuple[A_co, int], S_contra]:
+        """
+        Parses input like :meth:`parse`, and returns the parsed value
+        together with the position after it, so that the rest of the input
+        can be parsed starting from there.
+
+        >>> from reparsec.sequence import satisfy
+
+        >>> number = satisfy(str.isdigit).many().fmap("".join)
+        >>> number.parse_prefix("12;345", start=0).unwrap()
+        ('12', 2)
+        >>> number.parse_prefix("12;345", start=3).unwrap()
+        ('345', 6)
+
+        :param stream: Input to parse
+        :param recover: Flag to enable error recovery
+        :param start: Position to start parsing at
+        :param end: Position of the end of the input, the length of
+            ``stream`` by default
+        :param max_insertions: Maximal number of token insertions in a row
+            during error recovery
+        :param max_cost: Enables adaptive error recovery, see :meth:`parse`
+        :param get_loc: Function that constructs new ``Loc`` from a previous
+            ``Loc``, a stream, and position in the stream
+        :param fmt_loc: Function that converts ``Loc`` to string
+        """
+
+        parser: TupleParser[S_contra, Tuple[A_co, int]] = FnParser(
+            combinators.seq(self.to_fns(), primitive.position())
+        )
+        return parser.parse(
+            stream, recover, start=start, end=end,
+            max_insertions=max_insertions, max_cost=max_cost,
+            get_loc=get_loc, fmt_loc=fmt_loc
+        )
+
+    def iterparse(
+            self, stream: S_contra,
+            sep: Optional[ParseObj[S_contra, B]] = None, *,
+            open: Optional[ParseObj[S_contra, object]] = None,
+            close: Optional[ParseObj[S_contra, object]] = None,
+            start: int = 0, end: Optional[int] = None,
+            handler: Optional[EventHandler] = None,
+            get_loc: Callable[[Loc, S_contra, int], Loc] = _get_loc,
+            fmt_loc: Callable[[Loc], str] = _fmt_loc) -> Iterator[A_co]:
+        """
+        Parses ``open``, then applies the parser multiple times like
+        :meth:`many`, or :meth:`sep_by` if ``sep`` is given, then parses
+        ``close``. The values parsed by the parser are yielded one by one as
+        soon as they are parsed, instead of being collected in a list. If the
+        input is invalid, :exc:`reparsec.ParseError` is raised after the
+        values before the error are yielded. Error recovery is not
+        supported. If ``handler`` is given, events of named rules are
+        delivered to it like in :meth:`parse_events`.
+
+        >>> from reparsec.sequence import eof, sym
+
+        >>> items = sym("a").iterparse(
+        ...     "[a,a]", sym(","), open=sym("["), close=sym("]") << eof()
+        ... )
+        >>> list(items)
+        ['a', 'a']
+
+        :param stream: Input to parse
+        :param sep: Separators parser
+        :param open: Parser of the input before the first value
+        :param close: Parser of the input after the last value
+        :param start: Position to start parsing at
+        :param end: Position of the end of the input, the length of
+            ``stream`` by default
+        :param handler: Receiver of events of named rules
+        :param get_loc: Function that constructs new ``Loc`` from a previous
+            ``Loc``, a stream, and position in the stream
+        :param fmt_loc: Function that converts ``Loc`` to string
+        """
+
+        end = _window(start, end)
+        item = self.to_fns()
+        stop = combinators.seqr(
+            (primitive.Pure(None) if close is None else close).to_fns(),
+            primitive.Pure[S_contra, object](_END).to_fns()
+        )
+        first = combinators.alt(item, stop)
+        rest = first
+        if sep is not None:
+            rest = combinators.alt(
+                combinators.seqr(sep.to_fns(), item), stop
+            )
+        ctx = Ctx(
+            0, Loc(start, 0, 0), get_loc, None,
+            None if handler is None else _sink(handler), end, _lazy(stream)
+        )
+        r = (primitive.Pure(None) if open is None else open).parse_fast_fn(
+            stream, start, ctx
+        )
+        return _iterparse(
+            stream, r, first.fast_fn, rest.fast_fn, fmt_loc
+        )
+
+    def parse_events(
+            self, stream: S_contra, handler: EventHandler, *,
+            start: int = 0, end: Optional[int] = None,
+            get_loc: Callable[[Loc, S_contra, int], Loc] = _get_loc,
+            fmt_loc: Callable[[Loc], str] = _fmt_loc
+    ) -> ParseResult[A_co, S_contra]:
+        """
+        Parses input like :meth:`parse`, and delivers events of the rules,
+        that are marked with :meth:`named`, to ``handler`` instead of
+        building their values. Events are delivered during parsing: when a
+        named rule that consumed input ends outside of :meth:`attempt`,
+        backtracking can no longer drop the events up to its end, and they
+        are delivered. If the input is invalid, the events delivered before
+        the error are not retracted. Error recovery is not supported.
+
+        >>> from reparsec import EventHandler
+        >>> from reparsec.sequence import satisfy, sym
+
+        >>> class Printer(EventHandler):
+        ...     def start(self, rule, pos):
+        ...         print("start", rule, pos)
+        ...     def value(self, rule, value):
+        ...         print("value", rule, value)
+        ...     def end(self, rule, pos):
+        ...         print("end", rule, pos)
+
+        >>> digit = satisfy(str.isdigit).fmap(int).named("digit")
+        >>> parser = digit.sep_by(sym(",")).named("list")
+        >>> parser.parse_events("1,2", Printer()).unwrap()
+        start list 0
+        start digit 0
+        value digit 1
+        end digit 1
+        start digit 2
+        value digit 2
+        end digit 3
+        end list 3
+
+        :param stream: Input to parse
+        :param handler: Receiver of events
+        :param start: Position to start parsing at
+        :param end: Position of the end of the input, the length of
+            ``stream`` by default
+        :param get_loc: Function that constructs new ``Loc`` from a previous
+            ``Loc``, a stream, and position in the stream
+        :param fmt_loc: Function that converts ``Loc`` to string
+        """
+
+        end = _window(start, end)
+        ctx = Ctx(
+            0, Loc(start, 0, 0), get_loc, None, _sink(handler), end,
+            _lazy(stream)
+        )
+        result = self.parse_fast_fn(stream, start, ctx)
+        if type(result) is Ok:
+            _emit(result)
         return ResultWrapper(result, fmt_loc)
 
     def fmap(self, fn: Callable[[A_co], B]) -> "TupleParser[S_contra, B]":
@@ -283,6 +554,29 @@ class Parser(ParseObj[S_contra, A_co]):
 
         return label(self, expected)
 
+    def named(self, rule: str) -> "TupleParser[S_contra, A_co]":
+        """
+        Marks the parser as a rule, that emits events in
+        :meth:`parse_events`: ``start`` before the rule, ``value`` with the
+        value of the rule if it contains no named rules, and ``end`` after
+        the rule. In this mode, the enclosing parsers do not build values
+        from the value of the rule: :meth:`fmap`, sequences and repetitions
+        skip it, :meth:`bind` raises :exc:`RuntimeError`, and
+        :meth:`parse_events` returns ``None`` in place of such value.
+        Otherwise the parser is applied as is.
+
+        >>> from reparsec.sequence import satisfy
+
+        >>> parser = satisfy(str.isdigit).named("digit").many()
+
+        >>> parser.parse("12").unwrap()
+        ['1', '2']
+
+        :param rule: Name of the rule
+        """
+
+        return named(self, rule)
+
     def recover(self) -> "TupleParser[S_contra, A_co]":
         """
         Allows the parser to recover with repair sequences that starts with
@@ -371,6 +665,37 @@ class Parser(ParseObj[S_contra, A_co]):
 
         return recover_with_fn(self, fn, label)
 
+    def sync_on(
+            self, sync: ParseObj[S_contra, object], x: Optional[B] = None,
+            label: Optional[str] = None
+    ) -> "TupleParser[S_contra, Union[A_co, Optional[B]]]":
+        """
+        Applies the parser and returns its' result. When error recovery is
+        enabled and the parser fails, skips the input until ``sync`` succeeds
+        and returns ``x`` instead of searching for the best repair inside the
+        parser. Input parsed by ``sync`` is not consumed. If the error is
+        already at the input recognized by ``sync``, nothing is skipped and
+        ``x`` is reported as inserted.
+
+        >>> from reparsec.sequence import sym
+
+        >>> stmt = (sym("a") + sym("b")).fmap("".join).sync_on(sym(";"))
+        >>> parser = (stmt << sym(";")).many()
+
+        >>> parser.parse("ab;ac;ab;", recover=True).unwrap(recover=True)
+        ['ab', None, 'ab']
+        >>> parser.parse("ab;ac;ab;", recover=True).unwrap()
+        Traceback (most recent call last):
+          ...
+        reparsec.types.ParseError: at 4: expected 'b' (skipped 1 token)
+
+        :param sync: Parser that recognizes the input to skip to
+        :param x: Value to return after skipping
+        :param label: Description of ``x`` when it is inserted
+        """
+
+        return sync_on(self, sync, x, label)
+
     def sep_by(
             self,
             sep: ParseObj[S_contra, B]) -> "TupleParser[S_contra, List[A_co]]":
@@ -920,6 +1245,19 @@ def label(parser: ParseObj[S, A], expected: str) -> TupleParser[S, A]:
     return FnParser(combinators.label(parser.to_fns(), expected))
 
 
+def named(parser: ParseObj[S, A], rule: str) -> TupleParser[S, A]:
+    """
+    :meth:`Parser.named` as a function.
+
+    :param parser: Parser
+    :param rule: Name of the rule
+    """
+
+    return cast(
+        TupleParser[S, A], FnParser(combinators.named(parser.to_fns(), rule))
+    )
+
+
 def recover(parser: ParseObj[S, A]) -> TupleParser[S, A]:
     """
     :meth:`Parser.recover` as a function.
@@ -958,6 +1296,24 @@ def recover_with_fn(
     return FnParser(combinators.recover_with_fn(parser.to_fns(), fn, label))
 
 
+def sync_on(
+        parser: ParseObj[S, A], sync: ParseObj[S, object],
+        x: Optional[B] = None,
+        label: Optional[str] = None) -> TupleParser[S, Union[A, Optional[B]]]:
+    """
+    :meth:`Parser.sync_on` as a function.
+
+    :param parser: Parser
+    :param sync: Parser that recognizes the input to skip to
+    :param x: Value to return after skipping
+    :param label: Description of ``x`` when it is inserted
+    """
+
+    return FnParser(
+        combinators.sync_on(parser.to_fns(), sync.to_fns(), x, label)
+    )
+
+
 def sep_by(
         parser: ParseObj[S, A],
         sep: ParseObj[S, B]) -> TupleParser[S, List[A]]:
@@ -1,21 +1,51 @@
 """
-Parsers for scannerless parsing of strings.
+Parsers for scannerless parsing of strings and binary data.
+
+Binary input may be ``bytes``, ``bytearray``, ``memoryview`` or
+``mmap.mmap``, parsers for it are created from ``bytes`` literals and
+patterns. Positions are byte offsets, lines are separated by ``b"\\n"``.
 """
 
-from typing import TypeVar, Union
+import asyncio
+import codecs
+import threading
+import weakref
+from typing import (
+    Generic, Iterator, List, Optional, TextIO, Tuple, TypeVar, Union, cast,
+    overload
+)
 
 from .core import scannerless
+from .core.stream import Pipe, TextStream
+from .core.types import Bytes, Loc
 from .parser import FnParser, Parser, TupleParser
-from .types import ParseResult
+from .types import EventHandler, ParseResult
 
-__all__ = ("literal", "regexp", "parse")
+__all__ = (
+    "literal", "regexp", "parse", "parse_stream", "PushSession",
+    "push_session", "parse_async", "parse_prefix", "iterparse",
+    "parse_events",
+)
 
 A = TypeVar("A")
+S = TypeVar("S", bound=Union[str, Bytes])
 
 
+@overload
 def literal(s: str) -> TupleParser[str, str]:
+    ...
+
+
+@overload
+def literal(s: bytes) -> TupleParser[Bytes, bytes]:
+    ...
+
+
+def literal(
+        s: Union[str, bytes]
+) -> Union[TupleParser[str, str], TupleParser[Bytes, bytes]]:
     """
-    Parses the string ``s`` and returns it.
+    Parses the string or bytes ``s`` and returns it.
 
     >>> from reparsec.scannerless import literal
 
@@ -28,13 +58,32 @@ def literal(s: str) -> TupleParser[str, str]:
       ...
     reparsec.types.ParseError: at 0: expected 'ab'
 
-    :param s: String to parse
+    >>> literal(b"ab").parse(memoryview(b"ab")).unwrap()
+    b'ab'
+
+    :param s: String or bytes to parse
     """
 
+    if isinstance(s, bytes):
+        return FnParser(scannerless.literal(s))
     return FnParser(scannerless.literal(s))
 
 
+@overload
 def regexp(pat: str, group: Union[int, str] = 0) -> TupleParser[str, str]:
+    ...
+
+
+@overload
+def regexp(
+        pat: bytes,
+        group: Union[int, str] = 0) -> TupleParser[Bytes, bytes]:
+    ...
+
+
+def regexp(
+        pat: Union[str, bytes], group: Union[int, str] = 0
+) -> Union[TupleParser[str, str], TupleParser[Bytes, bytes]]:
     """
     Parses the prefix of input that matches ``pat`` and returns the value of
     ``group``.
@@ -50,19 +99,26 @@ def regexp(pat: str, group: Union[int, str] = 0) -> TupleParser[str, str]:
       ...
     reparsec.types.ParseError: at 0: unexpected input
 
-    :param pat: Regular expression
+    >>> regexp(b"a(.)", 1).parse(bytearray(b"ab")).unwrap()
+    b'b'
+
+    :param pat: Regular expression, ``str`` or ``bytes``
     :param group: Group index or name
     """
 
+    if isinstance(pat, bytes):
+        return FnParser(scannerless.regexp(pat, group))
     return FnParser(scannerless.regexp(pat, group))
 
 
 def parse(
-        parser: Parser[str, A], stream: str,
-        recover: bool = False) -> ParseResult[A, str]:
+        parser: Parser[S, A], stream: S, recover: bool = False, *,
+        start: int = 0, end: Optional[int] = None) -> ParseResult[A, S]:
     """
     Wrapper around :meth:`reparsec.Parser.parse` that enables line and column
-    tracking for scannerless parsers.
+    tracking for scannerless parsers. Starts of lines are indexed as the
+    parser looks up locations further into the input, so layout combinators
+    find the column of a position without counting characters.
 
     >>> from reparsec.scannerless import literal, parse
 
@@ -77,13 +133,306 @@ def parse(
       ...
     reparsec.types.ParseError: at 2:2: expected 'c'
 
+    Lines and columns of a window from ``start`` to ``end`` are counted
+    from its start.
+
+    >>> parse(parser, "xxa\\nbb", start=2).unwrap()
+    Traceback (most recent call last):
+      ...
+    reparsec.types.ParseError: at 2:2: expected 'c'
+
     :param parser: Parser to run
-    :param stream: String to parse
+    :param stream: String or binary data to parse
     :param recover: Flag to enable error recovery
+    :param start: Position to start parsing at
+    :param end: Position of the end of the input
     """
 
     return parser.parse(
-        stream, recover,
-        get_loc=scannerless.get_loc,
-        fmt_loc=lambda l: "{}:{}".format(l.line + 1, l.col + 1)
+        stream, recover, start=start, end=end,
+        get_loc=_line_index(stream, start, end).get_loc, fmt_loc=_fmt_loc
+    )
+
+
+def parse_prefix(
+        parser: Parser[S, A], stream: S, recover: bool = False, *,
+        start: int = 0,
+        end: Optional[int] = None) -> ParseResult[Tuple[A, int], S]:
+    """
+    Wrapper around :meth:`reparsec.Parser.parse_prefix` that enables line
+    and column tracking like :func:`parse`.
+
+    >>> from reparsec.scannerless import parse_prefix, regexp
+
+    >>> parser = regexp(r"[a-z]+") << literal(";")
+    >>> data = "ab;cd;"
+    >>> parse_prefix(parser, data).unwrap()
+    ('ab', 3)
+    >>> parse_prefix(parser, data, start=3).unwrap()
+    ('cd', 6)
+
+    :param parser: Parser to run
+    :param stream: String or binary data to parse
+    :param recover: Flag to enable error recovery
+    :param start: Position to start parsing at
+    :param end: Position of the end of the input
+    """
+
+    return parser.parse_prefix(
+        stream, recover, start=start, end=end,
+        get_loc=_line_index(stream, start, end).get_loc, fmt_loc=_fmt_loc
+    )
+
+
+def iterparse(
+        parser: Parser[S, A], stream: S,
+        sep: Optional[Parser[S, object]] = None, *,
+        open: Optional[Parser[S, object]] = None,
+        close: Optional[Parser[S, object]] = None, start: int = 0,
+        end: Optional[int] = None,
+        handler: Optional[EventHandler] = None) -> Iterator[A]:
+    """
+    Wrapper around :meth:`reparsec.Parser.iterparse` that enables line and
+    column tracking like :func:`parse`.
+
+    >>> from reparsec.scannerless import iterparse, regexp
+
+    >>> number = regexp(r"[0-9]+").fmap(int).label("number")
+    >>> items = iterparse(
+    ...     number, "[1,2,x]", literal(","),
+    ...     open=literal("["), close=literal("]")
+    ... )
+    >>> next(items), next(items)
+    (1, 2)
+    >>> next(items)
+    Traceback (most recent call last):
+      ...
+    reparsec.types.ParseError: at 1:6: expected number
+
+    :param parser: Parser of the values
+    :param stream: String or binary data to parse
+    :param sep: Separators parser
+    :param open: Parser of the input before the first value
+    :param close: Parser of the input after the last value
+    :param start: Position to start parsing at
+    :param end: Position of the end of the input
+    :param handler: Receiver of events of named rules
+    """
+
+    return parser.iterparse(
+        stream, sep, open=open, close=close, start=start, end=end,
+        handler=handler, get_loc=_line_index(stream, start, end).get_loc,
+        fmt_loc=_fmt_loc
+    )
+
+
+def parse_events(
+        parser: Parser[S, A], stream: S, handler: EventHandler, *,
+        start: int = 0, end: Optional[int] = None) -> ParseResult[A, S]:
+    """
+    Wrapper around :meth:`reparsec.Parser.parse_events` that enables line
+    and column tracking like :func:`parse`.
+
+    :param parser: Parser to run
+    :param stream: String or binary data to parse
+    :param handler: Receiver of events
+    :param start: Position to start parsing at
+    :param end: Position of the end of the input
+    """
+
+    return parser.parse_events(
+        stream, handler, start=start, end=end,
+        get_loc=_line_index(stream, start, end).get_loc, fmt_loc=_fmt_loc
     )
+
+
+def _line_index(
+        stream: Union[str, Bytes], start: int,
+        end: Optional[int]) -> scannerless.LineIndex:
+    if end is None:
+        return scannerless.LineIndex(stream, start)
+    return scannerless.LineIndex(stream, start, end)
+
+
+def _fmt_loc(loc: Loc) -> str:
+    return "{}:{}".format(loc.line + 1, loc.col + 1)
+
+
+def parse_stream(
+        parser: Parser[str, A], file: TextIO, recover: bool = False,
+        chunk_size: int = 65536) -> ParseResult[A, str]:
+    """
+    Parses text, that is read from a file object in chunks, with line and
+    column tracking. Only a window of the text is kept in memory. The window
+    grows when a parser needs to look past its end, and the text before the
+    current position is dropped, unless it is inside of an
+    :func:`reparsec.attempt`, that may backtrack to it.
+
+    >>> from io import StringIO
+    >>> from reparsec.scannerless import literal, parse_stream
+
+    >>> parser = (literal("ab") | literal("c")).many()
+
+    >>> parse_stream(parser, StringIO("abcab"), chunk_size=2).unwrap()
+    ['ab', 'c', 'ab']
+
+    A regular expression match reads past the window while the pattern
+    could still match the text that follows, so tokens may be longer than
+    ``chunk_size``. Error recovery reparses the input from the start, so
+    with ``recover=True`` the whole text is read into memory first.
+
+    :param parser: Parser to run
+    :param file: Text file object to read from
+    :param recover: Flag to enable error recovery
+    :param chunk_size: Number of characters to read at once
+    """
+
+    if recover:
+        return parse(parser, file.read(), recover)
+    stream = TextStream(file, chunk_size)
+    return parser.parse(
+        cast(str, stream),
+        get_loc=stream.get_loc, fmt_loc=_fmt_loc
+    )
+
+
+class PushSession(Generic[A]):
+    """
+    Parses text that is pushed to it piece by piece. The parser runs in a
+    background thread over the text read by :func:`parse_stream`, and it is
+    suspended whenever it needs more input than has been fed so far. If the
+    session is dropped without being closed, its thread is stopped.
+
+    With ``recover=True`` the parser starts only when the session is closed,
+    because error recovery needs the whole text.
+
+    :param parser: Parser to run
+    :param recover: Flag to enable error recovery
+    :param chunk_size: Number of characters to read at once
+    """
+
+    def __init__(
+            self, parser: Parser[str, A], recover: bool = False,
+            chunk_size: int = 65536):
+        self._pipe = pipe = Pipe()
+        self._out: List[Union[ParseResult[A, str], BaseException]] = []
+        self._thread = threading.Thread(
+            target=_run_session,
+            args=(parser, pipe, recover, chunk_size, self._out), daemon=True
+        )
+        self._thread.start()
+        weakref.finalize(self, pipe.abort)
+
+    def feed(self, data: str) -> None:
+        """
+        Pushes ``data`` to the parser and returns when the parser has
+        consumed it and waits for more input, or when it has finished.
+
+        :param data: Next piece of the text
+        :raise: :exc:`ValueError` if the session is closed
+        """
+
+        self._pipe.write(data)
+
+    def close(self) -> ParseResult[A, str]:
+        """
+        Marks the end of the text, waits for the parser to finish and
+        returns the result of the parsing.
+        """
+
+        self._pipe.close()
+        self._thread.join()
+        out = self._out[0]
+        if isinstance(out, BaseException):
+            raise out
+        return out
+
+    def abort(self) -> None:
+        """
+        Stops the parser without waiting for the rest of the text. Returns
+        immediately, the parser thread exits on its next read.
+        """
+
+        self._pipe.abort()
+
+
+def _run_session(
+        parser: Parser[str, A], pipe: Pipe, recover: bool, chunk_size: int,
+        out: List[Union[ParseResult[A, str], BaseException]]) -> None:
+    try:
+        out.append(
+            parse_stream(parser, cast(TextIO, pipe), recover, chunk_size)
+        )
+    except BaseException as exc:
+        out.append(exc)
+    finally:
+        pipe.finish()
+
+
+def push_session(
+        parser: Parser[str, A], recover: bool = False,
+        chunk_size: int = 65536) -> PushSession[A]:
+    """
+    Starts a :class:`PushSession` of the ``parser``.
+
+    >>> from reparsec.scannerless import literal, push_session
+
+    >>> session = push_session((literal("ab") | literal("c")).many())
+    >>> session.feed("a")
+    >>> session.feed("bc")
+    >>> session.feed("ab")
+    >>> session.close().unwrap()
+    ['ab', 'c', 'ab']
+
+    :param parser: Parser to run
+    :param recover: Flag to enable error recovery
+    :param chunk_size: Number of characters to read at once
+    """
+
+    return PushSession(parser, recover, chunk_size)
+
+
+async def parse_async(
+        parser: Parser[str, A], reader: asyncio.StreamReader,
+        recover: bool = False, chunk_size: int = 65536,
+        encoding: str = "utf-8") -> ParseResult[A, str]:
+    """
+    Parses text, that is read from an :class:`asyncio.StreamReader` and
+    decoded with ``encoding``, with line and column tracking. The parser runs
+    in a :class:`PushSession`, so the event loop serves other tasks while the
+    text is read and parsed.
+
+    >>> import asyncio
+    >>> from reparsec.scannerless import literal, parse_async
+
+    >>> async def main():
+    ...     reader = asyncio.StreamReader()
+    ...     reader.feed_data(b"abcab")
+    ...     reader.feed_eof()
+    ...     parser = (literal("ab") | literal("c")).many()
+    ...     return (await parse_async(parser, reader)).unwrap()
+
+    >>> asyncio.run(main())
+    ['ab', 'c', 'ab']
+
+    :param parser: Parser to run
+    :param reader: Stream to read from
+    :param recover: Flag to enable error recovery
+    :param chunk_size: Number of bytes to read at once
+    :param encoding: Encoding of the text
+    """
+
+    loop = asyncio.get_running_loop()
+    session = PushSession(parser, recover, chunk_size)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        while True:
+            data = await reader.read(chunk_size)
+            text = decoder.decode(data, not data)
+            await loop.run_in_executor(None, session.feed, text)
+            if not data:
+                break
+    except BaseException:
+        session.abort()
+        raise
+    return await loop.run_in_executor(None, session.close)
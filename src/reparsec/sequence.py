@@ -2,14 +2,17 @@
 Parsers for arbitrary sequences.
 """
 
-from typing import Callable, Optional, Sequence, Sized, TypeVar
+from typing import Callable, Mapping, Optional, Sequence, Sized, TypeVar, Union
 
 from .core import sequence
+from .core.parser import ParseObj
 from .parser import FnParser, TupleParser
 
-__all__ = ("eof", "satisfy", "sym", "letter", "digit")
+__all__ = ("eof", "satisfy", "sym", "balanced", "letter", "digit")
 
 A = TypeVar("A")
+B = TypeVar("B")
+C = TypeVar("C")
 
 
 def eof() -> TupleParser[Sized, None]:
@@ -70,5 +73,40 @@ def sym(s: A, label: Optional[str] = None) -> TupleParser[Sequence[A], A]:
     return FnParser(sequence.sym(s, label))
 
 
+def balanced(
+        parser: ParseObj[Sequence[A], B], brackets: Mapping[A, A],
+        x: Optional[C] = None
+) -> TupleParser[Sequence[A], Union[B, Optional[C]]]:
+    """
+    Applies the parser and returns its' result. When error recovery is
+    enabled and the parser fails after consuming an opening bracket, skips
+    the input up to and including the matching closing bracket, and returns
+    ``x``. Errors inside nested brackets are left to the parsers of these
+    brackets. Matching brackets are found once per parse and do not account
+    for brackets inside of quoted strings or comments.
+
+    >>> from reparsec import Delay
+    >>> from reparsec.sequence import balanced, sym
+
+    >>> value = Delay()
+    >>> value.define(sym("a") | balanced(
+    ...     value.sep_by(sym(",")).between(sym("["), sym("]")), {"[": "]"}
+    ... ))
+
+    >>> value.parse("[a,[a,b,a],a]", recover=True).unwrap(recover=True)
+    ['a', None, 'a']
+    >>> value.parse("[a,[a,b,a],a]", recover=True).unwrap()
+    Traceback (most recent call last):
+      ...
+    reparsec.types.ParseError: at 6: expected 'a' or '[' (skipped 4 tokens)
+
+    :param parser: Parser of bracketed input
+    :param brackets: Mapping from opening brackets to closing brackets
+    :param x: Value to return after skipping
+    """
+
+    return FnParser(sequence.balanced(parser.to_fns(), brackets, x))
+
+
 letter: TupleParser[Sequence[str], str] = satisfy(str.isalpha).label("letter")
 digit: TupleParser[Sequence[str], str] = satisfy(str.isdigit).label("digit")
@@ -4,9 +4,9 @@ Core parser API.
 
 from abc import abstractmethod
 from dataclasses import dataclass
-from typing import Callable, Generic, List, Optional, TypeVar
+from typing import Any, Callable, Generic, List, Optional, TypeVar
 
-from .core.repair import RepairOp, Skip
+from .core.repair import RepairOp, Skip, iter_ops
 from .core.result import Error, Ok, Result
 from .core.types import Loc
 
@@ -16,6 +16,38 @@ A_co = TypeVar("A_co", covariant=True)
 B = TypeVar("B")
 
 
+class EventHandler:
+    """
+    Receives events of rules, that are marked with
+    :meth:`reparsec.Parser.named`, from :meth:`reparsec.Parser.parse_events`.
+    The methods do nothing by default.
+    """
+
+    def start(self, rule: str, pos: int) -> None:
+        """
+        Called when the rule starts at the position ``pos``.
+
+        :param rule: Name of the rule
+        :param pos: Position in the input
+        """
+
+    def value(self, rule: str, value: Any) -> None:
+        """
+        Called with the value of the rule, if it contains no named rules.
+
+        :param rule: Name of the rule
+        :param value: Value parsed by the rule
+        """
+
+    def end(self, rule: str, pos: int) -> None:
+        """
+        Called when the rule ends at the position ``pos``.
+
+        :param rule: Name of the rule
+        :param pos: Position in the input
+        """
+
+
 @dataclass
 class ErrorItem:
     """
@@ -137,6 +169,6 @@ class ResultWrapper(ParseResult[A_co, S]):
             ErrorItem(
                 item.loc, self._fmt_loc(item.loc), list(item.expected), item.op
             )
-            for item in repair.ops
+            for item in iter_ops(repair.ops)
         ]
         raise ParseError(errors)
@@ -0,0 +1,89 @@
+import re
+from typing import Callable, Dict
+
+from reparsec import Delay, Parser
+from reparsec.core.sequence import TokenStream
+from reparsec.lexer import Lexer, Token, parse
+from reparsec.sequence import eof
+
+from .json import spec, unescape
+
+number = re.compile(r"""
+(?P<float>-?(?:0|[1-9][0-9]*)(?:
+    (?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)|(?:\.[0-9]+)
+))
+|(?P<integer>-?(?:0|[1-9][0-9]*))
+|(?P<_>.)
+""", re.VERBOSE)
+
+keyword_spec = re.compile(r"""
+[ \n\r\t]+
+|(?P<punct>[{}:,[\]])
+|(?P<float>-?(?:0|[1-9][0-9]*)(?:
+    (?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)|(?:\.[0-9]+)
+))
+|(?P<integer>-?(?:0|[1-9][0-9]*))
+|"(?P<string>(?:
+    [\x20\x21\x23-\x5B\x5D-\U0010FFFF]
+    |\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})
+)+)"
+|(?P<word>[a-z]+)
+|(?P<_>.)
+""", re.VERBOSE)
+
+keywords = {"word": {"true": "bool", "false": "bool", "null": "null"}}
+
+lexer = Lexer(spec, literals=["punct"])
+dispatch_lexer = Lexer(spec, literals=["punct"], dispatch={
+    " \n\r\t": re.compile(r"[ \n\r\t]+"),
+    "{}:,[]": re.compile(r"(?P<punct>.)"),
+    "-0123456789": number,
+})
+keyword_lexer = Lexer(keyword_spec, literals=["punct"], keywords=keywords)
+
+convert: Dict[str, Callable[[str], object]] = {
+    "string": unescape,
+    "integer": int,
+    "float": float,
+    "bool": lambda v: v == "true",
+    "null": lambda v: None,
+}
+
+
+def grammar(lexer: Lexer) -> Parser[TokenStream[Token], object]:
+    def punct(x: str) -> Parser[TokenStream[Token], Token]:
+        return lexer.token_value("punct", x)
+
+    value = Delay[TokenStream[Token], object]()
+
+    scalar = (
+        lexer.token("integer") | lexer.token("float") | lexer.token("bool") |
+        lexer.token("null") | lexer.token("string")
+    ).fmap(lambda t: convert[t.kind](t.value))
+    string = lexer.token("string").fmap(lambda t: unescape(t.value))
+    json_dict = (
+        (string.recover_with("a", "'\"a\"'") << punct(":")) + value
+    ).sep_by(punct(",")).fmap(lambda v: dict(v)).between(
+        punct("{"), punct("}")
+    ).label("object")
+    json_list = value.sep_by(punct(",")).between(
+        punct("["), punct("]")
+    ).label("list")
+
+    value.define(
+        (
+            scalar.recover_with(1)
+            | json_dict.recover() | json_list.recover()
+        ).label("value")
+    )
+
+    return value << eof()
+
+
+parser = grammar(lexer)
+dispatch_parser = grammar(dispatch_lexer)
+keyword_parser = grammar(keyword_lexer)
+
+
+def loads(src: str) -> object:
+    return parse(parser, lexer.tokenize(src)).unwrap()
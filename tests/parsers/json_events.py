@@ -0,0 +1,69 @@
+from typing import Any, List
+
+from reparsec import Delay, EventHandler
+from reparsec.scannerless import iterparse, parse_events
+from reparsec.sequence import eof
+
+from .json_scannerless import (
+    boolean, integer, null, number, ows, punct, string
+)
+
+value = Delay[str, object]()
+
+scalar = (number | integer | boolean | null | string).named("scalar")
+member = (string.named("key") << punct(":")) + value
+json_dict = member.sep_by(punct(",")).between(
+    punct("{"), punct("}")
+).label("object").named("object")
+json_list = value.sep_by(punct(",")).between(
+    punct("["), punct("]")
+).label("list").named("list")
+
+value.define((scalar | json_dict | json_list).label("value"))
+
+parser = ows >> value << eof()
+
+
+class Builder(EventHandler):
+    def __init__(self) -> None:
+        self.stack: List[Any] = [[]]
+        self.keys: List[str] = []
+
+    def start(self, rule: str, pos: int) -> None:
+        if rule == "object":
+            self.stack.append({})
+        elif rule == "list":
+            self.stack.append([])
+
+    def value(self, rule: str, value: Any) -> None:
+        if rule == "key":
+            self.keys.append(value)
+        elif rule == "scalar":
+            self.add(value)
+
+    def end(self, rule: str, pos: int) -> None:
+        if rule in ("object", "list"):
+            self.add(self.stack.pop())
+
+    def add(self, value: Any) -> None:
+        top = self.stack[-1]
+        if type(top) is dict:
+            top[self.keys.pop()] = value
+        else:
+            top.append(value)
+
+
+def loads(src: str) -> object:
+    builder = Builder()
+    parse_events(parser, src, builder).unwrap()
+    return builder.stack[0][0]
+
+
+def iterloads(src: str) -> List[object]:
+    builder = Builder()
+    items: List[object] = builder.stack[0]
+    for _ in iterparse(
+            value, src, punct(","), open=ows >> punct("["),
+            close=punct("]") << eof(), handler=builder):
+        pass
+    return items
@@ -0,0 +1,25 @@
+import re
+from typing import Sequence, Tuple
+
+from reparsec import Delay
+from reparsec.lexer import (
+    Token, iter_tokens, layout_block, layout_line, layout_tokens, parse, token
+)
+from reparsec.sequence import eof
+
+spec = re.compile(r"(?P<ident>[a-zA-Z_][a-zA-Z_0-9]*)|(?P<colon>:)|\s+")
+
+ident = token("ident").fmap(lambda t: t.value)
+colon = token("colon")
+
+pair = Delay[Sequence[Token], Tuple[str, object]]()
+pairs = pair.many().fmap(lambda kvs: dict(kvs))
+value = layout_line(ident) | layout_block(pairs)
+pair.define((ident << colon) + value)
+
+parser = pairs << eof()
+
+
+def loads(source: str) -> object:
+    tokens = list(layout_tokens(iter_tokens(source, spec)))
+    return parse(parser, tokens).unwrap()
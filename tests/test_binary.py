@@ -0,0 +1,124 @@
+from typing import Any, List, Tuple
+
+import pytest
+
+from reparsec import ParseError, Parser
+from reparsec.binary import (
+    count, floating, integer, length_prefixed, parse, parse_prefix, take,
+    unpack
+)
+from reparsec.scannerless import literal
+
+record = integer(2, "little").then(length_prefixed(1).fmap(bytes)).then(
+    floating(8)
+)
+frame = literal(b"F") >> integer(1).bind(lambda n: count(n, record))
+message = frame | literal(b"E") >> take(2).fmap(bytes)
+
+DATA_POSITIVE: List[Tuple[Parser[Any, Any], bytes, object]] = [
+    (unpack("<hxI"), b"\xff\xff\x00\x01\x00\x00\x00", (-1, 1)),
+    (integer(1), b"\xff", 255),
+    (integer(1, signed=True), b"\xff", -1),
+    (integer(8, "little"), b"\x01" + b"\x00" * 7, 1),
+    (integer(4, signed=True), b"\x80\x00\x00\x00", -2 ** 31),
+    (floating(2), b"\x3c\x00", 1.0),
+    (floating(8, "little"), b"\x00" * 6 + b"\xf0\x3f", 1.0),
+    (take(0), b"", b""),
+    (take(3).fmap(bytes), b"abc", b"abc"),
+    (length_prefixed(2).fmap(bytes), b"\x00\x00", b""),
+    (count(0, integer(1)), b"", []),
+    (count(3, integer(1)), b"\x01\x02\x03", [1, 2, 3]),
+    (
+        frame, b"F\x02\x01\x00\x01a?\xf0\x00\x00\x00\x00\x00\x00" +
+        b"\x02\x00\x00@\x00\x00\x00\x00\x00\x00\x00",
+        [(1, b"a", 1.0), (2, b"", 2.0)]
+    ),
+    (message, b"Eab", b"ab"),
+]
+
+
+@pytest.mark.parametrize("parser, data, expected", DATA_POSITIVE)
+def test_positive(
+        parser: Parser[Any, Any], data: bytes, expected: object) -> None:
+    assert parse(parser, data).unwrap() == expected
+
+
+def test_zero_copy() -> None:
+    data = bytearray(b"\x03abc")
+    value = parse(length_prefixed(1), data).unwrap()
+    data[1:4] = b"xyz"
+    assert bytes(value) == b"xyz"
+
+
+DATA_NEGATIVE: List[Tuple[Parser[Any, Any], bytes, str]] = [
+    (integer(2), b"\x00", "at 0: expected 2 bytes"),
+    (unpack("B"), b"", "at 0: expected 1 byte"),
+    (take(2), b"a", "at 0: expected 2 bytes"),
+    (length_prefixed(2), b"\x00", "at 0: expected 2 bytes"),
+    (length_prefixed(2), b"\x00\x03ab", "at 2: expected 3 bytes"),
+    (count(3, integer(1)), b"\x01\x02", "at 2: expected 1 byte"),
+    (frame, b"F\x01\x01", "at 2: expected 2 bytes"),
+    (message, b"G", "at 0: expected b'F' or b'E'"),
+]
+
+
+@pytest.mark.parametrize("parser, data, expected", DATA_NEGATIVE)
+def test_negative(
+        parser: Parser[Any, Any], data: bytes, expected: str) -> None:
+    with pytest.raises(ParseError) as err:
+        parse(parser, data).unwrap()
+    assert str(err.value) == expected
+
+
+DATA_RECOVERY: List[Tuple[Parser[Any, Any], bytes, object, str]] = [
+    (
+        count(3, integer(1).recover_with(0)), b"\x01",
+        [1, 0, 0],
+        "at 1: expected 1 byte (inserted 0), " +
+        "at 1: expected 1 byte (inserted 0)"
+    ),
+    (
+        count(2, literal(b"a") | literal(b"b")), b"axb", [b"a", b"b"],
+        "at 1: expected b'a' or b'b' (skipped 1 token)"
+    ),
+    (
+        count(3, literal(b"a")) + literal(b";"), b"axaxa;",
+        ([b"a", b"a", b"a"], b";"),
+        "at 1: expected b'a' (skipped 1 token), " +
+        "at 3: expected b'a' (skipped 1 token)"
+    ),
+]
+
+
+@pytest.mark.parametrize("parser, data, value, expected", DATA_RECOVERY)
+def test_recovery(
+        parser: Parser[Any, Any], data: bytes, value: object,
+        expected: str) -> None:
+    r = parse(parser, data, recover=True)
+    assert r.unwrap(recover=True) == value
+    with pytest.raises(ParseError) as err:
+        r.unwrap()
+    assert str(err.value) == expected
+
+
+def test_window() -> None:
+    data = b"\x02ab\x01c\x03def"
+    records = []
+    pos = 0
+    while pos < len(data):
+        value, pos = parse_prefix(length_prefixed(1), data, start=pos).unwrap()
+        records.append(bytes(value))
+    assert records == [b"ab", b"c", b"def"]
+    assert parse(take(2).fmap(bytes), data, start=1, end=3).unwrap() == b"ab"
+    with pytest.raises(ParseError) as err:
+        parse(length_prefixed(1), data, start=3, end=4).unwrap()
+    assert str(err.value) == "at 4: expected 1 byte"
+
+
+def test_invalid() -> None:
+    with pytest.raises(ValueError):
+        integer(3)
+    with pytest.raises(ValueError):
+        floating(4, "middle")
+    with pytest.raises(ValueError):
+        take(-1)
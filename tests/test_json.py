@@ -1,9 +1,17 @@
-from typing import List, Tuple
+import random
+import re
+import struct
+from pathlib import Path
+from typing import Iterator, List, Pattern, Sequence, Tuple
 
 import pytest
 
-from reparsec import ParseError
-from reparsec.lexer import parse, split_tokens
+from reparsec import ParseError, Parser
+from reparsec.lexer import (
+    LazyTokens, Lexer, LexError, Token, iter_tokens, parse, split_tokens,
+    split_tokens_parallel, token
+)
+from reparsec.sequence import eof
 
 from .parsers import json
 
@@ -111,3 +119,266 @@ def test_recovery(data: str, value: object, expected: str) -> None:
     with pytest.raises(ParseError) as err:
         r.unwrap()
     assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, value, expected", DATA_RECOVERY)
+def test_recovery_buffer(data: str, value: object, expected: str) -> None:
+    r = parse(json.parser, Lexer(json.spec).tokenize(data), recover=True)
+    assert r.unwrap(recover=True) == value
+    with pytest.raises(ParseError) as err:
+        r.unwrap()
+    assert str(err.value) == expected
+
+
+DATA_BUFFER = [
+    "",
+    '{"a": [1, 2.5, true],\n  "b": null}',
+    '\n\n  [\n"x\\ny"\n, -1]\n',
+]
+
+
+@pytest.mark.parametrize("data", DATA_BUFFER)
+def test_buffer(data: str) -> None:
+    tokens = split_tokens(data, json.spec)
+    buffer = Lexer(json.spec).tokenize(data)
+    assert len(buffer) == len(tokens)
+    assert list(buffer) == tokens
+    assert buffer[1:] == tokens[1:]
+    assert [(t.start, t.end) for t in buffer] == [
+        (t.start, t.end) for t in tokens
+    ]
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+@pytest.mark.parametrize("data", DATA_BUFFER + [
+    "[\n" + ",\n".join('{"k": [1, 2.5, "x\\ny"]}' for _ in range(50)) + "]"
+])
+def test_buffer_parallel(data: str, workers: int) -> None:
+    tokens = split_tokens(data, json.spec)
+    buffer = split_tokens_parallel(data, json.spec, workers)
+    assert list(buffer) == tokens
+    assert [(t.start, t.end) for t in buffer] == [
+        (t.start, t.end) for t in tokens
+    ]
+
+
+SPEC_MULTILINE = re.compile(
+    r'\s+|(?P<str>"[^"]*")|(?P<comment>/\*.*?\*/)|(?P<id>[a-z]+)', re.S
+)
+
+
+@pytest.mark.parametrize("workers", [2, 4])
+def test_buffer_parallel_resync(workers: int) -> None:
+    data = 'a /* b\n\nc */ "d\n"\n' * 20 + "e\n" * 20
+    tokens = split_tokens(data, SPEC_MULTILINE)
+    buffer = split_tokens_parallel(data, SPEC_MULTILINE, workers)
+    assert list(buffer) == tokens
+    assert [t.start for t in buffer] == [t.start for t in tokens]
+
+
+def test_buffer_parallel_error() -> None:
+    data = "a\n" * 20 + '"b\n' + "c\n" * 20
+    with pytest.raises(LexError) as err:
+        split_tokens_parallel(data, SPEC_MULTILINE, 3)
+    assert str(err.value) == "Lexing error at 21:1"
+
+
+DATA_RELEX = [
+    (json.spec, '{"a": [1, 2]}', 7, 1, "10"),
+    (json.spec, '{"a": [1, 2]}', 0, 0, " "),
+    (json.spec, '{"a": [1, 2]}', 13, 0, "\n"),
+    (json.spec, '{"a":\n [1, 2]}\n', 2, 1, "bc\nd"),
+    (SPEC_MULTILINE, 'a /* b */ c\nd', 3, 0, "*/ x /*"),
+    (SPEC_MULTILINE, 'a /* b */ c\nd', 2, 8, "x"),
+    (SPEC_MULTILINE, 'a b\nc d\ne', 2, 3, '"b\nc"'),
+    (SPEC_MULTILINE, '', 0, 0, "a b"),
+    (json.spec, ':false,false]0]01212"012.12', 25, 1, '"true'),
+]
+
+
+@pytest.mark.parametrize(
+    "spec, data, start, old_length, new_text", DATA_RELEX
+)
+def test_buffer_relex(
+        spec: Pattern[str], data: str, start: int, old_length: int,
+        new_text: str) -> None:
+    lexer = Lexer(spec)
+    tokens = lexer.tokenize(data)
+    tokens.loc(0)
+    relexed = lexer.relex(tokens, start, old_length, new_text)
+    expected = lexer.tokenize(relexed.src)
+    assert relexed.src == data[:start] + new_text + data[start + old_length:]
+    assert relexed.columns() == expected.columns()
+    assert [(t.start, t.end) for t in relexed] == [
+        (t.start, t.end) for t in expected
+    ]
+
+
+RELEX_PARTS = [
+    '"', "true", "false", ",", "]", "[", "0", "1", "2", ".", " ", "\n", "e",
+    "\\", "u", "/*", "*/"
+]
+
+
+@pytest.mark.parametrize("spec", [json.spec, SPEC_MULTILINE])
+@pytest.mark.parametrize("seed", range(4))
+def test_buffer_relex_random(spec: Pattern[str], seed: int) -> None:
+    rnd = random.Random(seed)
+    lexer = Lexer(spec)
+
+    def text(n: int) -> str:
+        return "".join(rnd.choice(RELEX_PARTS) for _ in range(n))
+
+    for _ in range(500):
+        data = text(rnd.randint(0, 20))
+        start = rnd.randint(0, len(data))
+        old_length = rnd.randint(0, len(data) - start)
+        new_text = text(rnd.randint(0, 3))
+        src = data[:start] + new_text + data[start + old_length:]
+        try:
+            tokens = lexer.tokenize(data)
+            expected = lexer.tokenize(src)
+        except LexError:
+            continue
+        relexed = lexer.relex(tokens, start, old_length, new_text)
+        assert relexed.columns() == expected.columns(), (
+            data, start, old_length, new_text
+        )
+
+
+def test_buffer_relex_error() -> None:
+    lexer = Lexer(SPEC_MULTILINE)
+    with pytest.raises(LexError) as err:
+        lexer.relex(lexer.tokenize("a /* b */ c"), 2, 2, "")
+    assert str(err.value) == "Lexing error at 1:6"
+
+
+def test_buffer_cache(tmp_path: Path) -> None:
+    data = DATA_BUFFER[1]
+    cache_dir = str(tmp_path / "tokens")
+    expected = Lexer(json.spec, ["punct"]).tokenize(data)
+    lexer = Lexer(json.spec, ["punct"])
+    lexer.value_id("punct", "]")
+    tokens = lexer.tokenize(data, cache_dir)
+    assert tokens.columns() == lexer.tokenize(data).columns()
+    assert len(list(tmp_path.iterdir())) == 1
+    lexer = Lexer(json.spec, ["punct"])
+    cached = lexer.tokenize(data, cache_dir)
+    assert list(cached) == list(expected)
+    assert list(cached.value_ids) == [
+        lexer.value_id(t.kind, t.value) if t.kind == "punct" else -1
+        for t in expected
+    ]
+    assert list(Lexer(json.spec).tokenize(data, cache_dir)) == list(expected)
+    assert len(list((tmp_path / "tokens").iterdir())) == 2
+
+
+def test_buffer_cache_invalid(tmp_path: Path) -> None:
+    lexer = Lexer(json.spec)
+    expected = list(lexer.tokenize("[1, 2]", str(tmp_path)))
+    for path in tmp_path.iterdir():
+        path.write_bytes(path.read_bytes()[:-1])
+    assert list(lexer.tokenize("[1, 2]", str(tmp_path))) == expected
+    assert list(lexer.tokenize("[1, 2]", str(tmp_path))) == expected
+
+
+def _cache_file(header: bytes) -> bytes:
+    return struct.pack("<4sI", b"RPTK", len(header)) + header
+
+
+@pytest.mark.parametrize("data", [
+    b"", b"RPTK", _cache_file(b"[]"), _cache_file(b'{"values": []}'),
+    _cache_file(b'{"count": 0, "values": 1}'),
+    _cache_file(b'{"count": 0, "values": [[99, "x", 0]]}'),
+    _cache_file(b'{"count": 0, "values": [["x"]]}'),
+    _cache_file(b"\xff"),
+])
+def test_buffer_cache_corrupt(data: bytes, tmp_path: Path) -> None:
+    lexer = Lexer(json.spec, ["punct"])
+    expected = list(lexer.tokenize("[1, 2]"))
+    lexer.tokenize("[1, 2]", str(tmp_path))
+    for path in tmp_path.iterdir():
+        path.write_bytes(data)
+    assert list(lexer.tokenize("[1, 2]", str(tmp_path))) == expected
+
+
+def test_buffer_error() -> None:
+    with pytest.raises(LexError) as err:
+        Lexer(re.compile(r"(?P<x>x)|\s+")).tokenize("x\n  xy")
+    assert str(err.value) == "Lexing error at 2:4"
+
+
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE)
+def test_lazy_positive(data: str, expected: object) -> None:
+    tokens = LazyTokens(iter_tokens(data, json.spec))
+    assert parse(json.parser, tokens).unwrap() == expected
+
+
+@pytest.mark.parametrize("data, expected", DATA_NEGATIVE)
+def test_lazy_negative(data: str, expected: str) -> None:
+    tokens = LazyTokens(iter_tokens(data, json.spec))
+    with pytest.raises(ParseError) as err:
+        parse(json.parser, tokens).unwrap()
+    assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, value, expected", DATA_RECOVERY)
+def test_lazy_recovery(data: str, value: object, expected: str) -> None:
+    tokens = LazyTokens(iter_tokens(data, json.spec))
+    r = parse(json.parser, tokens, recover=True)
+    assert r.unwrap(recover=True) == value
+    with pytest.raises(ParseError) as err:
+        r.unwrap()
+    assert str(err.value) == expected
+
+
+def test_lazy_stops_early() -> None:
+    pulled = 0
+
+    def tokens() -> Iterator[Token]:
+        nonlocal pulled
+        for t in iter_tokens("[1 2" + ", 3" * 1000 + "] @", json.spec):
+            pulled += 1
+            yield t
+
+    with pytest.raises(ParseError) as err:
+        parse(json.parser, LazyTokens(tokens())).unwrap()
+    assert str(err.value) == "at 1:4: expected ',' or ']'"
+    assert pulled < 100
+
+
+def test_lazy_eof() -> None:
+    pulled = 0
+
+    def tokens() -> Iterator[Token]:
+        nonlocal pulled
+        for t in iter_tokens("1" + " 2" * 1000, json.spec):
+            pulled += 1
+            yield t
+
+    lazy = LazyTokens(tokens())
+    end: Parser[Sequence[Token], None] = eof()
+    parser = end | token("integer")
+    assert parser.parse_prefix(lazy).unwrap()[1] == 1
+    assert pulled == 1
+    assert not lazy.at_end(5)
+    assert pulled == 6
+    assert LazyTokens(iter([])).at_end(0)
+
+
+def test_window() -> None:
+    tokens = split_tokens("[1] {\"a\": [2, 3]} [", json.spec)
+    value, pos = json.value.parse_prefix(tokens, start=3).unwrap()
+    assert (value, pos) == ({"a": [2, 3]}, 12)
+    assert json.parser.parse(tokens, start=0, end=3).unwrap() == [1]
+    with pytest.raises(ParseError) as err:
+        json.parser.parse(tokens, start=6, end=9).unwrap()
+    assert str(err.value) == "at 9: expected value"
+
+
+def test_lazy_lex_error() -> None:
+    spec = re.compile(r"(?P<x>x)|\s+")
+    tokens = LazyTokens(iter_tokens("x x y", spec))
+    assert tokens[1] == Token("x", "x")
+    with pytest.raises(LexError):
+        tokens[2]
@@ -0,0 +1,73 @@
+import re
+
+import pytest
+
+from reparsec import ParseError
+from reparsec.lexer import Lexer, parse, split_tokens
+
+from .parsers import json, json_buffer
+from .test_json import DATA_BUFFER, DATA_NEGATIVE, DATA_POSITIVE, DATA_RECOVERY
+
+
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE)
+def test_positive(data: str, expected: object) -> None:
+    assert json_buffer.loads(data) == expected
+
+
+@pytest.mark.parametrize("data, expected", DATA_NEGATIVE)
+def test_negative(data: str, expected: str) -> None:
+    with pytest.raises(ParseError) as err:
+        json_buffer.loads(data)
+    assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, value, expected", DATA_RECOVERY)
+def test_recovery(data: str, value: object, expected: str) -> None:
+    r = parse(
+        json_buffer.parser, json_buffer.lexer.tokenize(data), recover=True
+    )
+    assert r.unwrap(recover=True) == value
+    with pytest.raises(ParseError) as err:
+        r.unwrap()
+    assert str(err.value) == expected
+
+
+@pytest.mark.parametrize(
+    "data", DATA_BUFFER + [d for d, _ in DATA_POSITIVE + DATA_NEGATIVE]
+)
+def test_dispatch(data: str) -> None:
+    tokens = json_buffer.lexer.tokenize(data)
+    dispatched = json_buffer.dispatch_lexer.tokenize(data)
+    assert list(dispatched) == list(tokens)
+    assert dispatched.starts == tokens.starts
+    assert dispatched.ends == tokens.ends
+    assert dispatched.kind_ids == tokens.kind_ids
+    assert [
+        json_buffer.dispatch_lexer.value_id("punct", t.value)
+        for t in dispatched if t.kind == "punct"
+    ] == [v for v in dispatched.value_ids if v != -1]
+
+
+def test_dispatch_unknown_kind() -> None:
+    with pytest.raises(ValueError):
+        Lexer(json_buffer.spec, dispatch={"x": re.compile("(?P<x>x)")})
+
+
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE)
+def test_keywords(data: str, expected: object) -> None:
+    tokens = json_buffer.keyword_lexer.tokenize(data)
+    assert list(tokens) == split_tokens(data, json.spec)
+    assert parse(json_buffer.keyword_parser, tokens).unwrap() == expected
+
+
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE)
+def test_keywords_split(data: str, expected: object) -> None:
+    tokens = split_tokens(
+        data, json_buffer.keyword_spec, json_buffer.keywords
+    )
+    assert parse(json.parser, tokens).unwrap() == expected
+
+
+def test_keywords_unknown_kind() -> None:
+    with pytest.raises(ValueError):
+        Lexer(json_buffer.spec, keywords={"word": {"if": "if"}})
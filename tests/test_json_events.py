@@ -0,0 +1,48 @@
+from typing import List, Tuple
+
+import pytest
+
+from reparsec import ParseError
+
+from .parsers import json_events
+
+DATA_POSITIVE: List[Tuple[str, object]] = [
+    (r"1", 1),
+    (r"-1.0", -1.0),
+    (r"true", True),
+    (r"null", None),
+    (r'"string\nvalue"', "string\nvalue"),
+    (r"{}", {}),
+    (r"[]", []),
+    (r'{"bool": true, "number": 1}', {"bool": True, "number": 1}),
+    (r'{"nested": {"list": [1, [], {}]}}', {"nested": {"list": [1, [], {}]}}),
+    (r'[[1, 2], {"a": null}, "b"]', [[1, 2], {"a": None}, "b"]),
+]
+
+
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE)
+def test_positive(data: str, expected: object) -> None:
+    assert json_events.loads(data) == expected
+
+
+@pytest.mark.parametrize("data, expected", [
+    (data, expected) for data, expected in DATA_POSITIVE
+    if isinstance(expected, list)
+])
+def test_iterparse(data: str, expected: object) -> None:
+    assert json_events.iterloads(data) == expected
+
+
+DATA_NEGATIVE = [
+    ("", "at 1:1: expected value"),
+    ("1 1", "at 1:3: expected end of file"),
+    ('{"key": 0,', "at 1:11: expected string"),
+    ("[0", "at 1:3: expected ',' or ']'"),
+]
+
+
+@pytest.mark.parametrize("data, expected", DATA_NEGATIVE)
+def test_negative(data: str, expected: str) -> None:
+    with pytest.raises(ParseError) as err:
+        json_events.loads(data)
+    assert str(err.value) == expected
@@ -1,9 +1,14 @@
-from typing import List, Tuple
+import asyncio
+from io import StringIO
+from typing import Iterator, List, Tuple
 
 import pytest
 
-from reparsec import ParseError
-from reparsec.scannerless import parse
+from reparsec import EventHandler, ParseError, ParseResult
+from reparsec.scannerless import (
+    iterparse, parse, parse_async, parse_events, parse_stream, push_session
+)
+from reparsec.sequence import eof
 
 from .parsers import json_scannerless
 
@@ -32,6 +37,102 @@ def test_positive(data: str, expected: object) -> None:
     assert json_scannerless.loads(data) == expected
 
 
+@pytest.mark.parametrize("chunk_size", [16, 64])
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE + [
+    ("[\n" + ",\n".join(["[1, 2.5]"] * 50) + "\n]", [[1, 2.5]] * 50),
+    ('["' + "a" * 100 + '", 1]', ["a" * 100, 1]),
+    ("[" + "1" * 100 + ".5]", [float("1" * 100 + ".5")]),
+])
+def test_stream_positive(
+        data: str, expected: object, chunk_size: int) -> None:
+    stream = StringIO(data)
+    r = parse_stream(json_scannerless.parser, stream, False, chunk_size)
+    assert r.unwrap() == expected
+
+
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE)
+def test_events_positive(data: str, expected: object) -> None:
+    r = parse_events(json_scannerless.parser, data, EventHandler())
+    assert r.unwrap() == expected
+    values: List[object] = []
+
+    class Values(EventHandler):
+        def value(self, rule: str, value: object) -> None:
+            values.append(value)
+
+    parser = json_scannerless.value.named("value").many() << eof()
+    assert parse_events(parser, data, Values()).unwrap() is None
+    assert values == [expected]
+
+
+def _push(data: str, recover: bool) -> ParseResult[object, str]:
+    session = push_session(json_scannerless.parser, recover, 16)
+    for i in range(0, len(data), 3):
+        session.feed(data[i:i + 3])
+    return session.close()
+
+
+def _parse_async(data: str, recover: bool) -> ParseResult[object, str]:
+    async def run() -> ParseResult[object, str]:
+        reader = asyncio.StreamReader()
+        encoded = data.encode()
+        for i in range(0, len(encoded), 3):
+            reader.feed_data(encoded[i:i + 3])
+        reader.feed_eof()
+        return await parse_async(
+            json_scannerless.parser, reader, recover, 16
+        )
+
+    return asyncio.run(run())
+
+
+def _iterparse(data: str) -> Iterator[object]:
+    return iterparse(
+        json_scannerless.value, data, json_scannerless.punct(","),
+        open=json_scannerless.ows >> json_scannerless.punct("["),
+        close=json_scannerless.punct("]") << eof()
+    )
+
+
+@pytest.mark.parametrize("data, expected", [
+    (data, expected) for data, expected in DATA_POSITIVE
+    if isinstance(expected, list)
+] + [
+    ("[\n" + ",\n".join(['{"a": [1]}'] * 50) + "\n]", [{"a": [1]}] * 50),
+])
+def test_iterparse_positive(data: str, expected: object) -> None:
+    assert list(_iterparse(data)) == expected
+
+
+DATA_ITERPARSE_NEGATIVE: List[Tuple[str, List[object], str]] = [
+    ("", [], "at 1:1: expected '['"),
+    ("[1, 2 3]", [1, 2], "at 1:7: expected ',' or ']'"),
+    ("[1, {]", [1], "at 1:6: expected string or '}'"),
+    ("[1] 2", [1], "at 1:5: expected end of file"),
+]
+
+
+@pytest.mark.parametrize("data, values, expected", DATA_ITERPARSE_NEGATIVE)
+def test_iterparse_negative(
+        data: str, values: List[object], expected: str) -> None:
+    items = _iterparse(data)
+    for value in values:
+        assert next(items) == value
+    with pytest.raises(ParseError) as err:
+        next(items)
+    assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE)
+def test_push_positive(data: str, expected: object) -> None:
+    assert _push(data, False).unwrap() == expected
+
+
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE)
+def test_async_positive(data: str, expected: object) -> None:
+    assert _parse_async(data, False).unwrap() == expected
+
+
 DATA_NEGATIVE = [
     ("", "at 1:1: expected value"),
     ("1 1", "at 1:3: expected end of file"),
@@ -53,6 +154,32 @@ def test_negative(data: str, expected: str) -> None:
     assert str(err.value) == expected
 
 
+@pytest.mark.parametrize("chunk_size", [16, 64])
+@pytest.mark.parametrize("data, expected", DATA_NEGATIVE + [
+    ("[\n" + "1,\n" * 50 + "2 3]", "at 52:3: expected ',' or ']'"),
+])
+def test_stream_negative(data: str, expected: str, chunk_size: int) -> None:
+    with pytest.raises(ParseError) as err:
+        parse_stream(
+            json_scannerless.parser, StringIO(data), False, chunk_size
+        ).unwrap()
+    assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, expected", DATA_NEGATIVE)
+def test_push_negative(data: str, expected: str) -> None:
+    with pytest.raises(ParseError) as err:
+        _push(data, False).unwrap()
+    assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, expected", DATA_NEGATIVE)
+def test_async_negative(data: str, expected: str) -> None:
+    with pytest.raises(ParseError) as err:
+        _parse_async(data, False).unwrap()
+    assert str(err.value) == expected
+
+
 DATA_RECOVERY: List[Tuple[str, object, str]] = [
     ("1 1", 1, "at 1:3: expected end of file (skipped 1 token)"),
     ("{", {}, "at 1:2: expected string or '}' (inserted '}')"),
@@ -111,3 +238,30 @@ def test_recovery(data: str, value: object, expected: str) -> None:
     with pytest.raises(ParseError) as err:
         r.unwrap()
     assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, value, expected", DATA_RECOVERY)
+def test_stream_recovery(data: str, value: object, expected: str) -> None:
+    r = parse_stream(json_scannerless.parser, StringIO(data), True, 2)
+    assert r.unwrap(recover=True) == value
+    with pytest.raises(ParseError) as err:
+        r.unwrap()
+    assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, value, expected", DATA_RECOVERY)
+def test_push_recovery(data: str, value: object, expected: str) -> None:
+    r = _push(data, True)
+    assert r.unwrap(recover=True) == value
+    with pytest.raises(ParseError) as err:
+        r.unwrap()
+    assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, value, expected", DATA_RECOVERY)
+def test_async_recovery(data: str, value: object, expected: str) -> None:
+    r = _parse_async(data, True)
+    assert r.unwrap(recover=True) == value
+    with pytest.raises(ParseError) as err:
+        r.unwrap()
+    assert str(err.value) == expected
@@ -15,6 +15,10 @@ DATA_POSITIVE = [
     (aligned(a), "a", "a"),
     (block(aligned(a)), "a", "a"),
     (ws >> indented(2, a), "  a", "a"),
+    (
+        block(a + (ws >> indented(2, a + (ws >> aligned(a))))),
+        "a\n\n\t a\n\t\ta", ("a", ("a", "a"))
+    ),
 ]
 
 
@@ -29,6 +33,7 @@ def test_recovery(
 DATA_NEGATIVE = [
     (ws >> indented(2, a), " a", ["indentation"]),
     (ws >> aligned(a), " a", ["indentation"]),
+    (block(a + (ws >> indented(2, a))), "a\n \n a", ["indentation"]),
 ]
 
 
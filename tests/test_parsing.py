@@ -1,10 +1,23 @@
-from typing import List, Sequence
+import asyncio
+import gc
+import sys
+from io import StringIO
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+from typing import List, Sequence, Tuple, cast
 
 import pytest
 
-from reparsec import ParseError, Parser
+from reparsec import EventHandler, ParseError, Parser
+from reparsec.core.result import Ok
+from reparsec.core.scannerless import LineIndex
+from reparsec.core.stream import TextStream
+from reparsec.core.types import Bytes, Ctx, Loc
 from reparsec.primitive import Pure, PureFn
-from reparsec.sequence import digit, letter, sym
+from reparsec.scannerless import (
+    literal, parse, parse_async, parse_stream, push_session, regexp
+)
+from reparsec.sequence import digit, eof, letter, satisfy, sym
 
 a = sym("a")
 b = sym("b")
@@ -73,6 +86,376 @@ def test_positive(
     assert parser.parse(data, recover=recover).unwrap() == value
 
 
+@pytest.mark.parametrize("parser, data, value", DATA_POSITIVE)
+def test_stream_positive(
+        parser: Parser[str, str], data: str, value: str) -> None:
+    assert parse_stream(parser, StringIO(data), chunk_size=1).unwrap() == value
+
+
+def test_stream_window() -> None:
+    stream = TextStream(StringIO("ab" * 1000), 8)
+    sizes = []
+    parser = literal("ab").fmap(lambda _: sizes.append(len(stream.text)))
+    parser.many().parse(cast(str, stream)).unwrap()
+    assert max(sizes) <= 24
+
+
+def test_stream_regexp_window() -> None:
+    stream = TextStream(StringIO("ab" * 1000), 8)
+    sizes = []
+    parser = regexp("a+c") | regexp("ab").fmap(
+        lambda _: sizes.append(len(stream.text))
+    )
+    parser.many().parse(cast(str, stream)).unwrap()
+    assert max(sizes) <= 24
+
+
+def test_stream_regexp_partial() -> None:
+    data = "a" * 100 + "b"
+    parser = regexp("a+b") | regexp("a+")
+    assert parse_stream(parser, StringIO(data), chunk_size=8).unwrap() == data
+    stream = StringIO("a" * 100)
+    assert parse_stream(parser, stream, chunk_size=8).unwrap() == "a" * 100
+
+
+def test_ctx() -> None:
+    ctx: Ctx[str] = Ctx(0, Loc(0, 0, 0), lambda _, s, p: Loc(p, 0, p))
+    r = (literal("a") + literal("b")).parse_fast_fn("abc", 0, ctx)
+    assert type(r) is Ok and r.value == ("a", "b") and r.pos == 2
+    assert r.ctx.loc == Loc(2, 0, 2) and r.ctx.end == sys.maxsize
+
+
+def test_stream_attempt() -> None:
+    stream = TextStream(StringIO("ab" * 1000 + "d" + "ab" * 1000), 8)
+    parser = (
+        (literal("ab").many() << literal("c")).attempt() |
+        literal("ab").many() << literal("d")
+    ) + literal("ab").many() << eof()
+    assert parser.parse(cast(str, stream)).unwrap() == (
+        ["ab"] * 1000, ["ab"] * 1000
+    )
+    with pytest.raises(ValueError):
+        stream.startswith("ab", 0, 2)
+
+
+def test_stream_attempt_exception() -> None:
+    def fail(_: str) -> str:
+        raise KeyError("fail")
+
+    stream = TextStream(StringIO("ab" * 1000), 8)
+    with pytest.raises(KeyError):
+        literal("ab").fmap(fail).attempt().parse(cast(str, stream))
+    parser = literal("ab").many().fmap(lambda _: len(stream.text))
+    assert parser.parse(cast(str, stream), start=2).unwrap() <= 24
+
+
+def test_push_session() -> None:
+    values: List[str] = []
+    parser = literal("ab").fmap(values.append).many() << eof()
+    session = push_session(parser)
+    session.feed("aba")
+    assert values == ["ab"]
+    session.feed("b")
+    assert values == ["ab", "ab"]
+    assert session.close().unwrap() == [None, None]
+    with pytest.raises(ValueError):
+        session.feed("ab")
+
+
+def test_push_session_exception() -> None:
+    def fail(_: str) -> str:
+        raise KeyError("fail")
+
+    session = push_session(literal("ab").fmap(fail))
+    session.feed("ab")
+    with pytest.raises(KeyError):
+        session.close()
+
+
+def test_push_session_dropped() -> None:
+    values: List[str] = []
+    session = push_session(literal("ab").fmap(values.append).many())
+    session.feed("abab")
+    thread = session._thread
+    del session
+    gc.collect()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert values == ["ab", "ab"]
+
+
+def test_parse_async() -> None:
+    async def run() -> Tuple[str, int]:
+        reader = asyncio.StreamReader()
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        async def feed() -> None:
+            data = "\u00e9\u4e2d".encode() * 20000
+            for i in range(0, len(data), 1001):
+                reader.feed_data(data[i:i + 1001])
+                await asyncio.sleep(0)
+            reader.feed_eof()
+
+        ticker = asyncio.ensure_future(tick())
+        feeder = asyncio.ensure_future(feed())
+        parser = regexp("[\u00e9\u4e2d]").many().fmap("".join)
+        r = await parse_async(parser, reader, chunk_size=4096)
+        await feeder
+        ticker.cancel()
+        return r.unwrap(), ticks
+
+    text, ticks = asyncio.run(run())
+    assert text == "\u00e9\u4e2d" * 20000
+    assert ticks > 10
+
+
+def test_parse_async_responsive() -> None:
+    async def run() -> Tuple[int, int]:
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"ab" * 200000)
+        reader.feed_eof()
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.ensure_future(tick())
+        parser = literal("ab").many().fmap(len)
+        r = await parse_async(parser, reader, chunk_size=1 << 20)
+        ticker.cancel()
+        return r.unwrap(), ticks
+
+    count, ticks = asyncio.run(run())
+    assert count == 200000
+    assert ticks > 10
+
+
+def test_parse_async_cancel() -> None:
+    async def run() -> None:
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"ab")
+        task = asyncio.ensure_future(parse_async(literal("ab").many(), reader))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+
+def test_push_session_abort() -> None:
+    session = push_session(literal("ab").many())
+    session.feed("ab")
+    session.abort()
+    session._thread.join(5)
+    assert not session._thread.is_alive()
+    with pytest.raises(ValueError):
+        session.feed("ab")
+
+
+DATA_WINDOW: List[Tuple[Parser[str, object], str, int, int, object]] = [
+    (a.many() << eof(), "baab", 1, 3, ["a", "a"]),
+    (regexp("a+$"), "baab", 1, 3, "aa"),
+    (literal("ab").maybe(), "aab", 1, 2, None),
+    (ident << eof(), "a b1c_d ", 2, 7, "b1c_d"),
+    (regexp("[a-z]").many() << eof(), "x\ny\n", 2, 3, ["y"]),
+]
+
+
+@pytest.mark.parametrize("parser, data, start, end, value", DATA_WINDOW)
+def test_window(
+        parser: Parser[str, object], data: str, start: int, end: int,
+        value: object) -> None:
+    assert parser.parse(data, start=start, end=end).unwrap() == value
+    assert parse(parser, data, start=start, end=end).unwrap() == value
+
+
+DATA_WINDOW_NEGATIVE = [
+    (a << eof(), "aab", 1, 3, "at 2: expected end of file"),
+    (literal("ab"), "aab", 1, 2, "at 1: expected 'ab'"),
+    (
+        regexp("[a-z]+") << eof(), "ab\ncd\n1", 3, 7,
+        "at 5: expected end of file"
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "parser, data, start, end, expected", DATA_WINDOW_NEGATIVE
+)
+def test_window_negative(
+        parser: Parser[str, object], data: str, start: int, end: int,
+        expected: str) -> None:
+    with pytest.raises(ParseError) as err:
+        parser.parse(data, start=start, end=end).unwrap()
+    assert str(err.value) == expected
+
+
+def test_window_loc() -> None:
+    parser = (literal("a") << literal("\n")).many() << eof()
+    with pytest.raises(ParseError) as err:
+        parse(parser, "a\nb\na\na\nb\n", start=4, end=9).unwrap()
+    assert str(err.value) == "at 3:1: expected 'a' or end of file"
+    with pytest.raises(ParseError) as err:
+        parse(parser, "xa\nb", start=1).unwrap()
+    assert str(err.value) == "at 2:1: expected 'a' or end of file"
+
+
+def test_window_recovery() -> None:
+    parser = (a << b).many() << eof()
+    r = parser.parse("abxab|ab", True, start=0, end=5)
+    assert r.unwrap(True) == ["a"]
+    with pytest.raises(ParseError) as err:
+        r.unwrap()
+    assert str(err.value) == (
+        "at 2: expected 'a' or end of file (skipped 3 tokens)"
+    )
+    with pytest.raises(ValueError):
+        parser.parse("ab", start=2, end=1)
+
+
+def test_parse_prefix() -> None:
+    parser = regexp("[a-z]+") << regexp(";?")
+    data = "ab;cde;f"
+    values = []
+    pos = 0
+    while pos < len(data):
+        value, pos = parser.parse_prefix(data, start=pos).unwrap()
+        values.append(value)
+    assert values == ["ab", "cde", "f"]
+
+
+def test_line_index_window() -> None:
+    data = "a=1\n" * 100000
+    start = len(data) // 2
+    index = LineIndex(data, start)
+    assert index.get_loc(Loc(start, 0, 0), data, start + 6) == Loc(
+        start + 6, 1, 2
+    )
+    assert len(index.lines) < 1000
+
+
+def test_iterparse() -> None:
+    assert list(a.iterparse("aab", close=b << eof())) == ["a", "a"]
+    assert list(a.iterparse("", sym(","))) == []
+    assert list(a.iterparse("xa,a,ay", sym(","), start=1, end=6)) == [
+        "a", "a", "a"
+    ]
+    items = a.iterparse("aac", close=b)
+    assert next(items) == "a"
+    assert next(items) == "a"
+    with pytest.raises(ParseError) as err:
+        next(items)
+    assert str(err.value) == "at 2: expected 'a' or 'b'"
+    with pytest.raises(RuntimeError):
+        list(Pure[str, str]("a").iterparse("a"))
+
+
+class EventLog(EventHandler):
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, str, object]] = []
+
+    def start(self, rule: str, pos: int) -> None:
+        self.events.append(("start", rule, pos))
+
+    def value(self, rule: str, value: object) -> None:
+        self.events.append(("value", rule, value))
+
+    def end(self, rule: str, pos: int) -> None:
+        self.events.append(("end", rule, pos))
+
+
+named_a = a.named("a")
+named_b = b.named("b")
+
+DATA_EVENTS: List[Tuple[Parser[str, object], str, List[object]]] = [
+    (named_a, "a", [("start", "a", 0), ("value", "a", "a"), ("end", "a", 1)]),
+    (
+        (named_a + named_b).named("ab"), "ab",
+        [
+            ("start", "ab", 0), ("start", "a", 0), ("value", "a", "a"),
+            ("end", "a", 1), ("start", "b", 1), ("value", "b", "b"),
+            ("end", "b", 2), ("end", "ab", 2),
+        ]
+    ),
+    (
+        (Pure[str, str]("x").named("x") + a) | named_b, "b",
+        [("start", "b", 0), ("value", "b", "b"), ("end", "b", 1)]
+    ),
+    (
+        (named_a + a).attempt() | named_a + b, "ab",
+        [("start", "a", 0), ("value", "a", "a"), ("end", "a", 1)]
+    ),
+    (named_a.many(), "aa", [
+        ("start", "a", 0), ("value", "a", "a"), ("end", "a", 1),
+        ("start", "a", 1), ("value", "a", "a"), ("end", "a", 2),
+    ]),
+]
+
+
+@pytest.mark.parametrize("parser, data, events", DATA_EVENTS)
+def test_events(
+        parser: Parser[str, object], data: str, events: List[object]) -> None:
+    log = EventLog()
+    parser.parse_events(data, log).unwrap()
+    assert log.events == events
+
+
+def test_events_values() -> None:
+    parser = named_a + named_b
+    assert parser.parse("ab").unwrap() == ("a", "b")
+    r = parser.parse_events("ab", EventHandler())
+    assert r.unwrap() is None
+    log = EventLog()
+    with pytest.raises(ParseError):
+        parser.parse_events("aa", log).unwrap()
+    assert log.events == [
+        ("start", "a", 0), ("value", "a", "a"), ("end", "a", 1)
+    ]
+
+
+def test_events_streaming() -> None:
+    log = EventLog()
+
+    def mark(x: str) -> str:
+        log.events.append(("fmap", x, None))
+        return x
+
+    parser = (named_a + b.fmap(mark)).named("ab") + (
+        (named_a + b).attempt() | named_a.fmap(mark) + a
+    )
+    parser.parse_events("abaa", log).unwrap()
+    assert log.events == [
+        ("start", "ab", 0), ("start", "a", 0), ("value", "a", "a"),
+        ("end", "a", 1), ("fmap", "b", None), ("end", "ab", 2),
+        ("start", "a", 2), ("value", "a", "a"), ("end", "a", 3),
+    ]
+
+
+def test_events_skip_values() -> None:
+    d = satisfy(str.isdigit).named("d")
+    num = d.many().fmap("".join).named("num")
+    parser = ((num << sym(",")) + num).fmap(lambda t: t[0] + t[1])
+    assert parser.parse("12,3").unwrap() == "123"
+    log = EventLog()
+    assert parser.parse_events("12,3", log).unwrap() is None
+    assert [e for e in log.events if e[0] == "end"] == [
+        ("end", "d", 1), ("end", "d", 2), ("end", "num", 2),
+        ("end", "d", 4), ("end", "num", 4)
+    ]
+    with pytest.raises(RuntimeError):
+        d.bind(lambda _: d).parse_events("12", log)
+
+
 DATA_NEGATIVE = [
     (ident, "0", ["letter", "'_'"]),
 ]
@@ -86,3 +469,60 @@ def test_negative(
     with pytest.raises(ParseError) as err:
         parser.parse(data, recover=recover).unwrap()
     assert err.value.errors[0].expected == expected
+
+
+key_value = (
+    (regexp(rb"[a-z]+") << literal(b"=")) + regexp(rb"[0-9]+")
+).sep_by(regexp(rb"\n+")) << eof()
+
+
+def to_buffer(data: bytes, kind: str, tmp_path: Path) -> Bytes:
+    if kind == "mmap":
+        path = tmp_path / "data"
+        path.write_bytes(data + b"\0")
+        with open(path, "rb") as f:
+            return mmap(f.fileno(), len(data), access=ACCESS_READ)
+    if kind == "bytearray":
+        return bytearray(data)
+    if kind == "memoryview":
+        return memoryview(data)
+    return data
+
+
+BUFFERS = ["bytes", "bytearray", "memoryview", "mmap"]
+
+DATA_BYTES = [
+    (b"a=1\n\nbc=23", [(b"a", b"1"), (b"bc", b"23")], ""),
+    (b"a=1\nb 2", [(b"a", b"1"), (b"b", b"2")], (
+        "at 2:2: expected b'=' (inserted b'='), " +
+        "at 2:2: unexpected input (skipped 1 token)"
+    )),
+    (b"a=1\n\n  b=2", [(b"a", b"1"), (b"b", b"2")], (
+        "at 3:1: unexpected input (skipped 2 tokens)"
+    )),
+]
+
+
+@pytest.mark.parametrize("kind", BUFFERS)
+@pytest.mark.parametrize("data, value, expected", DATA_BYTES)
+def test_bytes(
+        data: bytes, value: object, expected: str, kind: str,
+        tmp_path: Path) -> None:
+    r = parse(key_value, to_buffer(data, kind, tmp_path), recover=True)
+    assert r.unwrap(recover=True) == value
+    if expected:
+        with pytest.raises(ParseError) as err:
+            r.unwrap()
+        assert str(err.value) == expected
+
+
+def test_bytes_line_index(tmp_path: Path) -> None:
+    data = b"a=1\n" * 100000
+    buf = to_buffer(data, "mmap", tmp_path)
+    index = LineIndex(buf)
+    assert index.get_loc(Loc(0, 0, 0), buf, 6) == Loc(6, 1, 2)
+    assert len(index.lines) < 1000
+    assert index.get_loc(Loc(0, 0, 0), buf, len(data) - 1) == Loc(
+        len(data) - 1, 99999, 3
+    )
+    assert len(index.lines) == 100000
@@ -1,9 +1,9 @@
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 import pytest
 
-from reparsec import Parser
-from reparsec.sequence import eof, sym
+from reparsec import Delay, ParseError, Parser
+from reparsec.sequence import balanced, eof, satisfy, sym
 
 a = sym("a")
 b = sym("b")
@@ -16,6 +16,13 @@ aba = (ab + a).fmap("".join)
 abaa = (aba + a).fmap("".join)
 aaba = (a + aba).fmap("".join)
 caba = (c + aba).fmap("".join)
+ab_sync = (ab.sync_on(comma, "?") << comma).many()
+nested = Delay[Sequence[str], object]()
+nested.define(
+    a | balanced(
+        nested.sep_by(comma).between(sym("["), sym("]")), {"[": "]"}, "?"
+    )
+)
 
 
 DATA_RECOVERY: List[Tuple[Parser[str, object], str, object]] = [
@@ -75,6 +82,16 @@ DATA_RECOVERY: List[Tuple[Parser[str, object], str, object]] = [
     (caba | abaa, "b", "caba"),
     (aaba | caba, "b", "aaba"),
     (caba | aaba, "b", "caba"),
+    (ab.sync_on(comma, "?"), "c", "?"),
+    (ab.sync_on(comma, "?"), "cab", "?"),
+    (ab.sync_on(comma, "?"), "a", "?"),
+    (ab_sync, "ab,ac,ab,", ["ab", "?", "ab"]),
+    (ab_sync, "ab,a,", ["ab", "?"]),
+    (ab_sync, "ab,aca", ["ab", "?"]),
+    (nested, "[a,[a,b],a]", ["a", "?", "a"]),
+    (nested, "[a,[[b]],a]", ["a", ["?"], "a"]),
+    (nested, "[a,b]", "?"),
+    (nested, "[a,[b]", ["a", "?"]),
 ]
 
 
@@ -83,3 +100,112 @@ def test_recovery(
         parser: Parser[str, object], data: str, expected: object) -> None:
     result = (parser << eof()).parse(data, recover=True)
     assert result.unwrap(recover=True) == expected
+
+
+DATA_SYNC: List[Tuple[str, str]] = [
+    ("ab,ac,ab,", "at 4: expected 'b' (skipped 1 token)"),
+    ("ab,acc,", "at 4: expected 'b' (skipped 2 tokens)"),
+    ("ab,a,", "at 4: expected 'b' (inserted '?')"),
+    (
+        "ab,aca",
+        "at 4: expected 'b' (skipped 2 tokens), at 6: expected ',' "
+        "(inserted ',')"
+    ),
+]
+
+
+@pytest.mark.parametrize("data, expected", DATA_SYNC)
+def test_sync_on(data: str, expected: str) -> None:
+    result = (ab_sync << eof()).parse(data, recover=True)
+    with pytest.raises(ParseError) as err:
+        result.unwrap()
+    assert str(err.value) == expected
+
+
+def test_sync_on_label() -> None:
+    parser = ab.sync_on(comma, None, "statement") << comma
+    result = parser.parse("a,", recover=True)
+    assert result.unwrap(recover=True) is None
+    with pytest.raises(ParseError) as err:
+        result.unwrap()
+    assert str(err.value) == "at 1: expected 'b' (inserted statement)"
+
+
+DATA_SYNC_WINDOW: List[Tuple[str, int, int, str]] = [
+    ("ab,ac,ab,", 3, 6, "at 4: expected 'b' (skipped 1 token)"),
+    (
+        "ab,ac,ab,", 0, 5,
+        "at 4: expected 'b' (skipped 1 token), at 5: expected ',' "
+        "(inserted ',')"
+    ),
+    (
+        "xab,acb,", 1, 6,
+        "at 5: expected 'b' (skipped 1 token), at 6: expected ',' "
+        "(inserted ',')"
+    ),
+]
+
+
+@pytest.mark.parametrize("data, start, end, expected", DATA_SYNC_WINDOW)
+def test_sync_on_window(
+        data: str, start: int, end: int, expected: str) -> None:
+    result = (ab_sync << eof()).parse(data, recover=True, start=start, end=end)
+    with pytest.raises(ParseError) as err:
+        result.unwrap()
+    assert str(err.value) == expected
+
+
+DATA_BALANCED: List[Tuple[str, str]] = [
+    ("[a,[a,b],a]", "at 6: expected 'a' or '[' (skipped 2 tokens)"),
+    ("[a,[a]a]", "at 6: expected ',' or ']' (skipped 2 tokens)"),
+    (
+        "[a,[b]",
+        "at 4: expected 'a', '[' or ']' (skipped 2 tokens), " +
+        "at 6: expected ',' or ']' (inserted ']')"
+    ),
+]
+
+
+@pytest.mark.parametrize("data, expected", DATA_BALANCED)
+def test_balanced(data: str, expected: str) -> None:
+    result = (nested << eof()).parse(data, recover=True)
+    with pytest.raises(ParseError) as err:
+        result.unwrap()
+    assert str(err.value) == expected
+
+
+DATA_ADAPTIVE: List[Tuple[Optional[int], object, str]] = [
+    (None, ["ab", "ab", "ab"], "at 3: expected 'a' (inserted 'a')"),
+    (1, ["ab", "ab", "ab"], "at 3: expected 'a' (inserted 'a')"),
+    (2, ["ab", "ab"], "at 3: expected 'a' (skipped 2 tokens)"),
+]
+
+
+@pytest.mark.parametrize("max_cost, value, expected", DATA_ADAPTIVE)
+def test_recovery_adaptive(
+        max_cost: Optional[int], value: object, expected: str) -> None:
+    result = (ab.sep_by(comma) << eof()).parse(
+        "ab,b,ab", recover=True, max_cost=max_cost
+    )
+    assert result.unwrap(recover=True) == value
+    with pytest.raises(ParseError) as err:
+        result.unwrap()
+    assert str(err.value) == expected
+
+
+def test_recovery_many_errors() -> None:
+    result = (ab.sep_by(comma) << eof()).parse("a," * 2000 + "a", recover=True)
+    assert result.unwrap(recover=True) == ["ab"] * 2001
+
+
+def test_recovery_resumes_many() -> None:
+    calls: List[str] = []
+
+    def test(c: str) -> bool:
+        calls.append(c)
+        return c == "a"
+
+    parser = satisfy(test).many() + b << eof()
+    result = parser.parse("a" * 100 + "c", recover=True)
+    assert result.unwrap(recover=True) == (["a"] * 100, "b")
+    assert len(calls) == 102
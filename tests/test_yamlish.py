@@ -1,8 +1,11 @@
-from typing import List, Tuple
+from typing import List, Tuple, Type
 
 import pytest
 
-from .parsers import yamlish
+from reparsec import ParseError
+from reparsec.lexer import LexError
+
+from .parsers import yamlish, yamlish_tokens
 
 DATA_POSITIVE: List[Tuple[str, object]] = [
     ("key: value", {"key": "value"}),
@@ -35,3 +38,25 @@ qux: quux
 @pytest.mark.parametrize("data, expected", DATA_POSITIVE)
 def test_positive(data: str, expected: object) -> None:
     assert yamlish.loads(data) == expected
+
+
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE + [
+    ("a:\n  b:\n      c: d\n  e: f\n\n", {"a": {"b": {"c": "d"}, "e": "f"}}),
+])
+def test_positive_tokens(data: str, expected: object) -> None:
+    assert yamlish_tokens.loads(data) == expected
+
+
+DATA_NEGATIVE_TOKENS = [
+    ("a:\n  b: c\n d: e", LexError, "Lexing error at 3:2"),
+    ("a: b\n  c: d", ParseError, "at 2:3: expected ident or end of file"),
+    ("a:", ParseError, "at 1:3: expected INDENT"),
+]
+
+
+@pytest.mark.parametrize("data, error, expected", DATA_NEGATIVE_TOKENS)
+def test_negative_tokens(
+        data: str, error: Type[Exception], expected: str) -> None:
+    with pytest.raises(error) as err:
+        yamlish_tokens.loads(data)
+    assert str(err.value) == expected